@@ -0,0 +1,13 @@
+"""
+pytest setup for the tests in this directory.
+
+The scripts import their siblings by bare name (from host_discovery import
+...). pytest only puts this directory on sys.path in its default import
+mode; adding it here lets the tests run from the repository root in any
+mode.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
@@ -0,0 +1,167 @@
+"""
+On-disk cache of what the camera scripts discovered, so that the next run
+probes the known-good targets first.
+
+find_camera.py, network_scanner.py and rtsp_debug.py swept the networks,
+the camera's ports and up to 21 stream URLs on every run, although the
+camera rarely moves. Entries are kept per kind, each with its own
+time-to-live (DEFAULT_TTLS):
+
+- "host":     addresses that answered a sweep (value: how they answered)
+- "ports":    open ports of a host
+- "rtsp_url": the stream URL that delivered frames, per camera host
+- "backend":  the OpenCV backend that opened a stream URL
+
+Expired entries read as missing. A cached target is only a hint: callers
+check it first, fall back to the full sweep when it no longer answers and
+forget it.
+
+The cache is one JSON file ($HOME_SERVICE_CACHE, by default
+~/.cache/home_service/discovery.json), readable by its owner only. save()
+merges the entries another script wrote since this one loaded the file,
+then replaces it atomically; delete it to start over. Values are stored as
+given: store URLs without their credentials.
+
+    cache = DiscoveryCache()
+    hosts = discover_known_first(["192.168.1.0/24"], cache)
+    url = cache.get("rtsp_url", "192.168.1.100")
+"""
+
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from host_discovery import HostResult, discover_hosts, expand_targets
+
+DEFAULT_PATH = Path(os.environ.get("HOME_SERVICE_CACHE",
+                                   Path.home() / ".cache" / "home_service" / "discovery.json"))
+HOUR = 3600
+DEFAULT_TTLS = {             # seconds
+    "host": 24 * HOUR,       # DHCP leases are commonly a day
+    "ports": 24 * HOUR,
+    "rtsp_url": 7 * 24 * HOUR,
+    "backend": 30 * 24 * HOUR,
+}
+
+class DiscoveryCache:
+    """Entries {kind: {key: {"value", "seen", "ttl"}}} loaded from and saved to one JSON file."""
+
+    def __init__(self, path: Union[str, Path, None] = None, ttls: Optional[Dict[str, float]] = None,
+                 clock: Callable[[], float] = time.time):
+        self.path = Path(path) if path is not None else DEFAULT_PATH
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.clock = clock
+        self.entries = self._load()
+        # What this instance changed, which save() applies to the file as it
+        # is then: the kind/keys put, and when each kind/key (key None: the
+        # whole kind) was forgotten
+        self.stored: Set[Tuple[str, str]] = set()
+        self.forgotten: Dict[Tuple[str, Optional[str]], float] = {}
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):  # missing, unreadable or corrupt: start empty
+            return {}
+        return entries if isinstance(entries, dict) else {}
+
+    def _fresh(self, entry: dict) -> bool:
+        return self.clock() - entry["seen"] <= entry["ttl"]
+
+    def get(self, kind: str, key, default=None):
+        """The value stored under kind/key, or `default` when missing or expired."""
+        entry = self.entries.get(kind, {}).get(str(key))
+        if entry is None or not self._fresh(entry):
+            return default
+        return entry["value"]
+
+    def put(self, kind: str, key, value, ttl: Optional[float] = None) -> None:
+        """Store `value` as seen now; ttl defaults to the kind's TTL."""
+        self.entries.setdefault(kind, {})[str(key)] = {
+            "value": value, "seen": self.clock(), "ttl": self.ttls[kind] if ttl is None else ttl}
+        self.stored.add((kind, str(key)))
+
+    def forget(self, kind: str, key) -> None:
+        self.entries.get(kind, {}).pop(str(key), None)
+        self.stored.discard((kind, str(key)))
+        self.forgotten[kind, str(key)] = self.clock()
+
+    def clear(self, kind: str) -> None:
+        self.entries.pop(kind, None)
+        self.stored = {(k, key) for k, key in self.stored if k != kind}
+        self.forgotten[kind, None] = self.clock()
+
+    def keys(self, kind: str) -> List[str]:
+        """Keys of the unexpired entries of `kind`, most recently seen first."""
+        fresh = [(entry["seen"], key) for key, entry in self.entries.get(kind, {}).items() if self._fresh(entry)]
+        return [key for _, key in sorted(fresh, reverse=True)]
+
+    def _merge(self, saved: dict) -> dict:
+        """The entries of `saved` with this instance's puts and forgets applied, newest entry winning."""
+        merged = {kind: dict(entries) for kind, entries in saved.items() if isinstance(entries, dict)}
+        for kind, entries in merged.items():
+            for key, entry in list(entries.items()):
+                forgotten = max(self.forgotten.get((kind, key), -1.0), self.forgotten.get((kind, None), -1.0))
+                if entry["seen"] <= forgotten:
+                    del entries[key]
+        for kind, key in self.stored:
+            entry = self.entries[kind][key]
+            theirs = merged.setdefault(kind, {}).get(key)
+            if theirs is None or theirs["seen"] <= entry["seen"]:
+                merged[kind][key] = entry
+        return merged
+
+    def save(self) -> bool:
+        """Merge the file's current entries, drop expired ones and write it; False when it cannot be written."""
+        try:
+            self.entries = self._merge(self._load())
+        except (KeyError, TypeError):  # entries of an unknown shape: ours replace them
+            pass
+        self.entries = {kind: {key: entry for key, entry in entries.items() if self._fresh(entry)}
+                        for kind, entries in self.entries.items()}
+        tmp = None
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # mkstemp creates the file with mode 0600 in the same directory, so
+            # other users cannot read it and os.replace() stays atomic
+            fd, tmp = tempfile.mkstemp(prefix=self.path.name + ".", suffix=".tmp", dir=self.path.parent)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f, indent=1, sort_keys=True)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            if tmp is not None and os.path.exists(tmp):
+                os.remove(tmp)
+            print(f"⚠ Could not save discovery cache {self.path}: {e}")
+            return False
+        self.stored, self.forgotten = set(), {}
+        return True
+
+def discover_known_first(targets: Union[str, Iterable[str]], cache: DiscoveryCache,
+                         on_found: Optional[Callable[[HostResult], None]] = None, rescan: bool = False,
+                         **kwargs) -> List[HostResult]:
+    """discover_hosts() over the cached hosts of `targets`; all of `targets` only when none answers.
+
+    Cached hosts that stop answering are forgotten, and the hosts found are
+    stored. rescan=True always sweeps everything. kwargs are passed to
+    discover_hosts().
+    """
+    hosts = expand_targets(targets)
+    wanted = set(hosts)
+    known = [host for host in cache.keys("host") if host in wanted]
+
+    found = []
+    if known and not rescan:
+        found = discover_hosts(known, on_found=on_found, **kwargs)
+        for host in set(known) - {result.host for result in found}:
+            cache.forget("host", host)
+    if not found:
+        found = discover_hosts(hosts, on_found=on_found, **kwargs)
+
+    for result in found:
+        cache.put("host", result.host, result.method)
+    cache.save()
+    return found
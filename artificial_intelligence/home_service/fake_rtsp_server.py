@@ -0,0 +1,159 @@
+"""
+A minimal RTSP server that stands in for a camera when testing
+rtsp_probe.py and rtsp_debug.py without one.
+
+It answers OPTIONS for any path and DESCRIBE with a small SDP for the
+configured stream paths (404 for the rest), optionally behind Digest or
+Basic authentication and with a per-path delay. It streams no media, so
+a decoder opened on it fails after DESCRIBE.
+
+    python fake_rtsp_server.py --port 8554 --paths /stream1 /live --user admin --password secret
+
+    with FakeRtspServer(["/stream1"], user="admin", password="secret") as server:
+        describe_urls([server.url("/stream1")])
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+SDP = ("v=0\r\no=- 0 0 IN IP4 127.0.0.1\r\ns=Fake camera\r\nt=0 0\r\n"
+       "m=video 0 RTP/AVP 96\r\na=rtpmap:96 H264/90000\r\na=control:track1\r\n")
+
+def _md5(text: str) -> str:
+    return hashlib.md5(text.encode()).hexdigest()
+
+class FakeRtspServer:
+    """RTSP server on its own event loop thread; use as a context manager."""
+
+    def __init__(self, paths: Iterable[str] = ("/stream1",), host: str = "127.0.0.1", port: int = 0,
+                 user: Optional[str] = None, password: Optional[str] = None, auth: str = "digest",
+                 delays: Optional[Dict[str, float]] = None, realm: str = "FakeCamera"):
+        self.paths = set(paths)
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.auth = auth                   # "digest" or "basic"
+        self.delays = delays or {}         # seconds before answering DESCRIBE, per path
+        self.realm = realm
+        self.nonce = "0123456789abcdef"
+        self.requests: List[Tuple[str, str]] = []   # (method, path) received
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.server = None
+        self.thread: Optional[threading.Thread] = None
+
+    def url(self, path: str = "", with_credentials: bool = True) -> str:
+        credentials = f"{self.user}:{self.password}@" if self.user and with_credentials else ""
+        return f"rtsp://{credentials}{self.host}:{self.port}{path}"
+
+    async def start(self) -> None:
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    def __enter__(self) -> "FakeRtspServer":
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self.start(), self.loop).result()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        async def stop():
+            self.server.close()
+            await self.server.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(stop(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+    def _authorized(self, method: str, header: Optional[str]) -> bool:
+        if self.user is None:
+            return True
+        if header is None:
+            return False
+        if self.auth == "basic":
+            return header == "Basic " + base64.b64encode(f"{self.user}:{self.password}".encode()).decode()
+        fields = dict(re.findall(r'(\w+)="?([^",]*)"?', header))
+        ha1 = _md5(f"{self.user}:{self.realm}:{self.password}")
+        ha2 = _md5(f"{method}:{fields.get('uri', '')}")
+        return fields.get("response") == _md5(f"{ha1}:{self.nonce}:{ha2}")
+
+    def _challenge(self) -> str:
+        if self.auth == "basic":
+            return f'Basic realm="{self.realm}"'
+        return f'Digest realm="{self.realm}", nonce="{self.nonce}"'
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                method, url, _ = request_line.decode("latin-1").split(" ", 2)
+                path = urlsplit(url).path
+                self.requests.append((method, path))
+                status, extra, body = self._answer(method, path, headers)
+                if method == "DESCRIBE" and status.startswith("200"):
+                    await asyncio.sleep(self.delays.get(path, 0))
+
+                lines = [f"RTSP/1.0 {status}", f"CSeq: {headers.get('cseq', '0')}"] + extra
+                if body:
+                    lines += ["Content-Type: application/sdp", f"Content-Length: {len(body)}"]
+                writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + body)
+                await writer.drain()
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    def _answer(self, method: str, path: str, headers: Dict[str, str]) -> Tuple[str, List[str], bytes]:
+        if method == "OPTIONS":
+            return "200 OK", ["Public: OPTIONS, DESCRIBE"], b""
+        if method != "DESCRIBE":
+            return "501 Not Implemented", [], b""
+        if not self._authorized(method, headers.get("authorization")):
+            return "401 Unauthorized", [f"WWW-Authenticate: {self._challenge()}"], b""
+        if path not in self.paths:
+            return "404 Not Found", [], b""
+        return "200 OK", [], SDP.encode()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8554)
+    parser.add_argument("--paths", nargs="+", default=["/stream1"])
+    parser.add_argument("--user")
+    parser.add_argument("--password")
+    parser.add_argument("--auth", choices=["digest", "basic"], default="digest")
+    args = parser.parse_args()
+
+    server = FakeRtspServer(args.paths, args.host, args.port, args.user, args.password, args.auth)
+
+    async def serve():
+        await server.start()
+        print(f"Serving {', '.join(sorted(server.paths))} at {server.url()} (Ctrl+C to stop)")
+        await server.server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,23 @@
-import subprocess
-import socket
-import time
+import sys
 
-def ping_host(host):
-    """Ping a host to check if it's reachable"""
-    try:
-        result = subprocess.run(['ping', '-n', '1', host], 
-                              capture_output=True, text=True, timeout=3)
-        return result.returncode == 0
-    except:
-        return False
+from discovery_cache import DiscoveryCache, discover_known_first
+from host_discovery import discover_hosts
 
-def scan_network_range(base_ip, start=1, end=254):
-    """Scan a range of IP addresses"""
-    print(f"Scanning {base_ip}.{start} to {base_ip}.{end}...")
-    found_devices = []
-    
-    for i in range(start, end + 1):
-        ip = f"{base_ip}.{i}"
-        if ping_host(ip):
-            found_devices.append(ip)
-            print(f"✓ Found device at {ip}")
-    
-    return found_devices
+def scan_networks(networks, cache=None, rescan=False):
+    """Scan several /24 networks in one concurrent sweep; returns {base_ip: [ips]}
+
+    With a DiscoveryCache, the devices found last time are checked first and
+    the networks are only swept when none of them answers (or rescan=True).
+    """
+    print(f"Scanning {', '.join(base_ip + '.x' for base_ip in networks)} at once...")
+    if cache is not None:
+        found = discover_known_first(list(networks), cache, rescan=rescan)
+    else:
+        found = discover_hosts(list(networks))
+    return {base_ip: [r.host for r in found if r.host.startswith(base_ip + ".")]
+            for base_ip in networks}
 
-def main():
+def main(rescan=False):
     print("IP Camera Finder")
     print("=" * 30)
     
@@ -37,12 +30,15 @@ def main():
     ]
     
     all_found_devices = []
+    found = scan_networks([base_ip for base_ip, _ in networks], DiscoveryCache(), rescan)
     
     for base_ip, description in networks:
         print(f"\n{description} ({base_ip}.x):")
-        devices = scan_network_range(base_ip)
+        devices = found[base_ip]
         all_found_devices.extend(devices)
         
+        for device in devices:
+            print(f"✓ Found device at {device}")
         if not devices:
             print("  No devices found")
     
@@ -59,6 +55,7 @@ def main():
         print("1. Try accessing each IP in your web browser (http://IP_ADDRESS)")
         print("2. Look for camera login pages")
         print("3. Check your router's DHCP client list")
+        print("4. Run with --rescan to sweep every network instead of the devices found last time")
     else:
         print("No devices found on any network!")
         print("\nTroubleshooting:")
@@ -68,4 +65,4 @@ def main():
         print("4. Check if camera is on a different network")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main(rescan="--rescan" in sys.argv) 
\ No newline at end of file
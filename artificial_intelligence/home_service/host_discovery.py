@@ -0,0 +1,430 @@
+"""
+Asyncio host discovery for the camera scanners.
+
+network_scanner.py and find_camera.py found devices by running one `ping`
+subprocess per address (find_camera.py one address at a time), so a
+mostly empty /24 cost up to 254 ping timeouts. Here every address is
+probed from one event loop:
+
+- TCP connects to a few common ports. A host that accepts *or refuses*
+  the connection is up, since a refusal also comes from the host itself;
+  devices that drop every probed port look down;
+- optionally ICMP echo over a raw socket, which needs root/administrator
+  (or, on Linux, an ICMP datagram socket allowed by
+  net.ipv4.ping_group_range). With icmp=None it is used when the socket
+  can be opened and skipped otherwise;
+- at most `concurrency` probes are in flight, and each host has a deadline
+  of `timeout` seconds for all its probes together.
+
+scan_ports() checks every host x port pair under one concurrency limit,
+with connect timeouts that adapt to the measured round-trip times.
+
+Hosts are reported as they answer, so a slow or silent address never holds
+back the ones behind it; a sweep can stop once `limit` hosts are found,
+and a ScanProgress passed in shows probes/s and probes in flight while it
+runs. Loopback addresses stand in for a LAN
+when testing: every 127.0.0.0/8 address refuses connections to closed
+ports, so pass count_refused=False and listen on a few of them.
+
+    python host_discovery.py 192.168.1.0/24 192.168.0 --ports 80 554
+    hosts = discover_hosts(["192.168.1.0/24"])
+    async for result in scan_ports(["192.168.1.0/24"], [554, 8554, 10554, 80]): ...
+"""
+
+import argparse
+import asyncio
+import ipaddress
+import os
+import socket
+import struct
+import threading
+import time
+from typing import AsyncIterator, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+DEFAULT_PORTS = (80, 443, 554, 8000, 8080, 8554, 22)
+DEFAULT_TIMEOUT = 1.0        # seconds per host, for all its probes together
+DEFAULT_CONCURRENCY = 512    # probes (sockets) in flight at once
+MIN_PORT_TIMEOUT = 0.1       # bounds of the RTT-based connect timeout of scan_ports()
+MAX_PORT_TIMEOUT = 3.0
+
+# Port states; FILTERED means no answer before the deadline
+OPEN, CLOSED, FILTERED, UNREACHABLE = "open", "closed", "filtered", "unreachable"
+
+ICMP_ECHO_REPLY = 0
+ICMP_ECHO_REQUEST = 8
+
+class HostResult(NamedTuple):
+    host: str
+    rtt: float     # seconds until the first answer
+    method: str    # "tcp/554" or "icmp"
+
+class ScanProgress:
+    """Counters of a running sweep; safe to update from worker threads too."""
+
+    def __init__(self, unit: str = "hosts"):
+        self.unit = unit
+        self.started = 0     # probes begun
+        self.done = 0        # probes finished
+        self.found = 0       # of which found something
+        self.start: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def begin(self) -> None:
+        with self._lock:
+            if self.start is None:
+                self.start = time.perf_counter()
+            self.started += 1
+
+    def end(self, found: bool) -> None:
+        with self._lock:
+            self.done += 1
+            self.found += bool(found)
+
+    @property
+    def in_flight(self) -> int:
+        return self.started - self.done
+
+    @property
+    def elapsed(self) -> float:
+        return 0.0 if self.start is None else time.perf_counter() - self.start
+
+    @property
+    def rate(self) -> float:
+        """Finished probes per second."""
+        elapsed = self.elapsed
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    def __str__(self) -> str:
+        return (f"{self.done} {self.unit} probed, {self.in_flight} in flight, {self.found} found, "
+                f"{self.rate:.0f} {self.unit}/s")
+
+def expand_targets(targets: Union[str, Iterable[str]]) -> List[str]:
+    """Addresses from IPs, CIDR networks ("192.168.1.0/24") and /24 prefixes ("192.168.1")."""
+    if isinstance(targets, str):
+        targets = [targets]
+    hosts = []
+    for target in targets:
+        if "/" not in target and target.count(".") == 2:
+            target += ".0/24"
+        hosts.extend(str(host) for host in ipaddress.ip_network(target, strict=False).hosts())
+    return list(dict.fromkeys(hosts))
+
+def _checksum(data: bytes) -> int:
+    if len(data) % 2:
+        data += b"\0"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+class IcmpPinger:
+    """ICMP echo requests over one shared socket; replies are matched by address and sequence."""
+
+    def __init__(self, sock: socket.socket, raw: bool):
+        self.sock = sock
+        self.raw = raw                        # raw sockets also deliver the IP header
+        self.ident = os.getpid() & 0xFFFF     # datagram sockets replace it with their own
+        self.sequence = 0
+        self.waiting: Dict[Tuple[str, int], Tuple[asyncio.Future, float]] = {}
+        self.loop = asyncio.get_running_loop()
+        self.loop.add_reader(sock.fileno(), self._on_readable)
+
+    @classmethod
+    def open(cls) -> Optional["IcmpPinger"]:
+        """A pinger on a raw, else datagram, ICMP socket; None when neither is permitted."""
+        for kind in (socket.SOCK_RAW, socket.SOCK_DGRAM):
+            try:
+                sock = socket.socket(socket.AF_INET, kind, socket.IPPROTO_ICMP)
+            except OSError:
+                continue
+            sock.setblocking(False)
+            try:
+                return cls(sock, raw=kind == socket.SOCK_RAW)
+            except NotImplementedError:  # event loop without add_reader (Windows proactor)
+                sock.close()
+                return None
+        return None
+
+    def close(self) -> None:
+        self.loop.remove_reader(self.sock.fileno())
+        self.sock.close()
+
+    def _on_readable(self) -> None:
+        while True:
+            try:
+                data, (address, _) = self.sock.recvfrom(2048)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                continue
+            if self.raw:
+                data = data[(data[0] & 0x0F) * 4:]
+            if len(data) < 8:
+                continue
+            kind, _, _, ident, sequence = struct.unpack("!BBHHH", data[:8])
+            if kind != ICMP_ECHO_REPLY or (self.raw and ident != self.ident):
+                continue
+            future, sent = self.waiting.pop((address, sequence), (None, 0.0))
+            if future is not None and not future.done():
+                future.set_result(time.perf_counter() - sent)
+
+    async def ping(self, host: str) -> Optional[float]:
+        """Round-trip time of one echo request; waits until cancelled when there is no reply."""
+        self.sequence = (self.sequence + 1) & 0xFFFF
+        key = (host, self.sequence)
+        header = struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, 0, self.ident, self.sequence)
+        payload = b"host_discovery"
+        packet = struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, _checksum(header + payload),
+                             self.ident, self.sequence) + payload
+        future = self.loop.create_future()
+        self.waiting[key] = (future, time.perf_counter())
+        try:
+            self.sock.sendto(packet, (host, 0))
+            return await future
+        except OSError:
+            return None
+        finally:
+            self.waiting.pop(key, None)
+
+async def tcp_connect(host: str, port: int) -> Tuple[str, float]:
+    """("open" | "closed" | "unreachable", seconds) of one non-blocking TCP connect.
+
+    Runs until the host answers or the caller cancels it; callers put their
+    own deadline around it.
+    """
+    loop = asyncio.get_running_loop()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setblocking(False)
+    start = time.perf_counter()
+    try:
+        await loop.sock_connect(sock, (host, port))
+        state = OPEN
+    except ConnectionRefusedError:
+        state = CLOSED
+    except OSError:  # unreachable, reset, ...
+        state = UNREACHABLE
+    finally:
+        sock.close()
+    return state, time.perf_counter() - start
+
+async def tcp_probe(host: str, port: int, count_refused: bool = True) -> Optional[float]:
+    """Seconds until host:port accepted (or refused) a TCP connect; None when nothing answered."""
+    state, rtt = await tcp_connect(host, port)
+    if state == OPEN or (state == CLOSED and count_refused):
+        return rtt
+    return None
+
+async def probe_host(host: str, ports: Sequence[int] = DEFAULT_PORTS, timeout: float = DEFAULT_TIMEOUT,
+                     pinger: Optional[IcmpPinger] = None, count_refused: bool = True) -> Optional[HostResult]:
+    """First answer from `host` to any of its probes within `timeout` seconds, or None."""
+    probes = {asyncio.ensure_future(tcp_probe(host, port, count_refused)): f"tcp/{port}" for port in ports}
+    if pinger is not None:
+        probes[asyncio.ensure_future(pinger.ping(host))] = "icmp"
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    pending = set(probes)
+    try:
+        while pending:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining,
+                                               return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.result() is not None:
+                    return HostResult(host, task.result(), probes[task])
+        return None
+    finally:
+        for task in probes:
+            task.cancel()
+        await asyncio.gather(*probes, return_exceptions=True)
+
+async def discover(targets: Union[str, Iterable[str]], ports: Sequence[int] = DEFAULT_PORTS,
+                   timeout: float = DEFAULT_TIMEOUT, concurrency: int = DEFAULT_CONCURRENCY,
+                   icmp: Optional[bool] = None, count_refused: bool = True,
+                   progress: Optional[ScanProgress] = None) -> AsyncIterator[HostResult]:
+    """Yield a HostResult for every host of `targets` that answers, in the order they answer.
+
+    icmp=None adds ICMP echo when the socket can be opened, True requires
+    it (PermissionError otherwise) and False never uses it. Stopping the
+    iteration early cancels the probes still running.
+    """
+    hosts = expand_targets(targets)
+    pinger = IcmpPinger.open() if icmp is not False else None
+    if icmp and pinger is None:
+        raise PermissionError("ICMP needs a raw socket: run as root / administrator")
+
+    probes_per_host = len(ports) + (pinger is not None)
+    results = _stream(lambda host: probe_host(host, ports, timeout, pinger, count_refused),
+                      hosts, concurrency // max(probes_per_host, 1), progress)
+    try:
+        async for result in results:
+            yield result
+    finally:
+        await results.aclose()
+        if pinger is not None:
+            pinger.close()
+
+class RttEstimator:
+    """Connect timeout from measured round-trip times, like TCP's retransmission timer (RFC 6298)."""
+
+    def __init__(self, initial: float = DEFAULT_TIMEOUT, minimum: float = MIN_PORT_TIMEOUT,
+                 maximum: float = MAX_PORT_TIMEOUT):
+        self.initial = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.srtt: Optional[float] = None    # smoothed round-trip time
+        self.rttvar = 0.0                    # its mean deviation
+
+    def add(self, rtt: float) -> None:
+        if self.srtt is None:
+            self.srtt, self.rttvar = rtt, rtt / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+
+    @property
+    def timeout(self) -> float:
+        if self.srtt is None:
+            return self.initial
+        return min(max(self.srtt + 4 * self.rttvar, self.minimum), self.maximum)
+
+class PortResult(NamedTuple):
+    host: str
+    port: int
+    state: str     # OPEN, CLOSED, FILTERED or UNREACHABLE
+    rtt: float     # seconds until the answer, or the timeout that ran out
+
+async def scan_ports(targets: Union[str, Iterable[str]], ports: Sequence[int] = DEFAULT_PORTS,
+                     timeout: float = DEFAULT_TIMEOUT,
+                     concurrency: int = DEFAULT_CONCURRENCY,
+                     progress: Optional[ScanProgress] = None) -> AsyncIterator[PortResult]:
+    """Yield a PortResult for every host x port pair of `targets`, in the order they finish.
+
+    At most `concurrency` connects are in flight across all hosts. A host's
+    connects wait the full `timeout` until it has answered once; after that
+    its deadline follows the round-trip times it answered with, so silent
+    ports on a fast LAN are given up in a fraction of a second. Other hosts'
+    answers never shorten it: a slow host behind a fast one would have its
+    open ports reported FILTERED.
+    """
+    hosts = expand_targets(targets)
+    per_host: Dict[str, RttEstimator] = {}
+
+    async def probe(pair):
+        host, port = pair
+        wait = per_host[host].timeout if host in per_host else timeout
+        try:
+            state, rtt = await asyncio.wait_for(tcp_connect(host, port), wait)
+        except asyncio.TimeoutError:
+            return PortResult(host, port, FILTERED, wait)
+        if state != UNREACHABLE:
+            per_host.setdefault(host, RttEstimator(timeout)).add(rtt)
+        return PortResult(host, port, state, rtt)
+
+    # Port by port across all hosts, so every host has an RTT sample early on
+    pairs = ((host, port) for port in ports for host in hosts)
+    results = _stream(probe, pairs, concurrency, progress, lambda result: result.state == OPEN)
+    try:
+        async for result in results:
+            yield result
+    finally:
+        await results.aclose()
+
+async def _stream(probe, items: Iterable, workers: int, progress: Optional[ScanProgress] = None,
+                  is_found: Callable = lambda result: True) -> AsyncIterator:
+    """Run `probe` over `items` on `workers` tasks; yield the non-None results as they finish."""
+    remaining = iter(items)  # shared by the workers, each takes the next item
+    found: asyncio.Queue = asyncio.Queue()
+
+    async def worker():
+        for item in remaining:
+            if progress is not None:
+                progress.begin()
+            result = await probe(item)
+            if progress is not None:
+                progress.end(result is not None and is_found(result))
+            if result is not None:
+                found.put_nowait(result)
+
+    tasks = [asyncio.ensure_future(worker()) for _ in range(max(1, workers))]
+    finished = asyncio.ensure_future(asyncio.gather(*tasks))
+    finished.add_done_callback(lambda _: found.put_nowait(None))
+    try:
+        while True:
+            result = await found.get()
+            if result is None:
+                break
+            yield result
+        await finished  # re-raise a worker's exception
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(finished, return_exceptions=True)
+
+def _collect(results: AsyncIterator, callback: Optional[Callable], limit: Optional[int] = None) -> list:
+    async def collect():
+        collected = []
+        try:
+            async for result in results:
+                if callback is not None:
+                    callback(result)
+                collected.append(result)
+                if limit is not None and len(collected) >= limit:
+                    break
+        finally:
+            await results.aclose()
+        return collected
+
+    return asyncio.run(collect())
+
+def discover_hosts(targets: Union[str, Iterable[str]],
+                   on_found: Optional[Callable[[HostResult], None]] = None, limit: Optional[int] = None,
+                   **kwargs) -> List[HostResult]:
+    """Run discover() from synchronous code; on_found is called as each host answers.
+
+    Stops once `limit` hosts are found (the first to answer, not the lowest
+    addresses). Returns the results sorted by address. kwargs are passed to
+    discover().
+    """
+    found = _collect(discover(targets, **kwargs), on_found, limit)
+    return sorted(found, key=lambda result: ipaddress.ip_address(result.host))
+
+def scan_port_matrix(targets: Union[str, Iterable[str]], ports: Sequence[int] = DEFAULT_PORTS,
+                     on_result: Optional[Callable[[PortResult], None]] = None, **kwargs) -> List[PortResult]:
+    """Run scan_ports() to the end from synchronous code; on_result is called as each port finishes.
+
+    Returns the results sorted by address, then port.
+    """
+    results = _collect(scan_ports(targets, ports, **kwargs), on_result)
+    return sorted(results, key=lambda result: (ipaddress.ip_address(result.host), result.port))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("targets", nargs="+", help="IPs, CIDR networks or /24 prefixes like 192.168.1")
+    parser.add_argument("--ports", type=int, nargs="+", default=list(DEFAULT_PORTS))
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="Seconds per host")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Probes in flight")
+    parser.add_argument("--icmp", action=argparse.BooleanOptionalAction, default=None,
+                        help="Also ping with ICMP (default: when permitted)")
+    parser.add_argument("--limit", type=int, help="Stop after this many devices are found")
+    parser.add_argument("--port-scan", action="store_true",
+                        help="Report the state of every host x port instead of which hosts are up")
+    args = parser.parse_args()
+
+    if args.port_scan:
+        progress = ScanProgress("ports")
+        scan_port_matrix(args.targets, args.ports, timeout=args.timeout, concurrency=args.concurrency,
+                         progress=progress,
+                         on_result=lambda r: r.state == OPEN and print(f"✓ {r.host}:{r.port} is open  [{progress}]"))
+    else:
+        progress = ScanProgress()
+        discover_hosts(args.targets, ports=args.ports, timeout=args.timeout, concurrency=args.concurrency,
+                       icmp=args.icmp, limit=args.limit, progress=progress,
+                       on_found=lambda r: print(f"✓ Found device at {r.host} ({r.method}, {r.rtt * 1000:.1f} ms)"
+                                                f"  [{progress}]"))
+    print(f"\n{progress} in {progress.elapsed:.1f} s")
+
+if __name__ == "__main__":
+    main()
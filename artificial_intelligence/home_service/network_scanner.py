@@ -1,8 +1,11 @@
-import socket
 import subprocess
+import sys
 import threading
 import time
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from discovery_cache import DiscoveryCache, discover_known_first
+from host_discovery import OPEN, ScanProgress, discover_hosts, scan_port_matrix
 
 def ping_host(host):
     """Ping a host to check if it's reachable"""
@@ -13,48 +16,109 @@ def ping_host(host):
     except:
         return False
 
-def scan_port(host, port):
-    """Scan a specific port on a host"""
+def ping_sweep(hosts, workers=50, progress=None, probe=ping_host):
+    """Yield the hosts that answer `probe` (ping_host), in the order they answer
+
+    Closing the generator early (e.g. breaking out of the loop) cancels the
+    pings that have not started yet.
+    """
+    progress = progress if progress is not None else ScanProgress()
+    
+    def run(host):
+        progress.begin()
+        reachable = False
+        try:
+            reachable = probe(host)
+        finally:
+            progress.end(reachable)
+        return reachable
+    
+    executor = ThreadPoolExecutor(max_workers=workers)
     try:
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(2)
-        result = sock.connect_ex((host, port))
-        sock.close()
-        return result == 0
-    except:
-        return False
+        futures = {executor.submit(run, host): host for host in hosts}
+        for future in as_completed(futures):
+            if future.result():
+                yield futures[future]
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
 
-def scan_network_range(base_ip, start=1, end=254):
-    """Scan a range of IP addresses"""
+def scan_network_range(base_ip, start=1, end=254, method="tcp", limit=None, progress=None, cache=None):
+    """Scan a range of IP addresses
+
+    method="tcp" probes every address at once with non-blocking TCP connects
+    (and ICMP when permitted, see host_discovery.py); method="ping" runs the
+    system ping command per address, for devices that drop every TCP probe.
+    Hosts are reported as they answer; the scan stops after `limit` hosts.
+    Pass a ScanProgress to read hosts/s and probes in flight while it runs,
+    and a DiscoveryCache to check the hosts found last time first (tcp only).
+    """
     print(f"Scanning network range {base_ip}.{start} to {base_ip}.{end}")
-    print("This may take a few minutes...")
-    
-    reachable_hosts = []
-    
-    with ThreadPoolExecutor(max_workers=50) as executor:
-        # Ping scan
-        futures = {executor.submit(ping_host, f"{base_ip}.{i}"): i for i in range(start, end + 1)}
-        
-        for future in futures:
-            ip = futures[future]
-            if future.result():
-                reachable_hosts.append(f"{base_ip}.{ip}")
-                print(f"✓ Found device at {base_ip}.{ip}")
+    hosts = [f"{base_ip}.{i}" for i in range(start, end + 1)]
+    progress = progress if progress is not None else ScanProgress()
     
+    if method == "tcp":
+        report = lambda r: print(f"✓ Found device at {r.host} ({r.method})  [{progress}]")
+        if cache is not None:
+            found = discover_known_first(hosts, cache, on_found=report, limit=limit, progress=progress)
+        else:
+            found = discover_hosts(hosts, on_found=report, limit=limit, progress=progress)
+        reachable_hosts = [result.host for result in found]
+    else:
+        print("This may take a few minutes...")
+        reachable_hosts = []
+        for host in ping_sweep(hosts, progress=progress):
+            reachable_hosts.append(host)
+            print(f"✓ Found device at {host}  [{progress}]")
+            if limit is not None and len(reachable_hosts) >= limit:
+                break
+    
+    print(f"Scanned in {progress.elapsed:.1f} s: {progress}")
     return reachable_hosts
 
-def scan_ports_on_host(host, ports):
-    """Scan specific ports on a host"""
+def scan_ports_on_host(host, ports, cache=None):
+    """Scan specific ports on a host
+
+    With a DiscoveryCache, the ports found open last time are checked first;
+    the rest are only scanned when one of those has closed.
+    """
+    if cache is not None:
+        known = [port for port in cache.get("ports", host, []) if port in ports]
+        if known:
+            print(f"\nChecking ports {', '.join(map(str, known))} found open last time on {host}:")
+            results = scan_port_matrix([host], known)
+            if all(result.state == OPEN for result in results):
+                print("✓ All still open (run with --rescan to check every port)")
+                return [(port, get_service_name(port)) for port in known]
+    
     print(f"\nScanning ports on {host}:")
     
+    # All ports at once, with timeouts adapted to the host's round-trip time
     open_ports = []
-    for port in ports:
-        if scan_port(host, port):
-            service_name = get_service_name(port)
-            print(f"✓ Port {port} ({service_name}) is open")
-            open_ports.append((port, service_name))
+    for result in scan_port_matrix([host], ports):
+        if result.state == OPEN:
+            service_name = get_service_name(result.port)
+            print(f"✓ Port {result.port} ({service_name}) is open")
+            open_ports.append((result.port, service_name))
         else:
-            print(f"✗ Port {port} is closed")
+            print(f"✗ Port {result.port} is {result.state}")
+    
+    if cache is not None:
+        cache.put("ports", host, [port for port, _ in open_ports])
+        cache.save()
+    return open_ports
+
+def scan_ports_on_network(base_ip, ports, start=1, end=254):
+    """Scan ports on every host of a range in one pass; returns {host: [(port, service)]}"""
+    print(f"\nScanning ports {', '.join(map(str, ports))} on {base_ip}.{start} to {base_ip}.{end}:")
+    
+    open_ports = {}
+    def report(result):
+        if result.state == OPEN:
+            print(f"✓ {result.host}:{result.port} ({get_service_name(result.port)}) is open")
+    
+    for result in scan_port_matrix([f"{base_ip}.{i}" for i in range(start, end + 1)], ports, on_result=report):
+        if result.state == OPEN:
+            open_ports.setdefault(result.host, []).append((result.port, get_service_name(result.port)))
     
     return open_ports
 
@@ -78,7 +142,7 @@ def get_service_name(port):
     }
     return services.get(port, "Unknown")
 
-def main():
+def main(rescan=False):
     print("Network Scanner for IP Camera Discovery")
     print("=" * 50)
     
@@ -88,6 +152,12 @@ def main():
     
     print(f"Target camera IP: {camera_ip}")
     
+    # Hosts and ports found by earlier runs are checked first
+    cache = DiscoveryCache()
+    if rescan:
+        cache.clear("host")
+        cache.forget("ports", camera_ip)
+    
     # Test 1: Check if camera IP is reachable
     print(f"\n1. Testing connectivity to {camera_ip}...")
     if ping_host(camera_ip):
@@ -97,7 +167,7 @@ def main():
         print("\nLet's scan the network to find devices...")
         
         # Scan network range
-        reachable = scan_network_range(base_ip)
+        reachable = scan_network_range(base_ip, cache=cache)
         
         if reachable:
             print(f"\nFound {len(reachable)} reachable devices:")
@@ -110,7 +180,7 @@ def main():
     # Test 2: Scan common ports on camera
     print(f"\n2. Scanning common ports on {camera_ip}...")
     common_ports = [80, 443, 554, 8000, 8080, 8554, 10554, 22, 23]
-    open_ports = scan_ports_on_host(camera_ip, common_ports)
+    open_ports = scan_ports_on_host(camera_ip, common_ports, cache)
     
     # Test 3: Check if web interface is accessible
     print(f"\n3. Testing web interface...")
@@ -124,10 +194,11 @@ def main():
     # Test 4: RTSP specific test
     print(f"\n4. RTSP specific tests...")
     
-    # Test different RTSP ports
+    # Test different RTSP ports, all of which step 2 already scanned
     rtsp_ports = [554, 8554, 10554]
+    open_port_numbers = {port for port, _ in open_ports}
     for port in rtsp_ports:
-        if scan_port(camera_ip, port):
+        if port in open_port_numbers:
             print(f"✓ RTSP port {port} is open")
             
             # Try to connect to RTSP
@@ -175,4 +246,4 @@ def main():
     print("4. Check camera documentation for correct RTSP URL format")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main(rescan="--rescan" in sys.argv) 
\ No newline at end of file
@@ -0,0 +1,142 @@
+"""
+Tests for host_discovery.py against listeners on loopback addresses.
+
+Every 127.0.0.0/8 address refuses connections to closed ports, so the
+sweeps use count_refused=False and only the addresses with a listener
+count as up.
+
+    python -m pytest test_host_discovery.py
+"""
+
+import asyncio
+import socket
+import time
+import unittest
+
+from host_discovery import (CLOSED, FILTERED, OPEN, RttEstimator, ScanProgress, discover, discover_hosts, expand_targets,
+                            probe_host, scan_port_matrix, scan_ports)
+
+LISTENERS = [("127.0.0.5", 18554), ("127.0.0.9", 18080), ("127.0.0.20", 18554)]
+PORTS = [18080, 18554]
+
+class HostDiscoveryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sockets = []
+        for host, port in LISTENERS:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            try:
+                sock.bind((host, port))
+            except OSError as e:  # e.g. macOS only configures 127.0.0.1
+                sock.close()
+                self.skipTest(f"cannot bind {host}: {e}")
+            sock.listen()
+            self.sockets.append(sock)
+
+    def tearDown(self):
+        for sock in self.sockets:
+            sock.close()
+
+    def test_expand_targets(self):
+        self.assertEqual(len(expand_targets("192.168.1")), 254)
+        self.assertEqual(expand_targets(["10.0.0.0/30", "10.0.0.1"]), ["10.0.0.1", "10.0.0.2"])
+
+    def test_finds_only_listening_hosts(self):
+        start = time.perf_counter()
+        found = discover_hosts("127.0.0.0/27", ports=PORTS, count_refused=False, icmp=False)
+        self.assertLess(time.perf_counter() - start, 5)
+        self.assertEqual([r.host for r in found], ["127.0.0.5", "127.0.0.9", "127.0.0.20"])
+        self.assertEqual([r.method for r in found], ["tcp/18554", "tcp/18080", "tcp/18554"])
+
+    def test_refused_counts_as_up(self):
+        found = discover_hosts(["127.0.0.30", "127.0.0.31"], ports=[18999], icmp=False)
+        self.assertEqual([r.host for r in found], ["127.0.0.30", "127.0.0.31"])
+
+    def test_deadline(self):
+        # A listener whose backlog is full drops further SYNs, so the connect hangs
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.bind(("127.0.0.40", 18700))
+        sock.listen(0)
+        clients = [socket.socket(socket.AF_INET, socket.SOCK_STREAM) for _ in range(3)]
+        try:
+            for client in clients:
+                client.setblocking(False)
+                client.connect_ex(("127.0.0.40", 18700))
+            time.sleep(0.1)
+            start = time.perf_counter()
+            self.assertIsNone(asyncio.run(probe_host("127.0.0.40", [18700], timeout=0.3)))
+            self.assertLess(time.perf_counter() - start, 1.0)
+        finally:
+            for client in clients:
+                client.close()
+            sock.close()
+
+    def test_stop_early(self):
+        async def first():
+            async for result in discover("127.0.0.0/27", ports=PORTS, count_refused=False, icmp=False):
+                return result
+
+        self.assertIn(asyncio.run(first()).host, [host for host, _ in LISTENERS])
+
+    def test_limit_and_progress(self):
+        progress = ScanProgress()
+        found = discover_hosts("127.0.0.0/24", ports=PORTS, count_refused=False, icmp=False,
+                               limit=2, progress=progress)
+        self.assertEqual(len(found), 2)
+        self.assertEqual(progress.in_flight, 0)
+        self.assertLessEqual(progress.found, len(LISTENERS))
+        self.assertGreater(progress.rate, 0)
+
+    def test_port_matrix(self):
+        results = scan_port_matrix(["127.0.0.5", "127.0.0.9"], PORTS)
+        self.assertEqual([(r.host, r.port, r.state) for r in results],
+                         [("127.0.0.5", 18080, CLOSED), ("127.0.0.5", 18554, OPEN),
+                          ("127.0.0.9", 18080, OPEN), ("127.0.0.9", 18554, CLOSED)])
+
+    def test_port_results_stream(self):
+        async def collect():
+            return [r async for r in scan_ports("127.0.0.0/27", PORTS, concurrency=16)]
+
+        results = asyncio.run(collect())
+        self.assertEqual(len(results), 30 * len(PORTS))
+        self.assertEqual(sorted((r.host, r.port) for r in results if r.state == OPEN),
+                         sorted(LISTENERS))
+
+    def test_rtt_estimator(self):
+        estimator = RttEstimator(initial=2.0, minimum=0.1, maximum=3.0)
+        self.assertEqual(estimator.timeout, 2.0)
+        for _ in range(20):
+            estimator.add(0.001)
+        self.assertEqual(estimator.timeout, 0.1)
+        for _ in range(20):
+            estimator.add(0.5)
+        self.assertGreater(estimator.timeout, 0.5)
+        self.assertLessEqual(estimator.timeout, 3.0)
+
+    def test_port_timeout_is_filtered(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.bind(("127.0.0.41", 18700))
+        sock.listen(0)
+        clients = [socket.socket(socket.AF_INET, socket.SOCK_STREAM) for _ in range(3)]
+        try:
+            for client in clients:
+                client.setblocking(False)
+                client.connect_ex(("127.0.0.41", 18700))
+            time.sleep(0.1)
+            result, = scan_port_matrix(["127.0.0.41"], [18700], timeout=0.3)
+            self.assertEqual((result.state, result.rtt), (FILTERED, 0.3))
+
+            # Fast answers from other hosts do not shorten the deadline of one that never answered
+            results = scan_port_matrix(["127.0.0.5", "127.0.0.9", "127.0.0.41"], [18700], timeout=0.3,
+                                       concurrency=1)
+            self.assertEqual([(r.host, r.state) for r in results],
+                             [("127.0.0.5", CLOSED), ("127.0.0.9", CLOSED), ("127.0.0.41", FILTERED)])
+            self.assertEqual(results[-1].rtt, 0.3)
+        finally:
+            for client in clients:
+                client.close()
+            sock.close()
+
+if __name__ == "__main__":
+    unittest.main()
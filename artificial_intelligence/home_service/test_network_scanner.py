@@ -0,0 +1,49 @@
+"""
+Tests for the ping sweep of network_scanner.py, with a fake ping in place
+of the system command.
+
+    python -m pytest test_network_scanner.py
+"""
+
+import threading
+import time
+import unittest
+
+from host_discovery import ScanProgress
+from network_scanner import ping_sweep
+
+class PingSweepTest(unittest.TestCase):
+
+    def test_slow_host_does_not_hold_back_others(self):
+        def fake_ping(host):
+            time.sleep(1.0 if host == "10.0.0.2" else 0.01)
+            return host in ("10.0.0.2", "10.0.0.7")
+
+        start = time.perf_counter()
+        sweep = ping_sweep([f"10.0.0.{i}" for i in range(1, 11)], workers=10, probe=fake_ping)
+        self.assertEqual(next(sweep), "10.0.0.7")
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(list(sweep), ["10.0.0.2"])
+
+    def test_stop_cancels_pending_pings(self):
+        pinged = []
+        lock = threading.Lock()
+
+        def fake_ping(host):
+            with lock:
+                pinged.append(host)
+            time.sleep(0.05)
+            return True
+
+        progress = ScanProgress()
+        sweep = ping_sweep([f"10.0.0.{i}" for i in range(1, 101)], workers=4, progress=progress, probe=fake_ping)
+        next(sweep)
+        self.assertLessEqual(progress.in_flight, 4)
+        sweep.close()
+        time.sleep(0.2)
+        self.assertLess(len(pinged), 20)
+        self.assertEqual(progress.in_flight, 0)
+        self.assertGreater(progress.rate, 0)
+
+if __name__ == "__main__":
+    unittest.main()
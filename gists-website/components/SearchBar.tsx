@@ -2,7 +2,20 @@
 
 import { useState, useEffect, useRef } from 'react'
 import Link from 'next/link'
-import { Index } from 'flexsearch'
+
+// Layout of the sharded index written by scripts/search_index.py
+const SEARCH_INDEX_URL = '/data/search'
+
+interface SearchManifest {
+  version: number
+  docCount: number
+  docShardSize: number
+  prefixLength: number
+  prefixes: { [prefix: string]: number }
+}
+
+// term -> [doc, weight, doc, weight, ...]
+type TermShard = { [term: string]: number[] }
 
 interface SearchDocument {
   id: string
@@ -11,8 +24,6 @@ interface SearchDocument {
   subcategory: string
   path: string
   content: string
-  tags: string[]
-  headings: string[]
 }
 
 interface SearchResult {
@@ -24,54 +35,117 @@ interface SearchResult {
   excerpt: string
 }
 
-export function SearchBar() {
-  const [query, setQuery] = useState('')
-  const [results, setResults] = useState<SearchResult[]>([])
-  const [isLoading, setIsLoading] = useState(false)
-  const [showResults, setShowResults] = useState(false)
-  const searchRef = useRef<HTMLDivElement>(null)
-  const indexRef = useRef<Index | null>(null)
-  const documentsRef = useRef<SearchDocument[]>([])
+// Must match tokenize() in scripts/search_index.py
+function tokenize(text: string): string[] {
+  return text.toLowerCase().match(/[\p{L}\p{N}]+/gu) || []
+}
 
-  // Load search index on mount
-  useEffect(() => {
-    async function loadIndex() {
-      try {
-        const response = await fetch('/data/search-index.json')
+async function fetchJson<T>(url: string): Promise<T> {
+  const response = await fetch(url)
+  if (!response.ok) {
+    throw new Error(`${url}: ${response.status} ${response.statusText}`)
+  }
+  return response.json()
+}
 
-        if (!response.ok) {
-          console.error('Failed to load search index:', response.status, response.statusText)
-          return
-        }
+// Fetches each shard at most once, sharing in-flight requests
+class ShardCache<T> {
+  private shards = new Map<number, Promise<T>>()
 
-        const contentType = response.headers.get('content-type')
-        if (!contentType || !contentType.includes('application/json')) {
-          console.error('Search index is not JSON, got:', contentType)
-          return
-        }
+  constructor(private urlFor: (shard: number) => string) {}
+
+  get(shard: number): Promise<T> {
+    let pending = this.shards.get(shard)
+    if (!pending) {
+      pending = fetchJson<T>(this.urlFor(shard))
+      pending.catch(() => this.shards.delete(shard))
+      this.shards.set(shard, pending)
+    }
+    return pending
+  }
+}
 
-        const documents: SearchDocument[] = await response.json()
-        documentsRef.current = documents
+const termShards = new ShardCache<TermShard>(n => `${SEARCH_INDEX_URL}/terms-${n}.json`)
+const docShards = new ShardCache<SearchDocument[]>(n => `${SEARCH_INDEX_URL}/docs-${n}.json`)
 
-        // Create FlexSearch index
-        const index = new Index({
-          tokenize: 'forward',
-          cache: true,
-        })
+// Term shards holding words that start with `token`
+function shardsForToken(manifest: SearchManifest, token: string): number[] {
+  if (token.length >= manifest.prefixLength) {
+    const shard = manifest.prefixes[token.slice(0, manifest.prefixLength)]
+    return shard === undefined ? [] : [shard]
+  }
+  const shards = new Set<number>()
+  for (const [prefix, shard] of Object.entries(manifest.prefixes)) {
+    if (prefix.startsWith(token)) shards.add(shard)
+  }
+  return Array.from(shards)
+}
 
-        // Index all documents
-        documents.forEach((doc, i) => {
-          const searchText = `${doc.title} ${doc.category} ${doc.subcategory} ${doc.content} ${doc.headings.join(' ')} ${doc.tags.join(' ')}`
-          index.add(i, searchText)
-        })
+// Score documents matching every query token (as a word prefix), best first
+async function searchIndex(manifest: SearchManifest, query: string, limit: number): Promise<number[]> {
+  const tokens = Array.from(new Set(tokenize(query)))
+  if (tokens.length === 0) return []
 
-        indexRef.current = index
-      } catch (error) {
-        console.error('Failed to load search index:', error)
+  const shardIds = new Set(tokens.flatMap(token => shardsForToken(manifest, token)))
+  const shards = await Promise.all(Array.from(shardIds).map(n => termShards.get(n)))
+
+  let scores: Map<number, number> | null = null
+  for (const token of tokens) {
+    // Best-matching word per document for this token
+    const tokenScores = new Map<number, number>()
+    for (const shard of shards) {
+      for (const term in shard) {
+        if (!term.startsWith(token)) continue
+        const postings = shard[term]
+        const idf = Math.log(1 + manifest.docCount / (postings.length / 2))
+        for (let i = 0; i < postings.length; i += 2) {
+          const score = postings[i + 1] * idf
+          if (score > (tokenScores.get(postings[i]) || 0)) {
+            tokenScores.set(postings[i], score)
+          }
+        }
+      }
+    }
+
+    if (scores === null) {
+      scores = tokenScores
+    } else {
+      const previous: Map<number, number> = scores
+      scores = new Map()
+      for (const [doc, score] of tokenScores) {
+        const before = previous.get(doc)
+        if (before !== undefined) scores.set(doc, before + score)
       }
     }
+    if (scores.size === 0) break
+  }
+
+  return Array.from(scores || [])
+    .sort((a, b) => b[1] - a[1] || a[0] - b[0])
+    .slice(0, limit)
+    .map(([doc]) => doc)
+}
+
+async function loadDocuments(manifest: SearchManifest, docIds: number[]): Promise<SearchDocument[]> {
+  return Promise.all(docIds.map(async doc => {
+    const shard = await docShards.get(Math.floor(doc / manifest.docShardSize))
+    return shard[doc % manifest.docShardSize]
+  }))
+}
+
+export function SearchBar() {
+  const [query, setQuery] = useState('')
+  const [results, setResults] = useState<SearchResult[]>([])
+  const [isLoading, setIsLoading] = useState(false)
+  const [showResults, setShowResults] = useState(false)
+  const [manifest, setManifest] = useState<SearchManifest | null>(null)
+  const searchRef = useRef<HTMLDivElement>(null)
 
-    loadIndex()
+  // Load the index manifest on mount; shards are fetched as queries need them
+  useEffect(() => {
+    fetchJson<SearchManifest>(`${SEARCH_INDEX_URL}/manifest.json`)
+      .then(setManifest)
+      .catch(error => console.error('Failed to load search index:', error))
   }, [])
 
   // Handle click outside to close results
@@ -88,53 +162,61 @@ export function SearchBar() {
 
   // Perform search
   useEffect(() => {
-    if (!query.trim() || !indexRef.current) {
+    if (!query.trim() || !manifest) {
       setResults([])
       setShowResults(false)
       return
     }
 
+    // Ignore the results of a query the user has already typed past
+    let cancelled = false
     setIsLoading(true)
 
-    const searchIndex = indexRef.current
-    const documents = documentsRef.current
+    async function runSearch(manifest: SearchManifest) {
+      try {
+        const docIds = await searchIndex(manifest, query, 10)
+        const documents = await loadDocuments(manifest, docIds)
+        if (cancelled) return
 
-    try {
-      const resultIndices = searchIndex.search(query, { limit: 10 })
+        const searchResults: SearchResult[] = documents.map(doc => {
+          // Create excerpt
+          const excerptLength = 150
+          const content = doc.content.toLowerCase()
+          const queryLower = query.toLowerCase()
+          const queryIndex = content.indexOf(queryLower)
 
-      const searchResults: SearchResult[] = (resultIndices as number[]).map(idx => {
-        const doc = documents[idx]
-        // Create excerpt
-        const excerptLength = 150
-        const content = doc.content.toLowerCase()
-        const queryLower = query.toLowerCase()
-        const queryIndex = content.indexOf(queryLower)
+          let excerpt = doc.content.substring(0, excerptLength)
+          if (queryIndex !== -1 && queryIndex > 50) {
+            const start = Math.max(0, queryIndex - 50)
+            excerpt = '...' + doc.content.substring(start, start + excerptLength)
+          }
 
-        let excerpt = doc.content.substring(0, excerptLength)
-        if (queryIndex !== -1 && queryIndex > 50) {
-          const start = Math.max(0, queryIndex - 50)
-          excerpt = '...' + doc.content.substring(start, start + excerptLength)
-        }
+          return {
+            id: doc.id,
+            title: doc.title,
+            category: doc.category,
+            subcategory: doc.subcategory,
+            path: doc.path,
+            excerpt: excerpt + '...'
+          }
+        })
 
-        return {
-          id: doc.id,
-          title: doc.title,
-          category: doc.category,
-          subcategory: doc.subcategory,
-          path: doc.path,
-          excerpt: excerpt + '...'
-        }
-      })
+        setResults(searchResults)
+        setShowResults(true)
+      } catch (error) {
+        if (cancelled) return
+        console.error('Search error:', error)
+        setResults([])
+      } finally {
+        if (!cancelled) setIsLoading(false)
+      }
+    }
 
-      setResults(searchResults)
-      setShowResults(true)
-    } catch (error) {
-      console.error('Search error:', error)
-      setResults([])
-    } finally {
-      setIsLoading(false)
+    runSearch(manifest)
+    return () => {
+      cancelled = true
     }
-  }, [query])
+  }, [query, manifest])
 
   return (
     <div ref={searchRef} className="relative w-full max-w-2xl">
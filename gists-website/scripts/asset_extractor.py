@@ -0,0 +1,116 @@
+"""
+nbconvert preprocessor that moves embedded images out of the HTML.
+
+PNG, JPEG and SVG outputs, markdown image attachments and the base64 data
+URIs of <img> tags in HTML outputs (e.g. the logo some libraries embed in
+their widgets' HTML) are written once to a shared assets directory under a
+name derived from their SHA-256, and the rendered page references them by
+URL instead of inlining base64 data URIs. Identical images across notebooks map to the same file, and since a
+file's name changes whenever its content does, it can be cached forever.
+"""
+
+import base64
+import binascii
+import hashlib
+import re
+from pathlib import Path
+from urllib.parse import quote
+
+from nbconvert.preprocessors import Preprocessor
+from traitlets import Unicode
+
+from output_writer import write_if_changed
+
+# Extracted MIME types and the file extension used for each
+IMAGE_EXTENSIONS = {
+    'image/png': 'png',
+    'image/jpeg': 'jpg',
+    'image/svg+xml': 'svg',
+}
+
+# src="data:image/png;base64,..." of an <img> tag in HTML, either quote style
+DATA_URI_IMG_RE = re.compile(
+    r"""(<img\b[^>]*?\bsrc\s*=\s*)(["'])data:(image/(?:png|jpeg|svg\+xml));base64,([A-Za-z0-9+/=\s]+)\2""",
+    re.IGNORECASE)
+
+def image_bytes(mime_type: str, data) -> bytes:
+    """Decode an image from its notebook JSON representation."""
+    if isinstance(data, list):
+        data = ''.join(data)
+    if mime_type == 'image/svg+xml':
+        return data.encode('utf-8')
+    return base64.b64decode(data)
+
+class ExtractAssetsPreprocessor(Preprocessor):
+    """Write images to content-addressed files and point the notebook at them.
+
+    Create it with parent=exporter so it shares the exporter's
+    display_data_priority. The file names written for a notebook are
+    collected in resources['assets'] so callers can track which assets are
+    still in use.
+    """
+
+    assets_dir = Unicode(help='Directory the image files are written to').tag(config=True)
+    assets_url = Unicode(help='URL prefix the assets directory is served from').tag(config=True)
+
+    def preprocess(self, nb, resources):
+        resources['assets'] = set()
+        return super().preprocess(nb, resources)
+
+    def store(self, mime_type: str, data, resources) -> str:
+        """Write an image if it is not already stored and return its URL."""
+        return self.store_bytes(mime_type, image_bytes(mime_type, data), resources)
+
+    def store_bytes(self, mime_type: str, content: bytes, resources) -> str:
+        name = f"{hashlib.sha256(content).hexdigest()}.{IMAGE_EXTENSIONS[mime_type]}"
+        path = Path(self.assets_dir) / name
+        if not path.exists():
+            # Written atomically, so concurrent workers never see a partial file
+            write_if_changed(path, content)
+        resources['assets'].add(name)
+        return f"{self.assets_url}/{name}"
+
+    def extract_html_images(self, html, resources) -> str:
+        """Replace the base64 data URIs of <img> tags in HTML with asset URLs."""
+        if isinstance(html, list):
+            html = ''.join(html)
+
+        def replace(match):
+            try:
+                content = base64.b64decode(match.group(4))
+            except binascii.Error:
+                return match.group(0)  # not valid base64: left inline
+            url = self.store_bytes(match.group(3).lower(), content, resources)
+            return f'{match.group(1)}{match.group(2)}{url}{match.group(2)}'
+
+        return DATA_URI_IMG_RE.sub(replace, html)
+
+    def preprocess_cell(self, cell, resources, index):
+        if cell.cell_type == 'code':
+            for output in cell.get('outputs', []):
+                if output.output_type not in ('display_data', 'execute_result'):
+                    continue
+                for mime_type in IMAGE_EXTENSIONS:
+                    if mime_type not in output.data:
+                        continue
+                    url = self.store(mime_type, output.data[mime_type], resources)
+                    if mime_type == 'image/svg+xml':
+                        output['svg_filename'] = url
+                    else:
+                        output.metadata.setdefault('filenames', {})[mime_type] = url
+                    output.data[mime_type] = ''  # the template only needs the URL now
+                if 'text/html' in output.data:
+                    output.data['text/html'] = self.extract_html_images(output.data['text/html'], resources)
+
+        elif cell.cell_type == 'markdown' and cell.get('attachments'):
+            for name, bundle in list(cell.attachments.items()):
+                mime_type = next((m for m in IMAGE_EXTENSIONS if m in bundle), None)
+                if mime_type is None:
+                    continue
+                url = self.store(mime_type, bundle[mime_type], resources)
+                # Markdown may reference the attachment by its raw or URL-quoted name
+                for ref in {name, quote(name)}:
+                    cell.source = cell.source.replace(f'attachment:{ref}', url)
+                del cell.attachments[name]
+
+        return cell, resources
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the HTML export stage of convert-notebooks.py.
+Times the old per-notebook path (fresh HTMLExporter + BeautifulSoup cleanup)
+against the current one (shared exporter, body-only template, tag filter)
+on the repo's own notebooks.
+
+The current path writes images to content-addressed files; here they go to
+a temporary directory, never to public/notebooks/_assets. --inline-images
+turns that step off, so both paths inline base64 images like the old one.
+"""
+
+import argparse
+import importlib.util
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+import nbformat
+from nbconvert import HTMLExporter
+from bs4 import BeautifulSoup
+
+SCRIPT_DIR = Path(__file__).parent
+
+def load_converter():
+    """Import convert-notebooks.py (its file name is not a valid module name)."""
+    spec = importlib.util.spec_from_file_location('convert_notebooks', SCRIPT_DIR / 'convert-notebooks.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def export_legacy(nb: nbformat.NotebookNode) -> str:
+    """The original export path: a new exporter per notebook and a full DOM round trip."""
+    html_exporter = HTMLExporter()
+    html_exporter.template_name = 'classic'
+    (body, resources) = html_exporter.from_notebook_node(nb)
+
+    soup = BeautifulSoup(body, 'html.parser')
+    for element in soup.find_all(['script', 'link', 'meta']):
+        element.decompose()
+    notebook_container = soup.find('div', class_='jp-Notebook')
+    if not notebook_container:
+        notebook_container = soup.find('body')
+    return str(notebook_container) if notebook_container else body
+
+def make_export_current(converter) -> Callable[[nbformat.NotebookNode], str]:
+    def export_current(nb: nbformat.NotebookNode) -> str:
+        (body, resources) = converter.get_html_exporter().from_notebook_node(nb)
+        return converter.STRIP_TAGS_RE.sub('', body).strip()
+    return export_current
+
+def set_asset_extraction(exporter: HTMLExporter, enabled: bool) -> None:
+    # nbconvert has no public accessor for registered preprocessor instances
+    for preprocessor in exporter._preprocessors:
+        if type(preprocessor).__name__ == 'ExtractAssetsPreprocessor':
+            preprocessor.enabled = enabled
+
+def time_export(export: Callable[[nbformat.NotebookNode], str], nb: nbformat.NotebookNode,
+                repeat: int) -> float:
+    """Best-of-`repeat` wall time in seconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        export(nb)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def benchmark(converter, limit: int, repeat: int) -> List[Tuple[str, float, float]]:
+    """(notebook, old seconds, current seconds) for each notebook that exports."""
+    export_current = make_export_current(converter)
+    notebook_paths = converter.find_notebooks(converter.NOTEBOOKS_SOURCE)
+    if limit:
+        notebook_paths = notebook_paths[:limit]
+
+    rows: List[Tuple[str, float, float]] = []
+    for notebook_path in notebook_paths:
+        rel_path = notebook_path.relative_to(converter.NOTEBOOKS_SOURCE)
+        with open(notebook_path, 'r', encoding='utf-8') as f:
+            nb = nbformat.read(f, as_version=4)
+        try:
+            before = time_export(export_legacy, nb, repeat)
+            after = time_export(export_current, nb, repeat)
+        except Exception as e:
+            print(f"Skipping {rel_path}: {e}")
+            continue
+        rows.append((str(rel_path), before, after))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--limit', type=int, default=0, help='Only benchmark the first N notebooks')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per notebook (best time is kept)')
+    parser.add_argument('--inline-images', action='store_true',
+                        help='Keep base64 images in the current path too, as the old one does')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='benchmark-assets-') as assets_dir:
+        converter = load_converter()
+        # Read when the exporter is built, so the real assets directory is never written
+        converter.ASSETS_OUTPUT = Path(assets_dir)
+        set_asset_extraction(converter.get_html_exporter(), not args.inline_images)  # built outside the timed region
+        rows = benchmark(converter, args.limit, args.repeat)
+
+    if not rows:
+        print("No notebooks benchmarked")
+        return
+
+    print(f"\n{'Notebook':<70} {'Before ms':>10} {'After ms':>10} {'Speedup':>8}")
+    for name, before, after in sorted(rows, key=lambda r: r[1], reverse=True):
+        print(f"{name[-70:]:<70} {before * 1000:>10.1f} {after * 1000:>10.1f} {before / after:>7.1f}x")
+
+    befores = [r[1] for r in rows]
+    afters = [r[2] for r in rows]
+    print(f"\nNotebooks: {len(rows)}")
+    print(f"Median per notebook: {statistics.median(befores) * 1000:.1f} ms -> "
+          f"{statistics.median(afters) * 1000:.1f} ms")
+    print(f"Total: {sum(befores):.2f} s -> {sum(afters):.2f} s "
+          f"({sum(befores) / sum(afters):.1f}x faster)")
+
+if __name__ == '__main__':
+    main()
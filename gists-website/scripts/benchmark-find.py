@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark notebook discovery: the old rglob-then-filter scan against the
+pruned os.scandir walk and the git index listing.
+
+By default this builds a throwaway tree that mimics the repo with the
+website's dependencies installed: a few hundred notebooks plus a large
+node_modules (at the top level and under gists-website/) and a .venv.
+Use --root to time an existing tree instead.
+"""
+
+import argparse
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List
+
+from notebook_finder import git_notebooks, walk_notebooks
+
+# Same as convert-notebooks.py
+EXCLUDE_DIRS = {'.git', '.venv', '.vscode', 'node_modules', 'gists-website', '__pycache__'}
+
+def find_notebooks_rglob(root_dir: Path) -> List[Path]:
+    """The original implementation: walk everything, filter afterwards."""
+    notebooks = []
+    for path in root_dir.rglob('*.ipynb'):
+        if any(excluded in path.parts for excluded in EXCLUDE_DIRS):
+            continue
+        if '.ipynb_checkpoints' in str(path):
+            continue
+        notebooks.append(path)
+    return sorted(notebooks)
+
+def build_tree(root: Path, notebooks: int, packages: int) -> None:
+    """Create notebooks spread over topic folders, plus dependency folders full of files."""
+    for i in range(notebooks):
+        topic = root / f'topic_{i % 20}' / f'sub_{i % 7}'
+        topic.mkdir(parents=True, exist_ok=True)
+        (topic / f'notebook_{i}.ipynb').write_text('{}')
+        if i % 10 == 0:
+            checkpoints = topic / '.ipynb_checkpoints'
+            checkpoints.mkdir(exist_ok=True)
+            (checkpoints / f'notebook_{i}-checkpoint.ipynb').write_text('{}')
+
+    for modules in (root / 'node_modules', root / 'gists-website' / 'node_modules'):
+        for i in range(packages):
+            package = modules / f'package-{i}'
+            for sub in ('lib', 'dist', 'src'):
+                (package / sub).mkdir(parents=True, exist_ok=True)
+                for j in range(4):
+                    (package / sub / f'file{j}.js').write_text('')
+            (package / 'package.json').write_text('{}')
+    site_packages = root / '.venv' / 'lib' / 'site-packages'
+    for i in range(packages // 4):
+        (site_packages / f'pkg{i}').mkdir(parents=True, exist_ok=True)
+        (site_packages / f'pkg{i}' / '__init__.py').write_text('')
+
+    (root / '.gitignore').write_text('node_modules/\n.venv/\n.ipynb_checkpoints/\n')
+    (root / 'gists-website' / '.gitignore').write_text('/node_modules\n')
+    subprocess.run(['git', 'init', '-q'], cwd=root, check=True)
+    subprocess.run(['git', 'add', '-A'], cwd=root, check=True)
+
+def time_call(func: Callable[[], List[Path]], repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--root', type=Path, help='Benchmark this tree instead of a generated one')
+    parser.add_argument('--notebooks', type=int, default=300, help='Notebooks in the generated tree')
+    parser.add_argument('--packages', type=int, default=2000,
+                        help='Packages in each generated node_modules (16 files each)')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per method (best time is kept)')
+    args = parser.parse_args()
+
+    tmp_dir = None
+    root = args.root
+    if root is None:
+        tmp_dir = Path(tempfile.mkdtemp(prefix='find-notebooks-'))
+        root = tmp_dir / 'gists'
+        print(f"Building tree in {root} ...")
+        build_tree(root, args.notebooks, args.packages)
+
+    try:
+        methods = {
+            'rglob + filter (old)': lambda: find_notebooks_rglob(root),
+            'scandir walk, pruned': lambda: walk_notebooks(root, EXCLUDE_DIRS),
+            'git ls-files': lambda: git_notebooks(root, EXCLUDE_DIRS) or [],
+        }
+        baseline = None
+        print(f"\n{'Method':<24} {'Notebooks':>9} {'Best ms':>9} {'Speedup':>8}")
+        for name, func in methods.items():
+            found = len(func())
+            elapsed = time_call(func, args.repeat)
+            baseline = baseline or elapsed
+            print(f"{name:<24} {found:>9} {elapsed * 1000:>9.1f} {baseline / elapsed:>7.1f}x")
+    finally:
+        if tmp_dir is not None:
+            shutil.rmtree(tmp_dir)
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,7 @@
 #!/usr/bin/env node
 /**
- * Build search index and navigation structure from notebook metadata
+ * Build the navigation structure from notebook metadata.
+ * The search index is written by convert-notebooks.py (see search_index.py).
  */
 
 import fs from 'fs';
@@ -29,21 +30,9 @@ interface NavigationNode {
   notebooks?: Array<{ title: string; path: string; id: string }>;
 }
 
-interface SearchDocument {
-  id: string;
-  title: string;
-  category: string;
-  subcategory: string;
-  path: string;
-  content: string;
-  tags: string[];
-  headings: string[];
-}
-
 const PROJECT_ROOT = path.join(__dirname, '..');
 const DATA_DIR = path.join(PROJECT_ROOT, 'data');
 const METADATA_FILE = path.join(DATA_DIR, 'notebooks-metadata.json');
-const SEARCH_INDEX_FILE = path.join(DATA_DIR, 'search-index.json');
 const NAVIGATION_FILE = path.join(DATA_DIR, 'navigation.json');
 
 function capitalizeWords(str: string): string {
@@ -53,24 +42,6 @@ function capitalizeWords(str: string): string {
     .join(' ');
 }
 
-function buildSearchIndex(notebooks: NotebookMetadata[]): SearchDocument[] {
-  console.log('Building search index...');
-
-  const searchDocs = notebooks.map(nb => ({
-    id: nb.id,
-    title: nb.title,
-    category: nb.category,
-    subcategory: nb.subcategory,
-    path: nb.path,
-    content: nb.content,
-    tags: nb.tags,
-    headings: nb.headings.map(h => h.text)
-  }));
-
-  console.log(`✅ Created ${searchDocs.length} search documents`);
-  return searchDocs;
-}
-
 function buildNavigation(notebooks: NotebookMetadata[]): { [key: string]: NavigationNode } {
   console.log('Building navigation structure...');
 
@@ -178,11 +149,6 @@ function main() {
 
   console.log(`📖 Loaded ${metadata.length} notebook metadata entries\n`);
 
-  // Build search index
-  const searchIndex = buildSearchIndex(metadata);
-  fs.writeFileSync(SEARCH_INDEX_FILE, JSON.stringify(searchIndex, null, 2));
-  console.log(`💾 Search index saved to: ${SEARCH_INDEX_FILE}\n`);
-
   // Build navigation
   const navigation = buildNavigation(metadata);
   fs.writeFileSync(NAVIGATION_FILE, JSON.stringify(navigation, null, 2));
@@ -0,0 +1,151 @@
+"""
+Timing and memory records for convert-notebooks.py.
+
+Every converted notebook gets a NotebookProfile with the wall time of each
+stage (read, metadata, render, clean, write) and, when memory tracking is
+on, the peak Python heap it needed. The build as a whole is split into
+laps (discover, plan, convert, ...) by a BuildProfile. The results can be
+printed as a table of the slowest notebooks, saved as JSON for comparing
+builds, or saved as a Chrome trace (open it in chrome://tracing or
+https://ui.perfetto.dev) showing what each worker process did when.
+
+Stage start times use time.time() so records from pool workers line up.
+"""
+
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+PROFILE_VERSION = 1
+NOTEBOOK_STAGES = ('read', 'metadata', 'render', 'clean', 'write')
+
+class NotebookProfile:
+    """Per-stage wall time, and optionally peak heap, of one notebook conversion."""
+
+    def __init__(self, notebook: str):
+        self.notebook = notebook
+        self.pid = os.getpid()
+        self.stages: List[Tuple[str, float, float]] = []  # (name, start, seconds)
+        self.peak_mb: Optional[float] = None
+        # Only measured when tracemalloc was started for this process
+        self._heap_base = None
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            self._heap_base = tracemalloc.get_traced_memory()[0]
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.time()
+        began = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, start, time.perf_counter() - began))
+
+    def finish(self) -> 'NotebookProfile':
+        if self._heap_base is not None:
+            self.peak_mb = (tracemalloc.get_traced_memory()[1] - self._heap_base) / 2**20
+        return self
+
+    @property
+    def total(self) -> float:
+        return sum(seconds for _, _, seconds in self.stages)
+
+    def stage_seconds(self) -> Dict[str, float]:
+        seconds: Dict[str, float] = {}
+        for name, _, elapsed in self.stages:
+            seconds[name] = seconds.get(name, 0.0) + elapsed
+        return seconds
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'notebook': self.notebook,
+            'pid': self.pid,
+            'total': round(self.total, 6),
+            'stages': {name: round(s, 6) for name, s in self.stage_seconds().items()},
+            'peak_mb': None if self.peak_mb is None else round(self.peak_mb, 3),
+        }
+
+class BuildProfile:
+    """Splits a build into consecutive laps and collects notebook profiles."""
+
+    def __init__(self):
+        self.started = time.time()
+        self.pid = os.getpid()
+        self.laps: List[Tuple[str, float, float]] = []  # (name, start, seconds)
+        self.notebooks: List[NotebookProfile] = []
+        self._lap_start = self.started
+
+    def lap(self, name: str) -> None:
+        """Record the time since the previous lap (or the start) as stage `name`."""
+        now = time.time()
+        self.laps.append((name, self._lap_start, now - self._lap_start))
+        self._lap_start = now
+
+    def add(self, profile: Optional[NotebookProfile]) -> None:
+        if profile is not None:
+            self.notebooks.append(profile)
+
+    def print_slowest(self, limit: int = 10) -> None:
+        if not self.notebooks:
+            return
+        slowest = sorted(self.notebooks, key=lambda p: p.total, reverse=True)[:limit]
+        with_memory = any(p.peak_mb is not None for p in slowest)
+
+        header = f"{'Notebook':<60}" + ''.join(f"{s:>10}" for s in NOTEBOOK_STAGES) + f"{'total':>10}"
+        if with_memory:
+            header += f"{'peak MB':>10}"
+        print(f"\n⏱️  Slowest notebooks (ms):")
+        print(header)
+        for profile in slowest:
+            seconds = profile.stage_seconds()
+            row = f"{profile.notebook[-60:]:<60}"
+            row += ''.join(f"{seconds.get(s, 0.0) * 1000:>10.1f}" for s in NOTEBOOK_STAGES)
+            row += f"{profile.total * 1000:>10.1f}"
+            if with_memory:
+                row += f"{profile.peak_mb:>10.1f}" if profile.peak_mb is not None else f"{'-':>10}"
+            print(row)
+
+        totals = {s: sum(p.stage_seconds().get(s, 0.0) for p in self.notebooks) for s in NOTEBOOK_STAGES}
+        overall = sum(totals.values()) or 1.0
+        print("Stage share: " + ', '.join(f"{s} {totals[s] / overall:.0%}" for s in NOTEBOOK_STAGES))
+        print("Build: " + ', '.join(f"{name} {seconds:.2f}s" for name, _, seconds in self.laps))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'version': PROFILE_VERSION,
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S%z', time.localtime(self.started)),
+            'total': round(sum(seconds for _, _, seconds in self.laps), 6),
+            'laps': {name: round(seconds, 6) for name, _, seconds in self.laps},
+            'notebooks': [p.to_dict() for p in sorted(self.notebooks, key=lambda p: p.notebook)],
+        }
+
+    def write_json(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), indent=2), encoding='utf-8')
+
+    def write_chrome_trace(self, path: Path) -> None:
+        """Write the Trace Event Format: one track for the build, one per worker process."""
+        def event(name: str, start: float, seconds: float, tid: int, **args) -> Dict[str, Any]:
+            return {
+                'name': name, 'cat': 'convert', 'ph': 'X', 'pid': self.pid, 'tid': tid,
+                'ts': round((start - self.started) * 1e6), 'dur': round(seconds * 1e6),
+                'args': args,
+            }
+
+        events = [event(name, start, seconds, self.pid) for name, start, seconds in self.laps]
+        for profile in self.notebooks:
+            if not profile.stages:
+                continue
+            start = profile.stages[0][1]
+            args = {} if profile.peak_mb is None else {'peak_mb': round(profile.peak_mb, 3)}
+            events.append(event(profile.notebook, start, profile.total, profile.pid, **args))
+            events.extend(event(name, stage_start, seconds, profile.pid, notebook=profile.notebook)
+                          for name, stage_start, seconds in profile.stages)
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({'traceEvents': events, 'displayTimeUnit': 'ms'}), encoding='utf-8')
@@ -8,76 +8,180 @@ and converts them to HTML for static site generation.
 import os
 import json
 import re
+import sys
+import argparse
+import hashlib
+import importlib.metadata
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, List, Any
-import nbformat
-from nbconvert import HTMLExporter
-from bs4 import BeautifulSoup
+from typing import TYPE_CHECKING, Dict, Iterable, List, Any, Optional, Tuple
+
+from build_profile import BuildProfile, NotebookProfile
+from fulltext_index import build_fulltext_index
+from notebook_finder import git_notebooks, walk_notebooks
+from notebook_reader import read_notebook_cells
+from notebook_watcher import watch_changes
+from output_writer import ADDED, DELETED, ChangeList, write_if_changed
+from precompress import compressed_siblings, is_compressed_sibling, precompress
+from search_index import write_search_index
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# nbformat/nbconvert cost ~50 MB to import; they are only loaded when a
+# notebook is actually rendered, so metadata-only and no-op runs stay small
+if TYPE_CHECKING:
+    from nbconvert import HTMLExporter
 
 # Paths
 SCRIPT_DIR = Path(__file__).parent
 PROJECT_ROOT = SCRIPT_DIR.parent
 NOTEBOOKS_SOURCE = PROJECT_ROOT.parent  # Parent directory (gists repo)
 NOTEBOOKS_OUTPUT = PROJECT_ROOT / 'public' / 'notebooks'
+ASSETS_OUTPUT = NOTEBOOKS_OUTPUT / '_assets'  # Content-addressed images
+ASSETS_URL = '/notebooks/_assets'
 METADATA_OUTPUT = PROJECT_ROOT / 'data'
+PUBLIC_DATA_OUTPUT = PROJECT_ROOT / 'public' / 'data'
+MANIFEST_FILE = METADATA_OUTPUT / 'build-manifest.json'
+CHANGES_FILE = METADATA_OUTPUT / 'build-changes.json'
+SEARCH_INDEX_OUTPUT = PUBLIC_DATA_OUTPUT / 'search'
+FULLTEXT_INDEX_FILE = METADATA_OUTPUT / 'fulltext-index.bin'
+TEMPLATES_DIR = SCRIPT_DIR / 'templates'
+
+# Bump whenever the HTML or metadata produced for a notebook changes shape,
+# so incremental builds know that cached outputs are stale.
+CONVERTER_VERSION = 4
+TEMPLATE_NAME = 'gists'  # Body-only lab template, see templates/gists
 
 # Directories to exclude
 EXCLUDE_DIRS = {'.git', '.venv', '.vscode', 'node_modules', 'gists-website', '__pycache__'}
 
+# --watch waits this long after the last file event before rebuilding
+WATCH_DEBOUNCE = 0.2
+
+# Tags stripped from cell outputs (the template already omits the page's own)
+STRIP_TAGS_RE = re.compile(
+    r'<script\b[^>]*>.*?</script\s*>|<(?:link|meta)\b[^>]*>(?:\s*</(?:link|meta)\s*>)?',
+    re.IGNORECASE | re.DOTALL,
+)
+
+# One exporter per process; created lazily so pool workers each build their own
+_html_exporter: Optional['HTMLExporter'] = None
+
+def get_html_exporter() -> 'HTMLExporter':
+    """Return this process's configured HTMLExporter, creating it on first use."""
+    global _html_exporter
+    if _html_exporter is None:
+        from nbconvert import HTMLExporter
+        from asset_extractor import ExtractAssetsPreprocessor
+        _html_exporter = HTMLExporter(
+            template_name=TEMPLATE_NAME,
+            extra_template_basedirs=[str(TEMPLATES_DIR)],
+        )
+        _html_exporter.register_preprocessor(ExtractAssetsPreprocessor(
+            parent=_html_exporter,
+            assets_dir=str(ASSETS_OUTPUT),
+            assets_url=ASSETS_URL,
+        ), enabled=True)
+    return _html_exporter
+
+# Precompiled patterns for metadata extraction
+NON_WORD_RE = re.compile(r'[^\w\s-]')
+WHITESPACE_RE = re.compile(r'\s+')
+TITLE_RE = re.compile(r'^#\s+(.+)$', re.MULTILINE)
+HEADING_RE = re.compile(r'^(#{1,6})\s+(.+)$', re.MULTILINE)
+MARKDOWN_SYNTAX_RE = re.compile(r'[#*_`]')
+
+# Characters of notebook text kept in the metadata for search
+CONTENT_LIMIT = 1000
+
 def clean_title(text: str) -> str:
     """Clean and format title text."""
     # Remove special characters and extra whitespace
-    text = re.sub(r'[^\w\s-]', '', text)
-    text = re.sub(r'\s+', ' ', text).strip()
+    text = NON_WORD_RE.sub('', text)
+    text = WHITESPACE_RE.sub(' ', text).strip()
     return text
 
-def extract_title_from_notebook(nb: nbformat.NotebookNode) -> str:
-    """Extract title from first markdown cell or first heading."""
-    for cell in nb.cells:
-        if cell.cell_type == 'markdown':
-            content = cell.source
-            # Look for first heading
-            match = re.search(r'^#\s+(.+)$', content, re.MULTILINE)
-            if match:
-                return clean_title(match.group(1))
-            # If no heading, use first line
-            first_line = content.split('\n')[0].strip()
-            if first_line and len(first_line) < 100:
-                return clean_title(first_line.lstrip('#').strip())
-    return "Untitled Notebook"
-
-def extract_headings(nb: nbformat.NotebookNode) -> List[Dict[str, Any]]:
-    """Extract all headings from markdown cells."""
+def title_from_markdown(content: str) -> Optional[str]:
+    """Return the title a markdown cell provides, if any."""
+    # Look for first heading
+    match = TITLE_RE.search(content)
+    if match:
+        return clean_title(match.group(1))
+    # If no heading, use first line
+    first_line = content.split('\n', 1)[0].strip()
+    if first_line and len(first_line) < 100:
+        return clean_title(first_line.lstrip('#').strip())
+    return None
+
+def take_text(source: str, limit: int, strip_markdown: bool) -> str:
+    """Return the first `limit` characters of a cell's search text.
+
+    Markdown is stripped slice by slice, so only as much of a long cell as
+    the budget needs is scanned.
+    """
+    if not strip_markdown:
+        return source[:limit]
+    pieces = []
+    taken = 0
+    pos = 0
+    while taken < limit and pos < len(source):
+        piece = MARKDOWN_SYNTAX_RE.sub('', source[pos:pos + limit])
+        pieces.append(piece)
+        taken += len(piece)
+        pos += limit
+    return ''.join(pieces)[:limit]
+
+def extract_notebook_metadata(cells: Iterable[Dict[str, Any]],
+                              content_limit: int = CONTENT_LIMIT) -> Dict[str, Any]:
+    """Extract title, headings and search snippet in a single pass over the cells.
+
+    The snippet is the markdown (without formatting characters) and code of
+    the notebook joined by spaces and cut to `content_limit` characters;
+    text past the limit is never built.
+    """
+    title = None
     headings = []
-    for cell in nb.cells:
-        if cell.cell_type == 'markdown':
-            content = cell.source
-            for match in re.finditer(r'^(#{1,6})\s+(.+)$', content, re.MULTILINE):
-                level = len(match.group(1))
+    content_parts = []
+    content_length = 0
+    seen_text_cell = False
+
+    for cell in cells:
+        cell_type = cell['cell_type']
+        if cell_type not in ('markdown', 'code'):
+            continue
+        source = cell['source']
+
+        if cell_type == 'markdown':
+            if title is None:
+                title = title_from_markdown(source)
+            for match in HEADING_RE.finditer(source):
                 text = match.group(2).strip()
-                heading_id = re.sub(r'[^\w\s-]', '', text).lower().replace(' ', '-')
                 headings.append({
-                    'level': level,
+                    'level': len(match.group(1)),
                     'text': text,
-                    'id': heading_id
+                    'id': NON_WORD_RE.sub('', text).lower().replace(' ', '-')
                 })
-    return headings
-
-def extract_text_content(nb: nbformat.NotebookNode) -> str:
-    """Extract all text content for search indexing."""
-    content_parts = []
 
-    for cell in nb.cells:
-        if cell.cell_type == 'markdown':
-            # Strip markdown formatting
-            text = cell.source
-            text = re.sub(r'[#*_`]', '', text)
+        # Same result as ' '.join(all cell texts)[:content_limit]
+        if content_length < content_limit:
+            if seen_text_cell:
+                content_parts.append(' ')
+                content_length += 1
+            text = take_text(source, content_limit - content_length, cell_type == 'markdown')
             content_parts.append(text)
-        elif cell.cell_type == 'code':
-            # Include code but mark it
-            content_parts.append(cell.source)
+            content_length += len(text)
+        seen_text_cell = True
 
-    return ' '.join(content_parts)
+    return {
+        'title': title if title is not None else "Untitled Notebook",
+        'headings': headings,
+        'content': ''.join(content_parts)[:content_limit],
+    }
 
 def get_category_from_path(rel_path: Path) -> Dict[str, str]:
     """Extract category information from file path."""
@@ -96,85 +200,444 @@ def get_category_from_path(rel_path: Path) -> Dict[str, str]:
         'path_parts': list(parts)
     }
 
-def convert_notebook(notebook_path: Path, rel_path: Path) -> Dict[str, Any]:
-    """Convert a single notebook to HTML and extract metadata."""
-    print(f"Processing: {rel_path}")
-
-    # Read notebook
-    with open(notebook_path, 'r', encoding='utf-8') as f:
-        nb = nbformat.read(f, as_version=4)
-
-    # Extract metadata
-    title = extract_title_from_notebook(nb)
-    headings = extract_headings(nb)
-    text_content = extract_text_content(nb)
+def build_metadata(rel_path: Path, cells: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Build a notebook's metadata entry from its cells."""
+    extracted = extract_notebook_metadata(cells)
     category_info = get_category_from_path(rel_path)
 
-    # Convert to HTML
-    html_exporter = HTMLExporter()
-    html_exporter.template_name = 'classic'  # Use classic template
-    (body, resources) = html_exporter.from_notebook_node(nb)
-
-    # Clean HTML
-    soup = BeautifulSoup(body, 'html.parser')
-
-    # Remove unnecessary elements
-    for element in soup.find_all(['script', 'link', 'meta']):
-        element.decompose()
-
-    # Find notebook content (the main container)
-    notebook_container = soup.find('div', class_='jp-Notebook')
-    if not notebook_container:
-        notebook_container = soup.find('body')
-
-    cleaned_html = str(notebook_container) if notebook_container else body
-
-    # Create output path
-    output_rel_path = rel_path.with_suffix('.html')
-    output_path = NOTEBOOKS_OUTPUT / output_rel_path
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-
-    # Write HTML file
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(cleaned_html)
-
     # Generate URL path (without .html extension for Next.js)
     url_path = '/' + str(rel_path.with_suffix('')).replace(os.sep, '/')
 
-    # Create metadata entry
-    metadata = {
+    return {
         'id': str(rel_path.with_suffix('')).replace(os.sep, '/'),
-        'title': title,
+        'title': extracted['title'],
         'category': category_info['category'],
         'subcategory': category_info['subcategory'],
         'path': url_path,
-        'file_path': str(output_rel_path),
-        'headings': headings,
-        'content': text_content[:1000],  # First 1000 chars for search
+        'file_path': str(rel_path.with_suffix('.html')),
+        'headings': extracted['headings'],
+        'content': extracted['content'],  # First CONTENT_LIMIT chars, for excerpts
         'tags': category_info['path_parts']
     }
 
-    return metadata
+def convert_notebook(notebook_path: Path, rel_path: Path,
+                     profile: Optional[NotebookProfile] = None) -> Tuple[Dict[str, Any], List[str], Optional[str]]:
+    """Convert a single notebook to HTML and extract metadata.
 
-def find_notebooks(root_dir: Path) -> List[Path]:
-    """Find all Jupyter notebooks in the directory tree."""
-    notebooks = []
+    Returns the metadata entry, the names of the image assets the HTML uses
+    and whether the HTML file was added, modified or (None) left unchanged.
+    Stage timings are recorded in `profile` when one is given.
+    """
+    print(f"Processing: {rel_path}")
+    if profile is None:
+        profile = NotebookProfile(rel_path.as_posix())
 
-    for path in root_dir.rglob('*.ipynb'):
-        # Skip excluded directories
-        if any(excluded in path.parts for excluded in EXCLUDE_DIRS):
-            continue
+    import nbformat
 
-        # Skip checkpoint files
-        if '.ipynb_checkpoints' in str(path):
-            continue
+    # Read notebook (rendering needs the outputs, so use the full reader)
+    with profile.stage('read'), open(notebook_path, 'r', encoding='utf-8') as f:
+        nb = nbformat.read(f, as_version=4)
 
-        notebooks.append(path)
+    # Extract metadata
+    with profile.stage('metadata'):
+        metadata = build_metadata(rel_path, nb.cells)
+
+    # Convert to HTML, then drop the notebook before making more copies
+    with profile.stage('render'):
+        (body, resources) = get_html_exporter().from_notebook_node(nb)
+    assets = sorted(resources['assets'])
+    del nb, resources
+
+    # Remove scripts, stylesheets and meta tags embedded in outputs
+    with profile.stage('clean'):
+        if STRIP_TAGS_RE.search(body):
+            body = STRIP_TAGS_RE.sub('', body)
+        cleaned_html = body.strip()
+    del body
+
+    # Write HTML file, leaving it untouched if the page did not change
+    output_path = NOTEBOOKS_OUTPUT / rel_path.with_suffix('.html')
+    with profile.stage('write'):
+        html_status = write_if_changed(output_path, cleaned_html)
+
+    return metadata, assets, html_status
+
+def find_notebooks(root_dir: Path, use_git: bool = False) -> List[Path]:
+    """Find all Jupyter notebooks in the directory tree.
+
+    Excluded, checkpoint and .gitignore'd directories are skipped without
+    being entered. With `use_git`, the list comes from the git index
+    instead, falling back to the walk outside a git work tree.
+    """
+    if use_git:
+        notebooks = git_notebooks(root_dir, EXCLUDE_DIRS)
+        if notebooks is not None:
+            return notebooks
+        print(f"{root_dir} is not in a git work tree; walking it instead")
+    return walk_notebooks(root_dir, EXCLUDE_DIRS)
+
+def hash_file(path: Path) -> str:
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def hash_template() -> str:
+    """Hash the custom template's files so template edits invalidate the cache."""
+    digest = hashlib.sha256()
+    for path in sorted((TEMPLATES_DIR / TEMPLATE_NAME).iterdir()):
+        digest.update(path.name.encode('utf-8'))
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+def build_fingerprint() -> Dict[str, Any]:
+    """Describe the converter setup; any change invalidates every cached entry."""
+    return {
+        'converter_version': CONVERTER_VERSION,
+        'nbconvert_version': importlib.metadata.version('nbconvert'),
+        'template': TEMPLATE_NAME,
+        'template_hash': hash_template(),
+    }
 
-    return notebooks
+def load_manifest() -> Dict[str, Any]:
+    """Load the build manifest, or return an empty one if missing or stale."""
+    empty = {**build_fingerprint(), 'notebooks': {}}
+    if not MANIFEST_FILE.exists():
+        return empty
+    try:
+        with open(MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return empty
+    if any(manifest.get(key) != value for key, value in build_fingerprint().items()):
+        print("Converter configuration changed, rebuilding all notebooks")
+        return empty
+    manifest.setdefault('notebooks', {})
+    return manifest
+
+def save_manifest(manifest: Dict[str, Any]) -> None:
+    """Persist the build manifest next to the generated metadata."""
+    write_if_changed(MANIFEST_FILE, json.dumps(manifest, indent=2, sort_keys=True))
+
+def load_cached_metadata(metadata_file: Path) -> Dict[str, Dict[str, Any]]:
+    """Load previously generated metadata entries keyed by notebook id."""
+    if not metadata_file.exists():
+        return {}
+    try:
+        with open(metadata_file, 'r', encoding='utf-8') as f:
+            return {entry['id']: entry for entry in json.load(f)}
+    except (OSError, ValueError, KeyError, TypeError):
+        return {}
+
+def is_output_current(entries: Dict[str, Any], rel_path: Path, content_hash: str) -> bool:
+    """Whether a notebook's HTML was built from exactly this content."""
+    entry = entries.get(rel_path.as_posix())
+    if not entry or entry.get('hash') != content_hash:
+        return False
+    return (NOTEBOOKS_OUTPUT / entry['output']).exists()
+
+def peak_rss_mb(who: int) -> Optional[float]:
+    """Peak resident set size in MB for RUSAGE_SELF or RUSAGE_CHILDREN."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def list_assets() -> set:
+    return set(os.listdir(ASSETS_OUTPUT)) if ASSETS_OUTPUT.exists() else set()
+
+def record_new_assets(assets_before: set, changes: ChangeList) -> None:
+    for name in list_assets() - assets_before:
+        if not is_compressed_sibling(Path(name)) and not name.startswith('.'):
+            changes.record(ASSETS_OUTPUT / name, ADDED)
+
+def prune_assets(manifest: Dict[str, Any], changes: ChangeList) -> None:
+    """Delete extracted images that no notebook in the manifest references."""
+    if not ASSETS_OUTPUT.exists():
+        return
+    in_use = {name for entry in manifest['notebooks'].values() for name in entry.get('assets', [])}
+    removed = 0
+    for path in ASSETS_OUTPUT.iterdir():
+        # Precompressed siblings live and die with their image
+        name = path.stem if is_compressed_sibling(path) else path.name
+        if name not in in_use:
+            path.unlink()
+            if not is_compressed_sibling(path):
+                changes.record(path, DELETED)
+                removed += 1
+    if removed:
+        print(f"Removed {removed} unused image assets")
+
+def prune_output(output_rel_path: str, changes: ChangeList) -> None:
+    """Delete a generated HTML file and any directories it leaves empty."""
+    output_path = NOTEBOOKS_OUTPUT / output_rel_path
+    if output_path.exists():
+        output_path.unlink()
+        changes.record(output_path, DELETED)
+        print(f"Removed: {output_rel_path}")
+    for sibling in compressed_siblings(output_path):
+        if sibling.exists():
+            sibling.unlink()
+    parent = output_path.parent
+    while parent != NOTEBOOKS_OUTPUT and parent.exists() and not any(parent.iterdir()):
+        parent.rmdir()
+        parent = parent.parent
+
+def precompress_outputs(jobs: int) -> int:
+    """Refresh .gz/.br siblings of generated pages, SVG images and data JSON."""
+    candidates = list(NOTEBOOKS_OUTPUT.rglob('*.html'))
+    if ASSETS_OUTPUT.exists():
+        candidates.extend(ASSETS_OUTPUT.glob('*.svg'))
+    for data_dir in (METADATA_OUTPUT, PUBLIC_DATA_OUTPUT):
+        candidates.extend(p for p in data_dir.glob('*.json') if p not in (MANIFEST_FILE, CHANGES_FILE))
+    if SEARCH_INDEX_OUTPUT.exists():
+        candidates.extend(SEARCH_INDEX_OUTPUT.glob('*.json'))
+    return precompress(candidates, jobs)
+
+def read_full_texts(all_metadata: List[Dict[str, Any]],
+                    notebooks: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
+    """Complete markdown and code of each notebook, keyed by metadata id.
+
+    `notebooks` are the build manifest's entries. A text stored in an entry
+    came from the source with the entry's hash and is reused; texts read
+    here are stored in their entry for the next build.
+    """
+    notebooks = notebooks if notebooks is not None else {}
+    texts = {}
+    for entry in all_metadata:
+        cached = notebooks.get(f"{entry['id']}.ipynb")
+        if cached is not None and 'text' in cached:
+            texts[entry['id']] = cached['text']
+            continue
+        try:
+            cells = read_notebook_cells(NOTEBOOKS_SOURCE / f"{entry['id']}.ipynb")
+        except Exception:
+            continue  # indexed on its metadata snippet instead
+        texts[entry['id']] = '\n'.join(cell['source'] for cell in cells)
+        if cached is not None:
+            cached['text'] = texts[entry['id']]
+    return texts
+
+def hash_index_inputs(all_metadata: List[Dict[str, Any]], notebooks: Dict[str, Any]) -> str:
+    """Hash what the search indexes are built from: metadata, source hashes and the index code."""
+    digest = hashlib.sha256()
+    for module in ('search_index.py', 'fulltext_index.py'):
+        digest.update(hash_file(SCRIPT_DIR / module).encode('ascii'))
+    digest.update(json.dumps(all_metadata, sort_keys=True).encode('utf-8'))
+    for entry in all_metadata:
+        digest.update(str(notebooks.get(f"{entry['id']}.ipynb", {}).get('hash')).encode('utf-8'))
+    return digest.hexdigest()
+
+def save_metadata(metadata_file: Path, all_metadata: List[Dict[str, Any]], changes: ChangeList,
+                  manifest: Optional[Dict[str, Any]] = None) -> None:
+    """Write the metadata file and the search indexes built from it, where they changed.
+
+    With the build manifest, notebook texts come from it, and the indexes
+    are not rebuilt at all when nothing they are built from changed.
+    """
+    changes.record(metadata_file, write_if_changed(
+        metadata_file, json.dumps(all_metadata, indent=2, ensure_ascii=False)))
+    if manifest is not None:
+        index_inputs = hash_index_inputs(all_metadata, manifest['notebooks'])
+        if (manifest.get('index_inputs') == index_inputs and FULLTEXT_INDEX_FILE.exists()
+                and (SEARCH_INDEX_OUTPUT / 'manifest.json').exists()):
+            print("Search indexes: up to date")
+            return
+        manifest['index_inputs'] = index_inputs
+    full_texts = read_full_texts(all_metadata, manifest['notebooks'] if manifest is not None else None)
+    shards = write_search_index(all_metadata, SEARCH_INDEX_OUTPUT, full_texts, changes)
+    print(f"Search index: {shards} files in {SEARCH_INDEX_OUTPUT}")
+    index = build_fulltext_index(
+        (entry['id'], full_texts.get(entry['id'], entry['content'])) for entry in all_metadata)
+    changes.record(FULLTEXT_INDEX_FILE, write_if_changed(FULLTEXT_INDEX_FILE, index))
+    print(f"Full-text index: {len(index) / 1024:.0f} KB in {FULLTEXT_INDEX_FILE}")
+
+def report_changes(changes: ChangeList) -> None:
+    """Save the change list for downstream caching and print a summary."""
+    changes.save(CHANGES_FILE, PROJECT_ROOT)
+    print(f"Changed outputs: {changes.summary()} (see {CHANGES_FILE.name})")
+
+def init_worker(trace_memory: bool = False) -> None:
+    """Pool initializer: build the worker's exporter once, up front."""
+    if trace_memory:
+        tracemalloc.start()
+    get_html_exporter()
+
+def convert_safely(notebook_path: Path, rel_path: Path) -> Tuple[Optional[Tuple[Dict[str, Any], List[str], Optional[str]]], Optional[str], Optional[NotebookProfile]]:
+    """Convert a notebook, returning ((metadata, assets, html_status), error, profile) instead of raising."""
+    profile = NotebookProfile(rel_path.as_posix())
+    try:
+        return convert_notebook(notebook_path, rel_path, profile), None, profile.finish()
+    except Exception as e:
+        return None, str(e), profile.finish()
+
+def convert_all(pending: List[Tuple[Path, Path]], jobs: int, trace_memory: bool = False):
+    """Convert notebooks serially or over a process pool, yielding results as they finish."""
+    if jobs <= 1 or len(pending) <= 1:
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        for notebook_path, rel_path in pending:
+            yield rel_path, convert_safely(notebook_path, rel_path)
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker,
+                             initargs=(trace_memory,)) as executor:
+        futures = {
+            executor.submit(convert_safely, notebook_path, rel_path): rel_path
+            for notebook_path, rel_path in pending
+        }
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:  # e.g. a worker process died
+                result = (None, str(e), None)
+            yield futures[future], result
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--force', action='store_true',
+                        help='Ignore the build manifest and reconvert every notebook')
+    parser.add_argument('--jobs', '-j', type=int, default=1, metavar='N',
+                        help='Convert notebooks in N worker processes (default: 1)')
+    parser.add_argument('--precompress', action='store_true',
+                        help='Write .gz and .br siblings for new or changed HTML, SVG and '
+                             'data JSON files (brotli needs the optional brotli package)')
+    parser.add_argument('--metadata-only', action='store_true',
+                        help='Only regenerate notebooks-metadata.json for notebooks that '
+                             'already have HTML; reads cell sources without loading outputs')
+    parser.add_argument('--git-files', action='store_true',
+                        help='List notebooks from the git index (tracked and untracked, '
+                             'not ignored) instead of walking the source tree')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='Measure the peak Python heap of each notebook conversion '
+                             '(uses tracemalloc, which slows conversion down)')
+    parser.add_argument('--profile-json', type=Path, metavar='FILE',
+                        help='Write per-notebook, per-stage timings to FILE as JSON')
+    parser.add_argument('--chrome-trace', type=Path, metavar='FILE',
+                        help='Write a Chrome trace of the build to FILE '
+                             '(open in chrome://tracing or ui.perfetto.dev)')
+    parser.add_argument('--watch', action='store_true',
+                        help='After building, keep running and reconvert notebooks as they change')
+    args = parser.parse_args()
+    if args.watch and args.metadata_only:
+        parser.error('--watch cannot be combined with --metadata-only')
+    return args
+
+def rebuild_metadata(notebook_paths: List[Path]) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Build metadata for every already-converted notebook without rendering HTML."""
+    all_metadata = []
+    errors = []
+    for notebook_path in notebook_paths:
+        rel_path = notebook_path.relative_to(NOTEBOOKS_SOURCE)
+        if not (NOTEBOOKS_OUTPUT / rel_path.with_suffix('.html')).exists():
+            continue
+        try:
+            all_metadata.append(build_metadata(rel_path, read_notebook_cells(notebook_path)))
+        except Exception as e:
+            errors.append(f"Error processing {notebook_path}: {str(e)}")
+    return sorted(all_metadata, key=lambda m: m['id']), errors
+
+def skip_watched_dir(name: str) -> bool:
+    return name in EXCLUDE_DIRS or name == '.ipynb_checkpoints'
+
+def expand_changes(changes: Iterable[Path], manifest: Dict[str, Any]) -> List[Path]:
+    """Turn watcher output into the notebook paths to update.
+
+    Directory events stand for every notebook that is inside the directory
+    now or was inside it at the last build.
+    """
+    notebooks = set()
+    for path in changes:
+        if path.suffix == '.ipynb':
+            if not path.name.startswith('.'):  # editor temp and backup files
+                notebooks.add(path)
+            continue
+        if path.is_dir():
+            notebooks.update(find_notebooks(path))
+        prefix = '' if path == NOTEBOOKS_SOURCE else path.relative_to(NOTEBOOKS_SOURCE).as_posix() + '/'
+        notebooks.update(NOTEBOOKS_SOURCE / key for key in manifest['notebooks'] if key.startswith(prefix))
+    return sorted(notebooks)
+
+def watch(args: argparse.Namespace, metadata_file: Path, manifest: Dict[str, Any],
+          results: Dict[Path, Dict[str, Any]]) -> None:
+    """Reconvert notebooks as they change until interrupted.
+
+    Only changed notebooks are converted and re-read for the search
+    indexes; the metadata file and indexes are then rewritten from the
+    in-memory state.
+    """
+    get_html_exporter()  # pay the nbconvert start-up cost before the first edit
+    print(f"\n👀 Watching {NOTEBOOKS_SOURCE} for changes (Ctrl+C to stop)")
+
+    for batch in watch_changes(NOTEBOOKS_SOURCE, skip_watched_dir, find_notebooks, WATCH_DEBOUNCE):
+        start = time.perf_counter()
+        changes = ChangeList()
+        assets_before = list_assets()
+        updated = 0
+        for notebook_path in expand_changes(batch, manifest):
+            rel_path = notebook_path.relative_to(NOTEBOOKS_SOURCE)
+            key = rel_path.as_posix()
+
+            if not notebook_path.is_file():
+                entry = manifest['notebooks'].pop(key, None)
+                if entry is not None:
+                    prune_output(entry['output'], changes)
+                    results.pop(rel_path, None)
+                    updated += 1
+                    print(f"🗑️  Removed: {rel_path}")
+                continue
+
+            try:
+                content_hash = hash_file(notebook_path)
+            except OSError:
+                continue  # replaced again mid-save; the next event covers it
+            previous = manifest['notebooks'].get(key, {})
+            if previous.get('hash') == content_hash:
+                continue
+
+            entry = {'hash': content_hash, 'output': rel_path.with_suffix('.html').as_posix()}
+            manifest['notebooks'][key] = entry
+            converted, error, _ = convert_safely(notebook_path, rel_path)
+            if error is not None:
+                entry['error'] = error
+                results.pop(rel_path, None)
+                print(f"❌ Error processing {rel_path}: {error}")
+            else:
+                metadata, entry['assets'], html_status = converted
+                changes.record(NOTEBOOKS_OUTPUT / entry['output'], html_status)
+                results[rel_path] = metadata
+                print(f"✅ Converted: {rel_path}")
+            updated += 1
+
+        if not updated:
+            continue
+        record_new_assets(assets_before, changes)
+        prune_assets(manifest, changes)
+        save_metadata(metadata_file, sorted(results.values(), key=lambda m: m['id']), changes, manifest)
+        save_manifest(manifest)
+        if args.precompress:
+            precompress_outputs(1)
+        report_changes(changes)
+        print(f"🔄 Rebuilt {updated} notebook(s) in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+def report_memory(include_workers: bool = False) -> None:
+    """Print peak memory of this process and, optionally, of its pool workers."""
+    if resource is None:
+        return
+    line = f"Peak RSS: {peak_rss_mb(resource.RUSAGE_SELF):.1f} MB"
+    if include_workers:
+        worker_peak = peak_rss_mb(resource.RUSAGE_CHILDREN)
+        line += f" (largest worker: {worker_peak:.1f} MB)"
+    print(line)
 
 def main():
     """Main conversion process."""
+    args = parse_args()
+    profile = BuildProfile()
+
     print("Starting notebook conversion...")
     print(f"Source directory: {NOTEBOOKS_SOURCE}")
     print(f"Output directory: {NOTEBOOKS_OUTPUT}")
@@ -183,38 +646,141 @@ def main():
     NOTEBOOKS_OUTPUT.mkdir(parents=True, exist_ok=True)
     METADATA_OUTPUT.mkdir(parents=True, exist_ok=True)
 
+    metadata_file = METADATA_OUTPUT / 'notebooks-metadata.json'
+    if args.force:
+        manifest = {**build_fingerprint(), 'notebooks': {}}
+    else:
+        manifest = load_manifest()
+    cached_metadata = load_cached_metadata(metadata_file)
+    previous_entries = manifest['notebooks']
+    manifest['notebooks'] = {}
+    changes = ChangeList()
+    assets_before = list_assets()
+
     # Find all notebooks
-    notebook_paths = find_notebooks(NOTEBOOKS_SOURCE)
+    notebook_paths = find_notebooks(NOTEBOOKS_SOURCE, use_git=args.git_files)
     print(f"\nFound {len(notebook_paths)} notebooks")
+    profile.lap('discover')
+
+    if args.metadata_only:
+        all_metadata, errors = rebuild_metadata(notebook_paths)
+        save_metadata(metadata_file, all_metadata, changes)
+        print(f"\n✅ Metadata rebuilt for {len(all_metadata)} notebooks")
+        report_changes(changes)
+        if args.precompress:
+            print(f"Precompressed: {precompress_outputs(args.jobs)} files")
+        print(f"Errors: {len(errors)}")
+        report_memory()
+        for error in errors:
+            print(f"  - {error}")
+        return
 
-    # Convert each notebook
-    all_metadata = []
-    errors = []
+    # Reuse cached results where possible, queue the rest for conversion
+    results: Dict[Path, Dict[str, Any]] = {}
+    failures: Dict[Path, str] = {}
+    pending: List[Tuple[Path, Path]] = []
+    skipped = 0
 
     for notebook_path in notebook_paths:
+        rel_path = notebook_path.relative_to(NOTEBOOKS_SOURCE)
+        entry = {'hash': None, 'output': rel_path.with_suffix('.html').as_posix()}
         try:
-            rel_path = notebook_path.relative_to(NOTEBOOKS_SOURCE)
-            metadata = convert_notebook(notebook_path, rel_path)
-            all_metadata.append(metadata)
-        except Exception as e:
-            error_msg = f"Error processing {notebook_path}: {str(e)}"
-            print(f"❌ {error_msg}")
-            errors.append(error_msg)
-
-    # Save metadata
-    metadata_file = METADATA_OUTPUT / 'notebooks-metadata.json'
-    with open(metadata_file, 'w', encoding='utf-8') as f:
-        json.dump(all_metadata, f, indent=2, ensure_ascii=False)
+            entry['hash'] = hash_file(notebook_path)
+        except OSError as e:
+            failures[rel_path] = str(e)
+            continue
+        manifest['notebooks'][rel_path.as_posix()] = entry
+
+        previous = previous_entries.get(rel_path.as_posix(), {})
+        if previous.get('hash') == entry['hash'] and 'text' in previous:
+            entry['text'] = previous['text']  # the search indexes' text, see read_full_texts()
+        if previous.get('hash') == entry['hash'] and 'error' in previous:
+            # Unchanged notebook that failed last time: report, don't retry
+            failures[rel_path] = previous['error']
+            continue
+        if not is_output_current(previous_entries, rel_path, entry['hash']):
+            pending.append((notebook_path, rel_path))
+            continue
+        metadata = cached_metadata.get(rel_path.with_suffix('').as_posix())
+        if metadata is None:
+            # HTML is current; rebuild just the metadata without loading outputs
+            try:
+                metadata = build_metadata(rel_path, read_notebook_cells(notebook_path))
+            except Exception as e:
+                failures[rel_path] = str(e)
+                continue
+        entry['assets'] = previous.get('assets', [])
+        results[rel_path] = metadata
+        skipped += 1
+    profile.lap('plan')
+
+    # Convert changed notebooks
+    for rel_path, (converted, error, notebook_profile) in convert_all(pending, args.jobs, args.trace_memory):
+        profile.add(notebook_profile)
+        if error is None:
+            metadata, assets, html_status = converted
+            changes.record(NOTEBOOKS_OUTPUT / rel_path.with_suffix('.html'), html_status)
+            results[rel_path] = metadata
+            manifest['notebooks'][rel_path.as_posix()]['assets'] = assets
+        else:
+            failures[rel_path] = error
+            print(f"❌ Error processing {NOTEBOOKS_SOURCE / rel_path}: {error}")
+    profile.lap('convert')
+
+    for rel_path, error in failures.items():
+        if rel_path.as_posix() in manifest['notebooks']:
+            manifest['notebooks'][rel_path.as_posix()]['error'] = error
+
+    # Sort by id so serial and parallel builds write identical files
+    all_metadata = sorted(results.values(), key=lambda m: m['id'])
+    errors = [f"Error processing {NOTEBOOKS_SOURCE / rel_path}: {failures[rel_path]}"
+              for rel_path in sorted(failures)]
+
+    # Prune outputs of notebooks that no longer exist
+    for rel_key, entry in previous_entries.items():
+        if rel_key not in manifest['notebooks'] and not (NOTEBOOKS_SOURCE / rel_key).exists():
+            prune_output(entry['output'], changes)
+    record_new_assets(assets_before, changes)
+    prune_assets(manifest, changes)
+    profile.lap('prune')
+
+    # Save metadata and the search index
+    save_metadata(metadata_file, all_metadata, changes, manifest)
+    save_manifest(manifest)
+    profile.lap('save')
+
+    compressed = 0
+    if args.precompress:
+        compressed = precompress_outputs(args.jobs)
+        profile.lap('precompress')
 
     print(f"\n✅ Conversion complete!")
-    print(f"Processed: {len(all_metadata)} notebooks")
+    print(f"Processed: {len(all_metadata)} notebooks ({skipped} unchanged)")
+    if args.precompress:
+        print(f"Precompressed: {compressed} files")
     print(f"Errors: {len(errors)}")
     print(f"Metadata saved to: {metadata_file}")
+    report_changes(changes)
+    report_memory(include_workers=args.jobs > 1 and len(pending) > 1)
 
     if errors:
         print("\nErrors encountered:")
         for error in errors:
             print(f"  - {error}")
 
+    profile.print_slowest()
+    if args.profile_json:
+        profile.write_json(args.profile_json)
+        print(f"Timings saved to: {args.profile_json}")
+    if args.chrome_trace:
+        profile.write_chrome_trace(args.chrome_trace)
+        print(f"Chrome trace saved to: {args.chrome_trace}")
+
+    if args.watch:
+        try:
+            watch(args, metadata_file, manifest, results)
+        except KeyboardInterrupt:
+            print("\nStopped watching")
+
 if __name__ == '__main__':
     main()
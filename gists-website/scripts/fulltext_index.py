@@ -0,0 +1,344 @@
+"""
+Full-text index over the complete markdown and code of every notebook.
+
+The metadata keeps only the first CONTENT_LIMIT characters of a notebook
+for excerpts; this index covers all of it. Terms are tokenized like the
+site search (search_index.tokenize), then Porter-stemmed, and each posting
+keeps the term's positions so quoted phrases can be matched. Results are
+ranked with BM25.
+
+On disk the index is a single binary file of unsigned LEB128 varints:
+
+    magic b'GFTI', version
+    doc count, then per doc: id, token count
+    term count, then per term (sorted): term, doc frequency, postings size
+    postings, per term: (doc delta, tf, position deltas...) per doc
+
+Strings are a varint byte length followed by UTF-8. Loading decodes only
+the document table and term dictionary; a term's postings are decoded when
+a query first needs them.
+"""
+
+import math
+import re
+from collections import defaultdict
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from search_index import tokenize
+
+MAGIC = b'GFTI'
+FORMAT_VERSION = 1
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+PHRASE_RE = re.compile(r'"([^"]*)"')
+
+# --- Porter stemmer -------------------------------------------------------
+
+VOWELS = frozenset('aeiou')
+
+def _is_consonant(word: str, i: int) -> bool:
+    if word[i] in VOWELS:
+        return False
+    if word[i] == 'y':
+        return i == 0 or not _is_consonant(word, i - 1)
+    return True
+
+def _measure(stem: str) -> int:
+    """Number of vowel-consonant sequences in `stem` (Porter's m)."""
+    m = 0
+    previous_vowel = False
+    for i in range(len(stem)):
+        consonant = _is_consonant(stem, i)
+        if consonant and previous_vowel:
+            m += 1
+        previous_vowel = not consonant
+    return m
+
+def _has_vowel(stem: str) -> bool:
+    return any(not _is_consonant(stem, i) for i in range(len(stem)))
+
+def _ends_double_consonant(word: str) -> bool:
+    return len(word) >= 2 and word[-1] == word[-2] and _is_consonant(word, len(word) - 1)
+
+def _ends_cvc(word: str) -> bool:
+    return (len(word) >= 3 and _is_consonant(word, len(word) - 3)
+            and not _is_consonant(word, len(word) - 2)
+            and _is_consonant(word, len(word) - 1) and word[-1] not in 'wxy')
+
+def _replace_suffix(word: str, rules: Iterable[Tuple[str, str]], min_measure: int) -> str:
+    """Apply the first rule whose suffix matches, if the stem's measure allows it."""
+    for suffix, replacement in rules:
+        if word.endswith(suffix):
+            stem = word[:len(word) - len(suffix)]
+            return stem + replacement if _measure(stem) > min_measure else word
+    return word
+
+STEP2_RULES = (
+    ('ational', 'ate'), ('tional', 'tion'), ('enci', 'ence'), ('anci', 'ance'),
+    ('izer', 'ize'), ('bli', 'ble'), ('alli', 'al'), ('entli', 'ent'), ('eli', 'e'),
+    ('ousli', 'ous'), ('ization', 'ize'), ('ation', 'ate'), ('ator', 'ate'),
+    ('alism', 'al'), ('iveness', 'ive'), ('fulness', 'ful'), ('ousness', 'ous'),
+    ('aliti', 'al'), ('iviti', 'ive'), ('biliti', 'ble'), ('logi', 'log'),
+)
+STEP3_RULES = (
+    ('icate', 'ic'), ('ative', ''), ('alize', 'al'), ('iciti', 'ic'),
+    ('ical', 'ic'), ('ful', ''), ('ness', ''),
+)
+STEP4_SUFFIXES = (
+    'al', 'ance', 'ence', 'er', 'ic', 'able', 'ible', 'ant', 'ement', 'ment',
+    'ent', 'ion', 'ou', 'ism', 'ate', 'iti', 'ous', 'ive', 'ize',
+)
+
+def _step1(word: str) -> str:
+    if word.endswith('sses') or word.endswith('ies'):
+        word = word[:-2]
+    elif word.endswith('s') and not word.endswith('ss'):
+        word = word[:-1]
+
+    if word.endswith('eed'):
+        if _measure(word[:-3]) > 0:
+            word = word[:-1]
+    else:
+        for suffix in ('ed', 'ing'):
+            if word.endswith(suffix) and _has_vowel(word[:-len(suffix)]):
+                word = word[:-len(suffix)]
+                if word.endswith(('at', 'bl', 'iz')):
+                    word += 'e'
+                elif _ends_double_consonant(word) and word[-1] not in 'lsz':
+                    word = word[:-1]
+                elif _measure(word) == 1 and _ends_cvc(word):
+                    word += 'e'
+                break
+
+    if word.endswith('y') and _has_vowel(word[:-1]):
+        word = word[:-1] + 'i'
+    return word
+
+def _step4(word: str) -> str:
+    # Longest matching suffix only, so 'ement' is tried before 'ment' and 'ent'
+    for suffix in sorted(STEP4_SUFFIXES, key=len, reverse=True):
+        if word.endswith(suffix):
+            stem = word[:len(word) - len(suffix)]
+            if _measure(stem) > 1 and (suffix != 'ion' or stem.endswith(('s', 't'))):
+                return stem
+            return word
+    return word
+
+def _step5(word: str) -> str:
+    if word.endswith('e'):
+        stem = word[:-1]
+        m = _measure(stem)
+        if m > 1 or (m == 1 and not _ends_cvc(stem)):
+            word = stem
+    if word.endswith('ll') and _measure(word) > 1:
+        word = word[:-1]
+    return word
+
+@lru_cache(maxsize=1 << 16)
+def stem(word: str) -> str:
+    """Porter-stem a lowercase word; words that are not plain ASCII letters pass through."""
+    if len(word) <= 2 or not word.isascii() or not word.isalpha():
+        return word
+    word = _step1(word)
+    word = _replace_suffix(word, STEP2_RULES, 0)
+    word = _replace_suffix(word, STEP3_RULES, 0)
+    word = _step4(word)
+    return _step5(word)
+
+def analyze(text: str) -> List[str]:
+    """Tokenize and stem `text`; positions in the index are offsets into this list."""
+    return [stem(token) for token in tokenize(text)]
+
+# --- Binary encoding ------------------------------------------------------
+
+def _write_varint(out: bytearray, value: int) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _write_string(out: bytearray, value: str) -> None:
+    data = value.encode('utf-8')
+    _write_varint(out, len(data))
+    out += data
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+def _read_string(data: bytes, pos: int) -> Tuple[str, int]:
+    length, pos = _read_varint(data, pos)
+    return data[pos:pos + length].decode('utf-8'), pos + length
+
+# --- Building -------------------------------------------------------------
+
+def build_fulltext_index(documents: Iterable[Tuple[str, str]]) -> bytes:
+    """Encode an index over (doc_id, text) pairs; docs keep their given order.
+
+    Output depends only on the input, so unchanged notebooks give identical bytes.
+    """
+    doc_ids: List[str] = []
+    doc_lengths: List[int] = []
+    # term -> [(doc, positions), ...] in doc order
+    postings: Dict[str, List[Tuple[int, List[int]]]] = defaultdict(list)
+    for doc, (doc_id, text) in enumerate(documents):
+        terms = analyze(text)
+        positions: Dict[str, List[int]] = defaultdict(list)
+        for position, term in enumerate(terms):
+            positions[term].append(position)
+        for term, term_positions in positions.items():
+            postings[term].append((doc, term_positions))
+        doc_ids.append(doc_id)
+        doc_lengths.append(len(terms))
+
+    out = bytearray(MAGIC)
+    _write_varint(out, FORMAT_VERSION)
+    _write_varint(out, len(doc_ids))
+    for doc_id, length in zip(doc_ids, doc_lengths):
+        _write_string(out, doc_id)
+        _write_varint(out, length)
+
+    encoded: Dict[str, bytes] = {}
+    for term, term_postings in postings.items():
+        block = bytearray()
+        previous_doc = 0
+        for doc, positions in term_postings:
+            _write_varint(block, doc - previous_doc)
+            _write_varint(block, len(positions))
+            previous_position = 0
+            for position in positions:
+                _write_varint(block, position - previous_position)
+                previous_position = position
+            previous_doc = doc
+        encoded[term] = bytes(block)
+
+    terms = sorted(encoded)
+    _write_varint(out, len(terms))
+    for term in terms:
+        _write_string(out, term)
+        _write_varint(out, len(postings[term]))
+        _write_varint(out, len(encoded[term]))
+    for term in terms:
+        out += encoded[term]
+    return bytes(out)
+
+# --- Querying -------------------------------------------------------------
+
+class FullTextIndex:
+    """Read-only view of an encoded index with BM25 search."""
+
+    def __init__(self, data: bytes):
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError('not a full-text index file')
+        version, pos = _read_varint(data, len(MAGIC))
+        if version != FORMAT_VERSION:
+            raise ValueError(f'unsupported full-text index version {version}')
+
+        doc_count, pos = _read_varint(data, pos)
+        self.doc_ids: List[str] = []
+        self.doc_lengths: List[int] = []
+        for _ in range(doc_count):
+            doc_id, pos = _read_string(data, pos)
+            length, pos = _read_varint(data, pos)
+            self.doc_ids.append(doc_id)
+            self.doc_lengths.append(length)
+        self.avg_length = sum(self.doc_lengths) / doc_count if doc_count else 0.0
+
+        term_count, pos = _read_varint(data, pos)
+        dictionary = []
+        for _ in range(term_count):
+            term, pos = _read_string(data, pos)
+            df, pos = _read_varint(data, pos)
+            size, pos = _read_varint(data, pos)
+            dictionary.append((term, df, size))
+
+        # term -> (doc frequency, offset of its postings, size in bytes)
+        self.terms: Dict[str, Tuple[int, int, int]] = {}
+        for term, df, size in dictionary:
+            self.terms[term] = (df, pos, size)
+            pos += size
+        self.data = data
+        self._decoded: Dict[str, List[Tuple[int, List[int]]]] = {}
+
+    @classmethod
+    def load(cls, path: Path) -> 'FullTextIndex':
+        return cls(Path(path).read_bytes())
+
+    def postings(self, term: str) -> List[Tuple[int, List[int]]]:
+        """[(doc, positions), ...] for an analyzed term, in doc order."""
+        if term in self._decoded:
+            return self._decoded[term]
+        if term not in self.terms:
+            return []
+        df, pos, _ = self.terms[term]
+        result = []
+        doc = 0
+        for _ in range(df):
+            delta, pos = _read_varint(self.data, pos)
+            tf, pos = _read_varint(self.data, pos)
+            doc += delta
+            positions = []
+            position = 0
+            for _ in range(tf):
+                delta, pos = _read_varint(self.data, pos)
+                position += delta
+                positions.append(position)
+            result.append((doc, positions))
+        self._decoded[term] = result
+        return result
+
+    def idf(self, term: str) -> float:
+        df = self.terms[term][0] if term in self.terms else 0
+        n = len(self.doc_ids)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def _phrase_docs(self, terms: List[str]) -> set:
+        """Docs where `terms` occur consecutively."""
+        if not terms:
+            return set(range(len(self.doc_ids)))
+        starts = {doc: set(positions) for doc, positions in self.postings(terms[0])}
+        for offset, term in enumerate(terms[1:], start=1):
+            following = dict(self.postings(term))
+            starts = {
+                doc: {p for p in candidates if p + offset in following[doc]}
+                for doc, candidates in starts.items() if doc in following
+            }
+            starts = {doc: candidates for doc, candidates in starts.items() if candidates}
+        return set(starts)
+
+    def search(self, query: str, limit: Optional[int] = 10) -> List[Tuple[str, float]]:
+        """Rank docs by BM25 over the query's terms, best first.
+
+        Text in double quotes is a phrase: only docs containing each phrase
+        are returned. Other words need not all be present.
+        """
+        phrases = [analyze(phrase) for phrase in PHRASE_RE.findall(query)]
+        terms = analyze(PHRASE_RE.sub(' ', query)) + [t for phrase in phrases for t in phrase]
+
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(terms):
+            idf = self.idf(term)
+            for doc, positions in self.postings(term):
+                tf = len(positions)
+                norm = K1 * (1 - B + B * self.doc_lengths[doc] / self.avg_length)
+                scores[doc] += idf * tf * (K1 + 1) / (tf + norm)
+
+        for phrase in phrases:
+            allowed = self._phrase_docs(phrase)
+            scores = defaultdict(float, {doc: s for doc, s in scores.items() if doc in allowed})
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [(self.doc_ids[doc], score) for doc, score in ranked]
@@ -0,0 +1,163 @@
+"""
+Locate notebooks under a source tree without descending into excluded dirs.
+
+walk_notebooks() walks the tree with os.scandir and drops excluded and
+.gitignore'd directories before entering them, so dependency folders such
+as node_modules cost one directory entry instead of a full traversal.
+git_notebooks() instead asks git for tracked and untracked-but-not-ignored
+notebooks, which avoids walking the tree at all.
+
+The .gitignore support covers the common syntax (negation, anchored and
+directory-only patterns, `*`, `?`, `[...]` and `**`) in every directory's
+.gitignore; global excludes and .git/info/exclude are not read.
+"""
+
+import os
+import re
+import subprocess
+from pathlib import Path
+from typing import Collection, List, Optional, Tuple
+
+# (regex, negated, directory only, matched against the path rather than the name)
+IgnoreRule = Tuple['re.Pattern[str]', bool, bool, bool]
+# Directory the rules are relative to ('' for the root, else 'a/b/'), and its rules
+IgnoreFile = Tuple[str, List[IgnoreRule]]
+
+def _glob_to_regex(pattern: str) -> str:
+    """Translate a gitignore glob into a regex over '/'-separated paths."""
+    out = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith('**/', i):
+            out.append('(?:.*/)?')
+            i += 3
+            continue
+        if pattern.startswith('/**', i) and i + 3 == len(pattern):
+            out.append('/.*')
+            break
+        if char == '*':
+            out.append('[^/]*')
+        elif char == '?':
+            out.append('[^/]')
+        elif char == '[':
+            end = pattern.find(']', i + 2)
+            if end == -1:
+                out.append(re.escape(char))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                out.append('[' + body.replace('\\', '\\\\') + ']')
+                i = end
+        elif char == '\\' and i + 1 < len(pattern):
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(char))
+        i += 1
+    return ''.join(out)
+
+def parse_gitignore(text: str) -> List[IgnoreRule]:
+    rules = []
+    for line in text.splitlines():
+        line = line.rstrip()
+        if not line or line.startswith('#'):
+            continue
+        negated = line.startswith('!')
+        if negated:
+            line = line[1:]
+        elif line.startswith('\\'):
+            line = line[1:]
+        dir_only = line.endswith('/')
+        line = line.rstrip('/')
+        if not line:
+            continue
+        # A slash anywhere but the end anchors the pattern to the file's directory
+        anchored = '/' in line
+        regex = re.compile(_glob_to_regex(line.lstrip('/')) + r'\Z', re.DOTALL)
+        rules.append((regex, negated, dir_only, anchored))
+    return rules
+
+def load_gitignore(directory: Path, base: str) -> Optional[IgnoreFile]:
+    try:
+        text = (directory / '.gitignore').read_text(encoding='utf-8', errors='replace')
+    except OSError:
+        return None
+    rules = parse_gitignore(text)
+    return (base, rules) if rules else None
+
+def is_ignored(ignore_files: List[IgnoreFile], rel_path: str, is_dir: bool) -> bool:
+    """Whether the last matching rule, from the outermost .gitignore inwards, ignores `rel_path`."""
+    ignored = False
+    name = rel_path.rsplit('/', 1)[-1]
+    for base, rules in ignore_files:
+        if not rel_path.startswith(base):
+            continue
+        local = rel_path[len(base):]
+        for regex, negated, dir_only, anchored in rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(local if anchored else name):
+                ignored = not negated
+    return ignored
+
+def walk_notebooks(root: Path, exclude_dirs: Collection[str], use_gitignore: bool = True) -> List[Path]:
+    """Return the sorted .ipynb paths under `root`, pruning excluded directories."""
+    notebooks = []
+    root_ignores = [] if not use_gitignore else [f for f in [load_gitignore(root, '')] if f]
+    stack: List[Tuple[str, str, List[IgnoreFile]]] = [(str(root), '', root_ignores)]
+    while stack:
+        directory, rel_dir, ignore_files = stack.pop()
+        try:
+            entries = os.scandir(directory)
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                name = entry.name
+                rel_path = rel_dir + name
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+                if is_dir:
+                    if name in exclude_dirs or name == '.ipynb_checkpoints':
+                        continue
+                    if ignore_files and is_ignored(ignore_files, rel_path, True):
+                        continue
+                    child_ignores = ignore_files
+                    if use_gitignore:
+                        local = load_gitignore(Path(entry.path), rel_path + '/')
+                        if local is not None:
+                            child_ignores = ignore_files + [local]
+                    stack.append((entry.path, rel_path + '/', child_ignores))
+                elif name.endswith('.ipynb') and entry.is_file():
+                    if ignore_files and is_ignored(ignore_files, rel_path, False):
+                        continue
+                    notebooks.append(Path(entry.path))
+    return sorted(notebooks)
+
+def git_notebooks(root: Path, exclude_dirs: Collection[str]) -> Optional[List[Path]]:
+    """Notebooks git knows about under `root` (tracked, or untracked and not ignored).
+
+    Returns None when `root` is not inside a git work tree or git is missing.
+    """
+    try:
+        result = subprocess.run(
+            ['git', 'ls-files', '-z', '--cached', '--others', '--exclude-standard', '--', '*.ipynb'],
+            cwd=root, capture_output=True, check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    notebooks = set()
+    for rel_path in os.fsdecode(result.stdout).split('\0'):
+        if not rel_path:
+            continue
+        parts = rel_path.split('/')
+        if any(part in exclude_dirs or part == '.ipynb_checkpoints' for part in parts[:-1]):
+            continue
+        path = root / rel_path
+        if path.is_file():  # deleted files stay in the index until committed
+            notebooks.add(path)
+    return sorted(notebooks)
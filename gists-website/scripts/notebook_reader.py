@@ -0,0 +1,209 @@
+"""
+Streaming reader for the text of Jupyter notebooks.
+
+Metadata extraction and search indexing only need each cell's type and
+source. nbformat.read() parses the whole file, including base64 image
+outputs that can run to megabytes, so this module scans the JSON
+incrementally instead and skips `outputs`, `attachments` and cell
+metadata without ever building them as Python objects.
+"""
+
+import json
+import re
+from pathlib import Path
+from typing import Dict, List, TextIO
+
+CHUNK_SIZE = 1 << 16
+
+# Next character that matters inside a container
+CONTAINER_SPECIAL_RE = re.compile(r'["\[\]{}]')
+SCALAR_RE = re.compile(r'[^\s,\]}]+')
+WHITESPACE_RE = re.compile(r'[ \t\r\n]*')
+
+class _JSONStream:
+    """Minimal pull parser over a text file, reading it in fixed-size chunks."""
+
+    def __init__(self, f: TextIO):
+        self.f = f
+        self.buf = ''
+        self.pos = 0
+
+    def _fill(self) -> bool:
+        """Append the next chunk to the buffer; False at end of file."""
+        chunk = self.f.read(CHUNK_SIZE)
+        if not chunk:
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Return the next non-whitespace character without consuming it."""
+        while True:
+            self.pos = WHITESPACE_RE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                raise ValueError('unexpected end of notebook JSON')
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise ValueError(f'expected {char!r} in notebook JSON')
+        self.pos += 1
+
+    def _scan_string(self, keep: bool) -> str:
+        """Consume a JSON string (opening quote already consumed).
+
+        Jumps between quote characters with str.find, so skipping a large
+        base64 payload costs little more than reading it from disk.
+        """
+        pieces = []
+        start = search_from = self.pos
+        while True:
+            quote = self.buf.find('"', search_from)
+            if quote == -1:
+                # Keep a trailing run of backslashes with the next chunk so
+                # escapes are always judged against complete runs
+                end = len(self.buf)
+                while end > start and self.buf[end - 1] == '\\':
+                    end -= 1
+                if keep:
+                    pieces.append(self.buf[start:end])
+                self.pos = end
+                if not self._fill():
+                    raise ValueError('unterminated string in notebook JSON')
+                start = search_from = 0
+                continue
+            backslashes = 0
+            while quote - backslashes > start and self.buf[quote - backslashes - 1] == '\\':
+                backslashes += 1
+            if backslashes % 2:
+                search_from = quote + 1  # escaped quote
+                continue
+            if keep:
+                pieces.append(self.buf[start:quote])
+            self.pos = quote + 1
+            return ''.join(pieces)
+
+    def read_string(self) -> str:
+        self.expect('"')
+        raw = self._scan_string(keep=True)
+        return json.loads('"' + raw + '"') if '\\' in raw else raw
+
+    def read_scalar(self):
+        """Consume and decode a number, true, false or null."""
+        self.peek()
+        match = SCALAR_RE.match(self.buf, self.pos)
+        while match is not None and match.end() == len(self.buf) and self._fill():
+            match = SCALAR_RE.match(self.buf, self.pos)
+        if match is None:
+            raise ValueError('expected a value in notebook JSON')
+        self.pos = match.end()
+        return json.loads(match.group())
+
+    def skip_value(self) -> None:
+        """Consume any JSON value without building it."""
+        char = self.peek()
+        if char == '"':
+            self.pos += 1
+            self._scan_string(keep=False)
+            return
+        if char not in '[{':
+            self.read_scalar()
+            return
+
+        depth = 0
+        while True:
+            match = CONTAINER_SPECIAL_RE.search(self.buf, self.pos)
+            if match is None:
+                self.pos = len(self.buf)
+                if not self._fill():
+                    raise ValueError('unterminated container in notebook JSON')
+                continue
+            self.pos = match.end()
+            token = match.group()
+            if token == '"':
+                self._scan_string(keep=False)
+            elif token in '[{':
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return
+
+    def iter_object_keys(self):
+        """Yield the keys of an object; the caller consumes each value."""
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.read_string()
+            self.expect(':')
+            yield key
+            if self.peek() == ',':
+                self.pos += 1
+                continue
+            self.expect('}')
+            return
+
+    def iter_array(self):
+        """Yield once per array element; the caller consumes each element."""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield
+            if self.peek() == ',':
+                self.pos += 1
+                continue
+            self.expect(']')
+            return
+
+def _read_source(stream: _JSONStream) -> str:
+    """Read a cell source, which nbformat allows as a string or list of strings."""
+    if stream.peek() == '"':
+        return stream.read_string()
+    return ''.join(stream.read_string() for _ in stream.iter_array())
+
+def _read_cells(f: TextIO) -> List[Dict[str, str]]:
+    stream = _JSONStream(f)
+    cells = None
+    version = None
+    for key in stream.iter_object_keys():
+        if key == 'cells':
+            cells = []
+            for _ in stream.iter_array():
+                cell = {'cell_type': '', 'source': ''}
+                for cell_key in stream.iter_object_keys():
+                    if cell_key == 'cell_type':
+                        cell['cell_type'] = stream.read_string()
+                    elif cell_key == 'source':
+                        cell['source'] = _read_source(stream)
+                    else:
+                        stream.skip_value()
+                cells.append(cell)
+        elif key == 'nbformat':
+            version = stream.read_scalar()
+        else:
+            stream.skip_value()
+    if cells is None or version != 4:
+        raise ValueError('not an nbformat v4 notebook')
+    return cells
+
+def read_notebook_cells(path: Path) -> List[Dict[str, str]]:
+    """Return [{'cell_type', 'source'}, ...] for a notebook without loading its outputs.
+
+    Falls back to nbformat (with conversion to v4) for older notebook
+    versions or JSON this reader does not understand.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return _read_cells(f)
+    except ValueError:
+        pass
+    import nbformat  # only needed for the fallback; it is slow to import
+    with open(path, 'r', encoding='utf-8') as f:
+        nb = nbformat.read(f, as_version=4)
+    return [{'cell_type': cell.cell_type, 'source': cell.source} for cell in nb.cells]
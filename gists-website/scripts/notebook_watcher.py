@@ -0,0 +1,148 @@
+"""
+Watch a directory tree for notebook changes, for convert-notebooks.py --watch.
+
+On Linux the kernel's inotify API is used directly through ctypes, so no
+extra package is needed and idle watching costs nothing. Elsewhere the tree
+is polled for changed modification times. Either way, changes are reported
+in batches: a batch is yielded once no new event has arrived for the
+debounce interval, so an editor's burst of writes and renames on save
+becomes one rebuild.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Set, Union
+
+# inotify event flags, from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, name length
+
+POLL_INTERVAL = 1.0
+
+class InotifyWatcher:
+    """Recursive inotify watch over a tree, skipping directories `skip_dir` rejects.
+
+    next_changes() returns changed notebook paths and directories that
+    appeared or disappeared as a whole (their contents need rescanning).
+    """
+
+    def __init__(self, root: Path, skip_dir: Callable[[str], bool]):
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.root = root
+        self.skip_dir = skip_dir
+        self.dirs: Dict[int, Path] = {}
+        self.watch_tree(root)
+
+    def watch_tree(self, top: Path) -> None:
+        for dirpath, dirnames, _ in os.walk(top):
+            dirnames[:] = [d for d in dirnames if not self.skip_dir(d)]
+            wd = self._add_watch(self.fd, os.fsencode(dirpath), WATCH_MASK)
+            if wd >= 0:
+                self.dirs[wd] = Path(dirpath)
+
+    def _read(self, changes: Set[Path]) -> None:
+        data = os.read(self.fd, 1 << 16)
+        pos = 0
+        while pos < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, pos)
+            pos += EVENT_HEADER.size
+            name = os.fsdecode(data[pos:pos + length].rstrip(b'\0'))
+            pos += length
+
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped; have the caller rescan everything
+                changes.add(self.root)
+                continue
+            if mask & IN_IGNORED:
+                self.dirs.pop(wd, None)
+                continue
+            parent = self.dirs.get(wd)
+            if parent is None or not name:
+                continue
+            path = parent / name
+            if mask & IN_ISDIR:
+                if self.skip_dir(name):
+                    continue
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    self.watch_tree(path)
+                changes.add(path)
+            elif name.endswith('.ipynb'):
+                changes.add(path)
+
+    def next_changes(self, debounce: float) -> Set[Path]:
+        """Block until something changes, then collect events until `debounce` seconds pass quietly."""
+        changes: Set[Path] = set()
+        timeout = None
+        while True:
+            ready, _, _ = select.select([self.fd], [], [], timeout)
+            if not ready:
+                if changes:
+                    return changes
+                continue
+            self._read(changes)
+            if changes:
+                timeout = debounce
+
+class PollingWatcher:
+    """Fallback watcher that compares notebook modification times every POLL_INTERVAL."""
+
+    def __init__(self, root: Path, find_notebooks: Callable[[Path], List[Path]]):
+        self.root = root
+        self.find_notebooks = find_notebooks
+        self.mtimes = self._scan()
+
+    def _scan(self) -> Dict[Path, int]:
+        mtimes = {}
+        for path in self.find_notebooks(self.root):
+            try:
+                mtimes[path] = path.stat().st_mtime_ns
+            except OSError:
+                pass
+        return mtimes
+
+    def next_changes(self, debounce: float) -> Set[Path]:
+        while True:
+            time.sleep(POLL_INTERVAL)
+            current = self._scan()
+            changes = {path for path in current.keys() | self.mtimes.keys()
+                       if current.get(path) != self.mtimes.get(path)}
+            self.mtimes = current
+            if changes:
+                return changes
+
+def watch_changes(root: Path, skip_dir: Callable[[str], bool],
+                  find_notebooks: Callable[[Path], List[Path]],
+                  debounce: float) -> Iterator[Set[Path]]:
+    """Yield batches of changed paths under `root` forever."""
+    watcher: Optional[Union[InotifyWatcher, PollingWatcher]] = None
+    if sys.platform.startswith('linux'):
+        try:
+            watcher = InotifyWatcher(root, skip_dir)
+        except (OSError, AttributeError) as e:
+            print(f"inotify unavailable ({e}); polling for changes instead")
+    if watcher is None:
+        watcher = PollingWatcher(root, find_notebooks)
+    while True:
+        yield watcher.next_changes(debounce)
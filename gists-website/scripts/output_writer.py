@@ -0,0 +1,100 @@
+"""
+Write-if-changed output layer for generated files.
+
+write_if_changed() leaves a file untouched, mtime included, when it already
+holds the new content, and otherwise replaces it atomically via a temporary
+file and rename, so readers never see a partial file. A ChangeList records
+which outputs were added, modified or deleted during a build. The list is
+saved as JSON, so incremental `next build` caching and CDN invalidation can
+be limited to what really changed.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Union
+
+ADDED = 'added'
+MODIFIED = 'modified'
+DELETED = 'deleted'
+
+# Permissions for new files; mkstemp alone would create them as 0600
+_umask = os.umask(0)
+os.umask(_umask)
+FILE_MODE = 0o666 & ~_umask
+
+def _file_digest(path: Path) -> bytes:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.digest()
+
+def write_if_changed(path: Path, data: Union[str, bytes]) -> Optional[str]:
+    """Atomically write `data` unless `path` already holds exactly it.
+
+    Returns ADDED or MODIFIED when the file was written, None when it was
+    already current.
+    """
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    try:
+        size = path.stat().st_size
+    except FileNotFoundError:
+        status = ADDED
+    else:
+        if size == len(data) and _file_digest(path) == hashlib.sha256(data).digest():
+            return None
+        status = MODIFIED
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp_path, FILE_MODE)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return status
+
+class ChangeList:
+    """Paths added, modified and deleted during a build."""
+
+    def __init__(self):
+        self.paths: Dict[str, Set[Path]] = {ADDED: set(), MODIFIED: set(), DELETED: set()}
+
+    def record(self, path: Path, status: Optional[str]) -> None:
+        """Note a write_if_changed() result (None means unchanged) or DELETED."""
+        if status is None:
+            return
+        if status == DELETED and path in self.paths[ADDED]:
+            self.paths[ADDED].discard(path)  # created and removed in the same build
+            return
+        if status == MODIFIED and path in self.paths[ADDED]:
+            return
+        if status == ADDED and path in self.paths[DELETED]:
+            status = MODIFIED  # removed and recreated: it existed before the build
+        for paths in self.paths.values():
+            paths.discard(path)
+        self.paths[status].add(path)
+
+    def __len__(self) -> int:
+        return sum(len(paths) for paths in self.paths.values())
+
+    def summary(self) -> str:
+        return ', '.join(f"{len(paths)} {status}" for status, paths in self.paths.items())
+
+    def to_dict(self, root: Path) -> Dict[str, List[str]]:
+        return {
+            status: sorted(path.relative_to(root).as_posix() for path in paths)
+            for status, paths in self.paths.items()
+        }
+
+    def save(self, path: Path, root: Path) -> None:
+        """Write the list as JSON with paths relative to `root`."""
+        write_if_changed(path, json.dumps(self.to_dict(root), indent=2) + '\n')
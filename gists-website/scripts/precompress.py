@@ -0,0 +1,63 @@
+"""
+Write precompressed .gz and .br siblings for static build artifacts, so
+the host can serve compressed bytes without compressing on each request.
+
+Brotli output needs the optional `brotli` package (pip install brotli);
+without it only gzip siblings are written. Output is deterministic: gzip
+headers carry no timestamp, so unchanged inputs give identical files.
+"""
+
+import gzip
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, List
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSED_SUFFIXES = ('.gz', '.br')
+
+def compressed_siblings(path: Path) -> List[Path]:
+    """All sibling paths a compressed copy of `path` may live at."""
+    return [path.with_name(path.name + suffix) for suffix in COMPRESSED_SUFFIXES]
+
+def is_compressed_sibling(path: Path) -> bool:
+    return path.suffix in COMPRESSED_SUFFIXES
+
+def is_stale(path: Path) -> bool:
+    """Whether any wanted sibling is missing or older than `path`."""
+    source_mtime = path.stat().st_mtime_ns
+    suffixes = COMPRESSED_SUFFIXES if brotli is not None else ('.gz',)
+    for suffix in suffixes:
+        sibling = path.with_name(path.name + suffix)
+        if not sibling.exists() or sibling.stat().st_mtime_ns < source_mtime:
+            return True
+    return False
+
+def _write(path: Path, data: bytes) -> None:
+    tmp_path = path.with_name(f'.{path.name}.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def compress_file(path: str) -> None:
+    """Write path.gz (and path.br when brotli is available) next to `path`."""
+    source = Path(path)
+    data = source.read_bytes()
+    _write(source.with_name(source.name + '.gz'), gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        _write(source.with_name(source.name + '.br'), brotli.compress(data, quality=11))
+
+def precompress(paths: Iterable[Path], jobs: int = 1) -> int:
+    """Compress the files whose siblings are out of date; returns how many were compressed."""
+    stale = [str(path) for path in paths if path.exists() and is_stale(path)]
+    if jobs <= 1 or len(stale) <= 1:
+        for path in stale:
+            compress_file(path)
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            list(executor.map(compress_file, stale, chunksize=8))
+    return len(stale)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Query the full-text notebook index (data/fulltext-index.bin) from the
+command line, or benchmark it. Build the index with convert-notebooks.py.
+
+    python3 scripts/search-notebooks.py knowledge graph embeddings
+    python3 scripts/search-notebooks.py '"random forest"' --limit 5
+    python3 scripts/search-notebooks.py --benchmark 500
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+from pathlib import Path
+
+from fulltext_index import FullTextIndex
+
+SCRIPT_DIR = Path(__file__).parent
+DATA_DIR = SCRIPT_DIR.parent / 'data'
+INDEX_FILE = DATA_DIR / 'fulltext-index.bin'
+METADATA_FILE = DATA_DIR / 'notebooks-metadata.json'
+
+def load_titles() -> dict:
+    if not METADATA_FILE.exists():
+        return {}
+    with open(METADATA_FILE, 'r', encoding='utf-8') as f:
+        return {entry['id']: entry['title'] for entry in json.load(f)}
+
+def benchmark(index: FullTextIndex, queries: int, seed: int) -> None:
+    """Time random one- to three-term queries drawn from the index vocabulary."""
+    rng = random.Random(seed)
+    vocabulary = sorted(index.terms)
+    samples = [' '.join(rng.sample(vocabulary, rng.randint(1, 3))) for _ in range(queries)]
+
+    timings = []
+    for query in samples:
+        start = time.perf_counter()
+        index.search(query)
+        timings.append(time.perf_counter() - start)
+
+    timings.sort()
+    print(f"Queries: {len(timings)}")
+    print(f"Median: {statistics.median(timings) * 1000:.3f} ms")
+    print(f"p95: {timings[int(len(timings) * 0.95) - 1] * 1000:.3f} ms")
+    print(f"Max: {timings[-1] * 1000:.3f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('query', nargs='*', help='Words to search for; quote a phrase to require it')
+    parser.add_argument('--index', type=Path, default=INDEX_FILE, help='Index file to read')
+    parser.add_argument('--limit', type=int, default=10, help='Number of results to show')
+    parser.add_argument('--benchmark', type=int, default=0, metavar='N',
+                        help='Time N random queries instead of searching')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for --benchmark')
+    args = parser.parse_args()
+
+    if not args.index.exists():
+        print(f"❌ Index not found: {args.index}")
+        print("Run convert-notebooks.py first.")
+        return
+
+    start = time.perf_counter()
+    index = FullTextIndex.load(args.index)
+    load_time = time.perf_counter() - start
+    print(f"Loaded {len(index.doc_ids)} notebooks, {len(index.terms)} terms "
+          f"({args.index.stat().st_size / 1024:.0f} KB) in {load_time * 1000:.1f} ms")
+
+    if args.benchmark:
+        benchmark(index, args.benchmark, args.seed)
+        return
+    if not args.query:
+        parser.error('give a query or --benchmark N')
+
+    query = ' '.join(args.query)
+    start = time.perf_counter()
+    results = index.search(query, limit=args.limit)
+    elapsed = time.perf_counter() - start
+
+    titles = load_titles()
+    print(f"\n{len(results)} results for {query!r} in {elapsed * 1000:.2f} ms\n")
+    for doc_id, score in results:
+        print(f"{score:7.3f}  {titles.get(doc_id, doc_id)}")
+        print(f"         {doc_id}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""
+Build the sharded search index the site's search bar loads lazily.
+
+Instead of one search-index.json holding every notebook, the index is
+written as:
+
+- manifest.json: document count, shard layout and which term shard holds
+  each term prefix
+- terms-<n>.json: inverted index {term: [doc, weight, doc, weight, ...]}
+  for a group of term prefixes
+- docs-<n>.json: result details (title, path, snippet) for a block of docs
+
+Postings cover each notebook's full text when it is passed in, so words
+far into a notebook are found without shipping its text to the browser.
+
+A query only fetches the manifest, the term shards for its words' prefixes
+and the doc shards of the results it shows, so the work before the first
+result stays roughly constant as the number of notebooks grows.
+
+The tokenizer must stay in sync with tokenize() in components/SearchBar.tsx.
+"""
+
+import json
+import re
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from output_writer import DELETED, ChangeList, write_if_changed
+
+INDEX_VERSION = 1
+
+# Terms are grouped into shards by their first PREFIX_LENGTH characters
+PREFIX_LENGTH = 2
+# Prefix groups are packed into one shard until it reaches about this size
+TARGET_SHARD_BYTES = 16 * 1024
+DOC_SHARD_SIZE = 32
+
+# How much an occurrence of a term counts in each field
+FIELD_WEIGHTS = {
+    'title': 5,
+    'headings': 3,
+    'tags': 2,
+    'content': 1,
+}
+# Occurrences counted per field, so long code cells don't swamp titles
+MAX_FIELD_COUNT = 10
+
+TOKEN_RE = re.compile(r'[^\W_]+')
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase and split on anything that is not a letter or digit."""
+    return TOKEN_RE.findall(text.lower())
+
+def term_prefix(term: str) -> str:
+    return term[:PREFIX_LENGTH]
+
+def document_fields(entry: Dict[str, Any], full_text: Optional[str] = None) -> Dict[str, str]:
+    """The searchable text of a metadata entry, by field."""
+    return {
+        'title': entry['title'],
+        'headings': ' '.join(h['text'] for h in entry['headings']),
+        'tags': ' '.join([entry['category'], entry['subcategory'], *entry['tags']]),
+        'content': full_text if full_text is not None else entry['content'],
+    }
+
+def build_postings(metadata: List[Dict[str, Any]],
+                   full_texts: Optional[Dict[str, str]] = None) -> Dict[str, List[int]]:
+    """Map each term to a flat [doc, weight, ...] list, docs in ascending order."""
+    full_texts = full_texts or {}
+    postings: Dict[str, List[int]] = defaultdict(list)
+    for doc, entry in enumerate(metadata):
+        weights: Dict[str, int] = defaultdict(int)
+        for field, text in document_fields(entry, full_texts.get(entry['id'])).items():
+            counts: Dict[str, int] = defaultdict(int)
+            for term in tokenize(text):
+                counts[term] += 1
+            for term, count in counts.items():
+                weights[term] += FIELD_WEIGHTS[field] * min(count, MAX_FIELD_COUNT)
+        for term, weight in weights.items():
+            postings[term].extend((doc, weight))
+    return postings
+
+def pack_term_shards(postings: Dict[str, List[int]]) -> List[Dict[str, List[int]]]:
+    """Group terms by prefix and pack whole prefix groups into shards."""
+    groups: Dict[str, Dict[str, List[int]]] = defaultdict(dict)
+    for term in sorted(postings):
+        groups[term_prefix(term)][term] = postings[term]
+
+    shards: List[Dict[str, List[int]]] = [{}]
+    size = 0
+    for prefix in sorted(groups):
+        group_size = len(json.dumps(groups[prefix], separators=(',', ':')))
+        if shards[-1] and size + group_size > TARGET_SHARD_BYTES:
+            shards.append({})
+            size = 0
+        shards[-1].update(groups[prefix])
+        size += group_size
+    return shards
+
+def write_json(path: Path, data: Any) -> Optional[str]:
+    # json.dumps uses the C encoder; json.dump to a file does not
+    return write_if_changed(path, json.dumps(data, ensure_ascii=False, separators=(',', ':')))
+
+def write_search_index(metadata: List[Dict[str, Any]], output_dir: Path,
+                       full_texts: Optional[Dict[str, str]] = None,
+                       changes: Optional[ChangeList] = None) -> int:
+    """Write the manifest and shards for `metadata`; returns the number of index files.
+
+    `full_texts` maps notebook ids to their complete text; entries without
+    one are indexed on their metadata snippet. Files whose content did not
+    change are left alone; the rest are noted in `changes`.
+    """
+    changes = changes if changes is not None else ChangeList()
+    output_dir.mkdir(parents=True, exist_ok=True)
+    term_shards = pack_term_shards(build_postings(metadata, full_texts))
+
+    written = set()
+    prefixes = {}
+    for n, shard in enumerate(term_shards):
+        name = f'terms-{n}.json'
+        changes.record(output_dir / name, write_json(output_dir / name, shard))
+        written.add(name)
+        for term in shard:
+            prefixes[term_prefix(term)] = n
+
+    doc_shards = 0
+    for start in range(0, len(metadata), DOC_SHARD_SIZE):
+        name = f'docs-{doc_shards}.json'
+        changes.record(output_dir / name, write_json(output_dir / name, [
+            {
+                'id': entry['id'],
+                'title': entry['title'],
+                'category': entry['category'],
+                'subcategory': entry['subcategory'],
+                'path': entry['path'],
+                'content': entry['content'],
+            }
+            for entry in metadata[start:start + DOC_SHARD_SIZE]
+        ]))
+        written.add(name)
+        doc_shards += 1
+
+    changes.record(output_dir / 'manifest.json', write_json(output_dir / 'manifest.json', {
+        'version': INDEX_VERSION,
+        'docCount': len(metadata),
+        'docShardSize': DOC_SHARD_SIZE,
+        'prefixLength': PREFIX_LENGTH,
+        'prefixes': dict(sorted(prefixes.items())),
+    }))
+    written.add('manifest.json')
+
+    # Drop shards left over from a larger index
+    for path in output_dir.glob('*.json'):
+        if path.name not in written:
+            path.unlink()
+            changes.record(path, DELETED)
+
+    return len(written)
@@ -0,0 +1,55 @@
+"""
+Tests for asset_extractor.py: images of outputs and of <img> tags in HTML
+outputs move to content-addressed files.
+
+    python -m pytest test_asset_extractor.py
+"""
+
+import base64
+import hashlib
+import tempfile
+import unittest
+from pathlib import Path
+
+from nbformat.v4 import new_code_cell, new_notebook, new_output
+
+from asset_extractor import ExtractAssetsPreprocessor
+
+PNG = b'\x89PNG\r\n\x1a\nnot really a png'
+PNG_NAME = f'{hashlib.sha256(PNG).hexdigest()}.png'
+
+class ExtractAssetsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.assets_dir = Path(self.tmp.name)
+        self.preprocessor = ExtractAssetsPreprocessor(assets_dir=str(self.assets_dir), assets_url='/assets')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_outputs(self, *outputs):
+        nb = new_notebook(cells=[new_code_cell('show()', outputs=list(outputs))])
+        nb, resources = self.preprocessor.preprocess(nb, {})
+        return nb.cells[0].outputs, resources
+
+    def test_image_output(self):
+        outputs, resources = self.run_outputs(
+            new_output('display_data', {'image/png': base64.b64encode(PNG).decode()}))
+        self.assertEqual(outputs[0].data['image/png'], '')
+        self.assertEqual(outputs[0].metadata['filenames']['image/png'], f'/assets/{PNG_NAME}')
+        self.assertEqual((self.assets_dir / PNG_NAME).read_bytes(), PNG)
+        self.assertEqual(resources['assets'], {PNG_NAME})
+
+    def test_html_output_images(self):
+        data_uri = 'data:image/png;base64,' + base64.b64encode(PNG).decode()
+        html = [f"<div><img src='{data_uri}'/>\n", f'<IMG class="logo" src="{data_uri}"></div>',
+                '<img src="data:image/png;base64,!!!">']
+        outputs, resources = self.run_outputs(new_output('execute_result', {'text/html': html}))
+        self.assertEqual(outputs[0].data['text/html'],
+                         f"<div><img src='/assets/{PNG_NAME}'/>\n<IMG class=\"logo\" src=\"/assets/{PNG_NAME}\"></div>"
+                         '<img src="data:image/png;base64,!!!">')
+        self.assertEqual(resources['assets'], {PNG_NAME})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+"""
+Tests for the search-index inputs of convert-notebooks.py: notebook texts
+kept in the build manifest and index rebuilds skipped when nothing changed.
+
+    python -m pytest test_convert_notebooks.py
+"""
+
+import importlib.util
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from output_writer import ChangeList
+
+SCRIPT_DIR = Path(__file__).parent
+
+def load_converter():
+    """Import convert-notebooks.py (its file name is not a valid module name)."""
+    spec = importlib.util.spec_from_file_location('convert_notebooks', SCRIPT_DIR / 'convert-notebooks.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def notebook(*sources: str) -> str:
+    cells = [{'cell_type': 'markdown', 'metadata': {}, 'source': source} for source in sources]
+    return json.dumps({'cells': cells, 'metadata': {}, 'nbformat': 4, 'nbformat_minor': 5})
+
+class SearchInputsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.converter = load_converter()
+        for name, value in [('NOTEBOOKS_SOURCE', root / 'gists'),
+                            ('SEARCH_INDEX_OUTPUT', root / 'public' / 'data' / 'search'),
+                            ('FULLTEXT_INDEX_FILE', root / 'data' / 'fulltext-index.bin')]:
+            patcher = mock.patch.object(self.converter, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.metadata_file = root / 'data' / 'notebooks-metadata.json'
+
+        self.manifest = {'notebooks': {}}
+        self.metadata = []
+        for doc_id, text in [('python/alpha', '# Alpha\n\nwalrus'), ('python/beta', '# Beta\n\npelican')]:
+            path = self.converter.NOTEBOOKS_SOURCE / f'{doc_id}.ipynb'
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(notebook(text))
+            rel_path = Path(f'{doc_id}.ipynb')
+            self.manifest['notebooks'][rel_path.as_posix()] = {'hash': self.converter.hash_file(path)}
+            self.metadata.append(self.converter.build_metadata(rel_path, self.converter.read_notebook_cells(path)))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def reads(self):
+        return mock.patch.object(self.converter, 'read_notebook_cells',
+                                 wraps=self.converter.read_notebook_cells)
+
+    def test_texts_kept_in_manifest(self):
+        texts = self.converter.read_full_texts(self.metadata, self.manifest['notebooks'])
+        self.assertIn('walrus', texts['python/alpha'])
+        self.assertEqual(self.manifest['notebooks']['python/beta.ipynb']['text'], texts['python/beta'])
+
+        # Only the entry without a stored text, e.g. an edited notebook, is read again
+        del self.manifest['notebooks']['python/beta.ipynb']['text']
+        with self.reads() as read:
+            self.assertEqual(self.converter.read_full_texts(self.metadata, self.manifest['notebooks']), texts)
+        self.assertEqual(read.call_count, 1)
+
+    def test_unchanged_indexes_not_rebuilt(self):
+        self.converter.save_metadata(self.metadata_file, self.metadata, ChangeList(), self.manifest)
+        self.assertTrue(self.converter.FULLTEXT_INDEX_FILE.exists())
+
+        changes = ChangeList()
+        with self.reads() as read, mock.patch.object(self.converter, 'build_fulltext_index') as build:
+            self.converter.save_metadata(self.metadata_file, self.metadata, changes, self.manifest)
+        self.assertEqual((read.call_count, build.call_count), (0, 0))
+        self.assertEqual(len(changes), 0)
+
+        # A changed source hash rebuilds them
+        self.manifest['notebooks']['python/alpha.ipynb']['hash'] = 'edited'
+        with mock.patch.object(self.converter, 'build_fulltext_index', return_value=b'') as build:
+            self.converter.save_metadata(self.metadata_file, self.metadata, ChangeList(), self.manifest)
+        self.assertEqual(build.call_count, 1)
+
+if __name__ == '__main__':
+    unittest.main()
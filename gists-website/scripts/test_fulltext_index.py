@@ -0,0 +1,66 @@
+"""
+Tests for fulltext_index.py: a write/read/search round trip through the
+binary file, stemming, phrases and BM25 order.
+
+    python -m pytest test_fulltext_index.py
+"""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from fulltext_index import FullTextIndex, analyze, build_fulltext_index, stem
+
+DOCUMENTS = [
+    ('python/sorting', 'Sorting algorithms: quick sort, merge sort and heap sort. Sorted lists sort fast.'),
+    ('ml/trees', 'Decision trees split the data. A random forest averages many decision trees.'),
+    ('ml/boosting', 'Gradient boosting adds trees one at a time; each tree fits the remaining error.'),
+    ('empty', ''),
+    ('unicode', 'Café naïve résumé ☃ 42 x_1'),
+]
+
+class FullTextIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / 'fulltext-index.bin'
+        self.path.write_bytes(build_fulltext_index(DOCUMENTS))
+        self.index = FullTextIndex.load(self.path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        self.assertEqual(self.index.doc_ids, [doc_id for doc_id, _ in DOCUMENTS])
+        self.assertEqual(self.index.doc_lengths, [len(analyze(text)) for _, text in DOCUMENTS])
+        sorting = self.index.doc_ids.index('python/sorting')
+        positions = [i for i, term in enumerate(analyze(DOCUMENTS[sorting][1])) if term == 'sort']
+        self.assertEqual(self.index.postings('sort'), [(sorting, positions)])
+        self.assertEqual(self.index.postings('missing'), [])
+        # Same input, same bytes, so unchanged notebooks leave the file alone
+        self.assertEqual(build_fulltext_index(DOCUMENTS), self.path.read_bytes())
+
+    def test_stemming(self):
+        self.assertEqual([stem(word) for word in ['sorting', 'sorted', 'sorts', 'trees', 'averages']],
+                         ['sort', 'sort', 'sort', 'tree', 'averag'])
+        self.assertEqual([doc for doc, _ in self.index.search('tree')], ['ml/trees', 'ml/boosting'])
+        self.assertEqual([doc for doc, _ in self.index.search('café')], ['unicode'])
+
+    def test_phrase(self):
+        self.assertEqual([doc for doc, _ in self.index.search('"decision trees"')], ['ml/trees'])
+        self.assertEqual(self.index.search('"trees decision"'), [])
+        self.assertEqual([doc for doc, _ in self.index.search('"random forest" boosting')], ['ml/trees'])
+
+    def test_ranking_and_limit(self):
+        results = self.index.search('sort trees', limit=None)
+        self.assertEqual({doc for doc, _ in results}, {'python/sorting', 'ml/trees', 'ml/boosting'})
+        scores = [score for _, score in results]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        self.assertEqual(len(self.index.search('sort trees', limit=1)), 1)
+
+    def test_not_an_index(self):
+        with self.assertRaises(ValueError):
+            FullTextIndex(b'PK\x03\x04')
+
+if __name__ == '__main__':
+    unittest.main()
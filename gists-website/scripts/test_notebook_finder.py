@@ -0,0 +1,78 @@
+"""
+Tests for notebook_finder.py: excluded directories and .gitignore rules
+(negation, directory-only, anchored, `**`) in nested .gitignore files.
+
+    python -m pytest test_notebook_finder.py
+"""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from notebook_finder import is_ignored, parse_gitignore, walk_notebooks
+
+class GitignoreRulesTest(unittest.TestCase):
+
+    def ignored(self, text: str, rel_path: str, is_dir: bool = False) -> bool:
+        return is_ignored([('', parse_gitignore(text))], rel_path, is_dir)
+
+    def test_negation(self):
+        rules = '*.ipynb\n!keep.ipynb\n'
+        self.assertTrue(self.ignored(rules, 'a/drop.ipynb'))
+        self.assertFalse(self.ignored(rules, 'a/keep.ipynb'))
+        # The last matching rule wins
+        self.assertTrue(self.ignored('!keep.ipynb\n*.ipynb\n', 'keep.ipynb'))
+
+    def test_directory_only(self):
+        self.assertTrue(self.ignored('build/\n', 'a/build', is_dir=True))
+        self.assertFalse(self.ignored('build/\n', 'a/build', is_dir=False))
+
+    def test_anchored(self):
+        self.assertTrue(self.ignored('/scratch\n', 'scratch', is_dir=True))
+        self.assertFalse(self.ignored('/scratch\n', 'a/scratch', is_dir=True))
+        self.assertTrue(self.ignored('docs/*.ipynb\n', 'docs/x.ipynb'))
+        self.assertFalse(self.ignored('docs/*.ipynb\n', 'a/docs/x.ipynb'))
+        # Unanchored patterns match the name at any depth
+        self.assertTrue(self.ignored('scratch\n', 'a/b/scratch', is_dir=True))
+
+    def test_globs(self):
+        self.assertTrue(self.ignored('**/tmp/*.ipynb\n', 'a/b/tmp/x.ipynb'))
+        self.assertTrue(self.ignored('**/tmp/*.ipynb\n', 'tmp/x.ipynb'))
+        self.assertTrue(self.ignored('draft?.ipynb\n', 'draft1.ipynb'))
+        self.assertTrue(self.ignored('v[0-9].ipynb\n', 'v3.ipynb'))
+        self.assertFalse(self.ignored('v[!0-9].ipynb\n', 'v3.ipynb'))
+        self.assertFalse(self.ignored('# comment\n\\#not.ipynb\n', 'comment'))
+        self.assertTrue(self.ignored('\\#not.ipynb\n', '#not.ipynb'))
+
+class WalkNotebooksTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        for rel_path in ['a.ipynb', 'sub/b.ipynb', 'sub/skip.ipynb', 'sub/keep/c.ipynb',
+                         'node_modules/pkg/d.ipynb', 'build/e.ipynb', 'sub/build/f.ipynb',
+                         'sub/.ipynb_checkpoints/b-checkpoint.ipynb', 'notes.txt']:
+            path = self.root / rel_path
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text('{}')
+        (self.root / '.gitignore').write_text('/build/\n*skip*\n')
+        # A nested .gitignore applies below its directory, after the outer rules
+        (self.root / 'sub' / '.gitignore').write_text('build/\n!skip.ipynb\n')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def found(self, **kwargs):
+        return [p.relative_to(self.root).as_posix()
+                for p in walk_notebooks(self.root, {'node_modules'}, **kwargs)]
+
+    def test_gitignore(self):
+        self.assertEqual(self.found(), ['a.ipynb', 'sub/b.ipynb', 'sub/keep/c.ipynb', 'sub/skip.ipynb'])
+
+    def test_without_gitignore(self):
+        self.assertEqual(self.found(use_gitignore=False),
+                         ['a.ipynb', 'build/e.ipynb', 'sub/b.ipynb', 'sub/build/f.ipynb',
+                          'sub/keep/c.ipynb', 'sub/skip.ipynb'])
+
+if __name__ == '__main__':
+    unittest.main()
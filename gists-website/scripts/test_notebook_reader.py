@@ -0,0 +1,82 @@
+"""
+Tests for notebook_reader.py: the streaming reader must return the same
+cells as nbformat.read, on hand-made edge cases and the repo's notebooks.
+
+    python -m pytest test_notebook_reader.py
+"""
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+import nbformat
+
+from notebook_finder import walk_notebooks
+from notebook_reader import read_notebook_cells
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+def nbformat_cells(path: Path):
+    with open(path, 'r', encoding='utf-8') as f:
+        nb = nbformat.read(f, as_version=4)
+    return [{'cell_type': cell.cell_type, 'source': cell.source} for cell in nb.cells]
+
+class NotebookReaderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, notebook) -> Path:
+        path = self.dir / 'test.ipynb'
+        path.write_text(notebook if isinstance(notebook, str) else json.dumps(notebook, indent=1),
+                        encoding='utf-8')
+        return path
+
+    def test_edge_cases(self):
+        path = self.write({
+            'nbformat': 4, 'nbformat_minor': 5, 'metadata': {'kernelspec': {'name': 'python3'}},
+            'cells': [
+                {'cell_type': 'markdown', 'metadata': {'tags': ['x]', '{y']}, 'id': 'a',
+                 'source': ['# Title "quoted" \\ back\n', 'café ☃ 😀\n', 'tab\there']},
+                {'cell_type': 'code', 'metadata': {}, 'id': 'b', 'execution_count': 1,
+                 'outputs': [{'output_type': 'stream', 'name': 'stdout', 'text': ['] } " [ {\n']},
+                             {'output_type': 'display_data', 'metadata': {},
+                              'data': {'image/png': 'iVBORw0KGgo=' * 1000, 'text/plain': ['<Figure>']}}],
+                 'source': 'print("]}")'},
+                {'cell_type': 'raw', 'metadata': {}, 'id': 'c', 'source': []},
+            ],
+        })
+        self.assertEqual(read_notebook_cells(path), nbformat_cells(path))
+
+    def test_cells_before_nbformat_and_compact_json(self):
+        path = self.write('{"cells":[{"source":"x = 1","cell_type":"code","outputs":[],'
+                          '"execution_count":null,"metadata":{},"id":"a"}],'
+                          '"metadata":{},"nbformat_minor":5,"nbformat":4}')
+        self.assertEqual(read_notebook_cells(path), [{'cell_type': 'code', 'source': 'x = 1'}])
+
+    def test_v3_falls_back_to_nbformat(self):
+        path = self.write({
+            'nbformat': 3, 'nbformat_minor': 0, 'metadata': {},
+            'worksheets': [{'cells': [{'cell_type': 'markdown', 'metadata': {}, 'source': ['# Old\n', 'text']}]}],
+        })
+        self.assertEqual(read_notebook_cells(path), [{'cell_type': 'markdown', 'source': '# Old\ntext'}])
+
+    def test_repo_notebooks_match_nbformat(self):
+        notebooks = walk_notebooks(REPO_ROOT, {'node_modules', '.git', 'gists-website'})
+        if not notebooks:
+            self.skipTest('no notebooks in this checkout')
+        for path in notebooks:
+            with self.subTest(notebook=str(path.relative_to(REPO_ROOT))):
+                try:
+                    expected = nbformat_cells(path)
+                except Exception:  # nbformat itself cannot read it
+                    continue
+                self.assertEqual(read_notebook_cells(path), expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+"""
+Tests for output_writer.py: write_if_changed leaves current files alone and
+ChangeList nets out the changes of a build.
+
+    python -m pytest test_output_writer.py
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from output_writer import ADDED, DELETED, MODIFIED, ChangeList, write_if_changed
+
+class WriteIfChangedTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_statuses(self):
+        path = self.dir / 'nested' / 'page.html'
+        self.assertEqual(write_if_changed(path, '<p>one</p>'), ADDED)
+        os.utime(path, (1_000_000, 1_000_000))
+        self.assertIsNone(write_if_changed(path, '<p>one</p>'))
+        self.assertIsNone(write_if_changed(path, b'<p>one</p>'))
+        self.assertEqual(path.stat().st_mtime, 1_000_000)  # untouched
+
+        self.assertEqual(write_if_changed(path, '<p>two</p>'), MODIFIED)
+        self.assertEqual(write_if_changed(path, '<p>two!</p>'), MODIFIED)  # same size differs too
+        self.assertEqual(path.read_text(), '<p>two!</p>')
+        self.assertEqual(sorted(p.name for p in path.parent.iterdir()), ['page.html'])  # no temp files left
+
+    @unittest.skipIf(os.name != 'posix', 'file modes are POSIX')
+    def test_mode_follows_umask(self):
+        path = self.dir / 'data.json'
+        write_if_changed(path, '{}')
+        umask = os.umask(0)
+        os.umask(umask)
+        self.assertEqual(path.stat().st_mode & 0o777, 0o666 & ~umask)
+
+class ChangeListTest(unittest.TestCase):
+
+    def test_net_changes(self):
+        root = Path('/site')
+        changes = ChangeList()
+        changes.record(root / 'kept.html', None)
+        changes.record(root / 'new.html', ADDED)
+        changes.record(root / 'new.html', MODIFIED)          # still just added
+        changes.record(root / 'temp.html', ADDED)
+        changes.record(root / 'temp.html', DELETED)          # never existed before the build
+        changes.record(root / 'moved.html', DELETED)
+        changes.record(root / 'moved.html', ADDED)           # existed before: modified
+        changes.record(root / 'edited.html', MODIFIED)
+        changes.record(root / 'gone.html', MODIFIED)
+        changes.record(root / 'gone.html', DELETED)
+
+        self.assertEqual(changes.to_dict(root), {
+            ADDED: ['new.html'],
+            MODIFIED: ['edited.html', 'moved.html'],
+            DELETED: ['gone.html'],
+        })
+        self.assertEqual(len(changes), 4)
+        self.assertEqual(changes.summary(), '1 added, 2 modified, 1 deleted')
+
+    def test_save(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            changes = ChangeList()
+            changes.record(root / 'notebooks' / 'a.html', ADDED)
+            changes.save(root / 'build-changes.json', root)
+            self.assertEqual(json.loads((root / 'build-changes.json').read_text()),
+                             {ADDED: ['notebooks/a.html'], MODIFIED: [], DELETED: []})
+
+if __name__ == '__main__':
+    unittest.main()
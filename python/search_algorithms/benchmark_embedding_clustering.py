@@ -0,0 +1,77 @@
+"""
+Time and peak memory of the embedding clustering methods at growing sizes.
+
+Each method runs in a forked child process, so its peak resident memory
+(ru_maxrss, minus what the child started with) is not mixed up with the
+other runs. Plain DBSCAN on all pairs, as knowledge_graph.py used to call
+it, is only run up to --brute-limit nodes.
+
+    python benchmark_embedding_clustering.py --sizes 10000 100000 1000000
+"""
+
+import argparse
+import multiprocessing
+import resource
+import time
+import warnings
+
+import numpy as np
+
+from benchmark_embedding_search import synthetic_embeddings
+from embedding_clustering import dbscan, hdbscan, minibatch_kmeans
+
+EPS = 0.3
+MIN_SAMPLES = 5
+MIN_CLUSTER_SIZE = 20
+
+def dbscan_all_pairs(vectors: np.ndarray) -> np.ndarray:
+    from sklearn.cluster import DBSCAN
+    return DBSCAN(eps=EPS, min_samples=MIN_SAMPLES, metric='cosine').fit_predict(vectors)
+
+def _run(func, vectors, results) -> None:
+    warnings.simplefilter('ignore')
+    base_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    labels = func(vectors)
+    seconds = time.perf_counter() - start
+    peak_mb = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - base_kb) / 1024
+    results.put((seconds, peak_mb, len(set(labels.tolist()) - {-1}), float(np.mean(labels == -1))))
+
+def measure(func, vectors):
+    """(seconds, peak MB, clusters, noise share) of func(vectors) in a forked child."""
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    process = context.Process(target=_run, args=(func, vectors, results))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--dim', type=int, default=64, help='Embedding dimensions')
+    parser.add_argument('--clusters', type=int, default=200, help='Clusters in the synthetic data')
+    parser.add_argument('--brute-limit', type=int, default=50_000,
+                        help='Largest size to run all-pairs DBSCAN at')
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        vectors = synthetic_embeddings(n, args.dim, args.clusters)
+        print(f"\n{n:,} nodes x {args.dim} dims ({vectors.nbytes / 2**20:.0f} MB of vectors)")
+        print(f"  {'method':<30} {'seconds':>9} {'peak MB':>9} {'clusters':>9} {'noise':>7}")
+        methods = {
+            'DBSCAN, all pairs (old)': dbscan_all_pairs if n <= args.brute_limit else None,
+            'DBSCAN, IVF neighbour graph': lambda v: dbscan(v, EPS, MIN_SAMPLES),
+            'HDBSCAN, IVF neighbour graph': lambda v: hdbscan(v, MIN_CLUSTER_SIZE),
+            'MiniBatchKMeans': lambda v: minibatch_kmeans(v, args.clusters),
+        }
+        for name, func in methods.items():
+            if func is None:
+                continue
+            seconds, peak_mb, clusters, noise = measure(func, vectors)
+            print(f"  {name:<30} {seconds:>9.2f} {peak_mb:>9.0f} {clusters:>9} {noise:>7.1%}")
+
+if __name__ == '__main__':
+    main()
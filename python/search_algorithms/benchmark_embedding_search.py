@@ -0,0 +1,78 @@
+"""
+Recall and latency of IVFIndex against the exact ExactIndex baseline.
+
+For each size, clustered synthetic embeddings stand in for node2vec output
+(nodes of a type are not clustered by type, so the type filter really
+removes candidates). Single queries are timed one at a time, as an
+interactive "most similar to X" lookup would run, and recall@k is the
+share of the exact top-k that the IVF index returns.
+
+    python benchmark_embedding_search.py --sizes 10000 100000 1000000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from benchmark_triple_loader import ENTITY_TYPES
+from embedding_search import ExactIndex, IVFIndex
+
+def synthetic_embeddings(n: int, dim: int, clusters: int = 200, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, n)]
+    vectors += 0.6 * rng.standard_normal((n, dim), dtype=np.float32)
+    return vectors
+
+def latency_ms(search, queries: np.ndarray) -> np.ndarray:
+    """Milliseconds per query, one query at a time; also returns the results."""
+    times, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(search(query)[0][0])
+        times.append((time.perf_counter() - start) * 1000)
+    return np.array(times), np.array(results)
+
+def recall(found: np.ndarray, truth: np.ndarray) -> float:
+    return float(np.mean([len(set(f) & set(t)) / len(t) for f, t in zip(found, truth)]))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--dim', type=int, default=64, help='Embedding dimensions')
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('-k', type=int, default=10)
+    parser.add_argument('--nprobe', type=int, nargs='+', default=[1, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        vectors = synthetic_embeddings(n, args.dim)
+        types = np.arange(n) % len(ENTITY_TYPES)
+        rng = np.random.default_rng(1)
+        queries = vectors[rng.choice(n, args.queries, replace=False)]
+        print(f"\n{n:,} nodes x {args.dim} dims")
+
+        start = time.perf_counter()
+        exact = ExactIndex(vectors)
+        ivf = IVFIndex(vectors)
+        print(f"  IVF build ({ivf.nlist} lists): {time.perf_counter() - start:.2f} s")
+
+        for label, mask in [('all nodes', None), (f"'{ENTITY_TYPES[0]}' only", types == 0)]:
+            times, truth = latency_ms(lambda q: exact.search(q, args.k, mask), queries)
+            print(f"  {label}:")
+            print(f"    {'exact':<12} p50 {np.median(times):>7.2f} ms  p99 {np.percentile(times, 99):>7.2f} ms"
+                  f"  recall@{args.k} 1.000")
+            for nprobe in args.nprobe:
+                times, found = latency_ms(lambda q: ivf.search(q, args.k, mask, nprobe), queries)
+                print(f"    {'nprobe ' + str(nprobe):<12} p50 {np.median(times):>7.2f} ms"
+                      f"  p99 {np.percentile(times, 99):>7.2f} ms  recall@{args.k} {recall(found, truth):.3f}")
+
+        start = time.perf_counter()
+        exact.search(queries, args.k)
+        print(f"  exact, all {args.queries} queries in one batch: "
+              f"{(time.perf_counter() - start) * 1000 / args.queries:.2f} ms/query")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""
+Benchmark graph layout and headless rendering: nx.spring_layout against graph_layout.
+
+A synthetic drug/gene/disease graph is built for each size. nx.spring_layout
+(Fruchterman-Reingold, all-pairs repulsion) is skipped above --spring-limit
+nodes. ForceAtlas2 is timed for --iterations iterations, then the graph is
+rendered to PNG and SVG with graph_render and the file sizes reported.
+
+    python benchmark_graph_layout.py --nodes 1000 10000 100000
+"""
+
+import argparse
+import tempfile
+from pathlib import Path
+
+from benchmark_triple_loader import synthetic_triples, timed
+from graph_layout import DEFAULT_ITERATIONS, forceatlas2
+from graph_render import render_graph
+from triple_loader import load_triples
+from triple_store import TripleStore
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--nodes', type=int, nargs='+', default=[1_000, 10_000],
+                        help='Approximate graph sizes in nodes')
+    parser.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS)
+    parser.add_argument('--spring-limit', type=int, default=10_000,
+                        help='Largest size to run nx.spring_layout at')
+    args = parser.parse_args()
+
+    for nodes in args.nodes:
+        store = TripleStore.from_triples(load_triples(synthetic_triples(nodes * 10)))
+        print(f"\n{store}")
+
+        if store.num_nodes <= args.spring_limit:
+            import networkx as nx
+            G = store.to_networkx(multigraph=False, use_names=False)
+            timed(f'nx.spring_layout ({args.iterations} iterations)',
+                  lambda: nx.spring_layout(G, iterations=args.iterations, seed=0))
+
+        positions = timed(f'ForceAtlas2 ({args.iterations} iterations)',
+                          lambda: forceatlas2(store, args.iterations))
+        with tempfile.TemporaryDirectory() as tmp:
+            for fmt in ('png', 'svg'):
+                path, = timed(f'render {fmt}',
+                              lambda: render_graph(store, positions, Path(tmp) / 'graph', [fmt]))
+                print(f"  -> {path.stat().st_size / 2**20:.1f} MB")
+
+if __name__ == '__main__':
+    main()
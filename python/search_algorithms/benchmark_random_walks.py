@@ -0,0 +1,58 @@
+"""
+Benchmark node2vec walk generation: the node2vec package against random_walks.
+
+A synthetic drug/gene/disease graph is built for each size. The node2vec
+package is timed for its transition-probability precomputation plus walk
+generation (it does both in the constructor) and skipped above
+--node2vec-limit nodes, where it takes minutes. random_walks is timed for
+building the CSR adjacency and generating one full pass of walks, without
+keeping them.
+
+    python benchmark_random_walks.py --nodes 1000 10000 100000 --num-walks 10
+"""
+
+import argparse
+
+import networkx as nx
+
+from benchmark_triple_loader import synthetic_triples, timed
+from random_walks import WalkCorpus, adjacency
+from triple_loader import load_triples
+from triple_store import TripleStore
+
+def count_walks(corpus: WalkCorpus) -> int:
+    return sum(len(chunk) for chunk in corpus.walk_chunks())
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--nodes', type=int, nargs='+', default=[1_000, 10_000],
+                        help='Approximate graph sizes in nodes')
+    parser.add_argument('--walk-length', type=int, default=30)
+    parser.add_argument('--num-walks', type=int, default=10, help='Walks per node')
+    parser.add_argument('-p', type=float, default=0.5, help='node2vec return parameter')
+    parser.add_argument('-q', type=float, default=2.0, help='node2vec in-out parameter')
+    parser.add_argument('--workers', type=int, default=None, help='Processes (default: all CPUs)')
+    parser.add_argument('--node2vec-limit', type=int, default=10_000,
+                        help='Largest size to run the node2vec package at')
+    args = parser.parse_args()
+
+    for nodes in args.nodes:
+        store = TripleStore.from_triples(load_triples(synthetic_triples(nodes * 10)))
+        print(f"\n{store}")
+
+        if nodes <= args.node2vec_limit:
+            from node2vec import Node2Vec
+            G = nx.Graph(store.to_networkx(use_names=False))
+            timed('node2vec package (probabilities + walks)',
+                  lambda: Node2Vec(G, walk_length=args.walk_length, num_walks=args.num_walks,
+                                   p=args.p, q=args.q, workers=args.workers or 1, quiet=True))
+
+        adj = timed('random_walks: CSR adjacency', lambda: adjacency(store))
+        with WalkCorpus(adj, args.walk_length, args.num_walks, args.p, args.q,
+                        workers=args.workers) as corpus:
+            walks = timed('random_walks: one pass of walks', lambda: count_walks(corpus))
+        print(f"  -> {walks:,} walks of up to {args.walk_length} nodes")
+
+if __name__ == '__main__':
+    main()
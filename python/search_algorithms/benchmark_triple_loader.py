@@ -0,0 +1,98 @@
+"""
+Benchmark knowledge-graph construction from (head, relation, tail) triples.
+
+For each size, synthetic drug/gene/disease triples are written to CSV and
+Parquet, then timed through each step of triple_loader and compared with
+the row-by-row `df.iterrows()` + `G.add_edge` loop knowledge_graph.py used
+to have. Building the CSR TripleStore is timed as well. The row loop and
+networkx are skipped above their size limits, where they take minutes or
+run out of memory.
+
+    python benchmark_triple_loader.py --sizes 100000 1000000 10000000
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+from triple_loader import intern_triples, read_triples, to_networkx
+from triple_store import TripleStore
+
+RELATIONS = ['treats', 'inhibits', 'associated', 'interacts', 'upregulates', 'causes']
+ENTITY_TYPES = ['drug', 'gene', 'disease']
+
+def synthetic_triples(n: int, seed: int = 0) -> pd.DataFrame:
+    """n triples over about n / 10 entities, with a skewed (Zipf-like) degree distribution."""
+    rng = np.random.default_rng(seed)
+    num_entities = max(n // 10, 10)
+
+    def entities(size: int) -> pd.Series:
+        ids = (rng.zipf(1.3, size) - 1) % num_entities
+        kinds = pd.Series(np.array(ENTITY_TYPES)[ids % len(ENTITY_TYPES)])
+        return kinds + pd.Series(ids).astype(str)
+
+    return pd.DataFrame({
+        'head': entities(n),
+        'relation': np.array(RELATIONS)[rng.integers(0, len(RELATIONS), n)],
+        'tail': entities(n),
+    })
+
+def build_with_iterrows(df: pd.DataFrame) -> nx.Graph:
+    """The original construction loop."""
+    G = nx.Graph()
+    for _, row in df.iterrows():
+        G.add_edge(row['head'], row['tail'], label=row['relation'])
+    return G
+
+def timed(label: str, func):
+    """Run func(), print how long it took under `label` and return its result; shared by the benchmarks."""
+    start = time.perf_counter()
+    result = func()
+    print(f"  {label:<40} {time.perf_counter() - start:>9.2f} s")
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000],
+                        help='Numbers of triples to benchmark')
+    parser.add_argument('--iterrows-limit', type=int, default=100_000,
+                        help='Largest size to time the iterrows loop at')
+    parser.add_argument('--networkx-limit', type=int, default=1_000_000,
+                        help='Largest size to build a networkx graph at')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            print(f"\n{n:,} triples")
+            df = synthetic_triples(n)
+            csv_path = Path(tmp) / 'triples.csv'
+            parquet_path = Path(tmp) / 'triples.parquet'
+            df.to_csv(csv_path, index=False)
+            df.to_parquet(parquet_path, index=False)
+
+            if n <= args.iterrows_limit:
+                timed('iterrows + add_edge (old)', lambda: build_with_iterrows(df))
+
+            timed('read CSV', lambda: read_triples(csv_path))
+            loaded = timed('read Parquet', lambda: read_triples(parquet_path))
+            triples = timed('intern names (factorize)', lambda: intern_triples(loaded))
+            id_bytes = triples.heads.nbytes + triples.relations.nbytes + triples.tails.nbytes
+            print(f"  -> {triples.num_nodes:,} nodes, {len(triples.relation_names)} relations, "
+                  f"{id_bytes / 2**20:.1f} MB of id arrays")
+            store = timed('TripleStore.from_triples (CSR)', lambda: TripleStore.from_triples(triples))
+            print(f"  -> {store}")
+            del store
+
+            if n <= args.networkx_limit:
+                G = timed('to_networkx (add_edges_from)', lambda: to_networkx(triples))
+                print(f"  -> {G.number_of_nodes():,} nodes, {G.number_of_edges():,} edges")
+                del G
+
+if __name__ == '__main__':
+    main()
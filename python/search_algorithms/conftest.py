@@ -0,0 +1,13 @@
+"""
+pytest setup for the tests in this directory.
+
+The modules import their siblings by bare name (from triple_store import
+...), which works when the scripts run from here. This directory is a
+package, so pytest puts its parent on sys.path instead; adding it back
+lets `python -m pytest` run from the repository root as well.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
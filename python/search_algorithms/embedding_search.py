@@ -0,0 +1,236 @@
+"""
+Similarity search over knowledge-graph node embeddings.
+
+Two indexes answer "which nodes are most similar to X" by cosine similarity:
+
+- ExactIndex scores every node with a batched matrix multiply (blocks of
+  rows at a time, so memory stays bounded) and keeps a running top-k. It
+  is the ground truth for the approximate index and fine up to a few
+  hundred thousand nodes.
+- IVFIndex (inverted file) clusters the vectors with spherical k-means
+  into `nlist` lists, and at query time scores only the vectors in the
+  `nprobe` lists whose centroids are closest to the query. Raising
+  `nprobe` trades latency for recall.
+
+Both accept a boolean mask to restrict results, e.g. to one entity type;
+type_mask() builds one from a name prefix ('drug', 'gene', 'disease').
+When the probed lists hold fewer than k allowed nodes, IVFIndex falls back
+to an exact search over the allowed nodes, so rare types still get k
+results. NodeSearch wraps an index with the node names of a TripleStore.
+
+    search = NodeSearch(store, IVFIndex(embeddings))
+    search.most_similar('drugA', k=10, prefix='drug')
+"""
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from triple_store import TripleStore
+
+EXACT_BLOCK_ROWS = 65_536    # node vectors scored per matrix multiply
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_PER_LIST = 32  # training vectors per list
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """float32 copy of `vectors` scaled to unit length (zero rows stay zero)."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+def type_mask(node_names, prefix: str) -> np.ndarray:
+    """Boolean mask of the nodes whose name starts with `prefix`."""
+    return pd.Series(np.asarray(list(node_names), dtype=object)).str.startswith(prefix).to_numpy(bool)
+
+def _top_k(scores: np.ndarray, ids: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """The k best (ids, scores) of each row of `scores`, best first."""
+    k = min(k, scores.shape[1])
+    part = np.argpartition(scores, -k, axis=1)[:, -k:] if k < scores.shape[1] \
+        else np.tile(np.arange(scores.shape[1]), (len(scores), 1))
+    part_scores = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-part_scores, axis=1, kind='stable')
+    best = np.take_along_axis(part, order, axis=1)
+    return np.take_along_axis(ids, best, axis=1) if ids.ndim == 2 else ids[best], \
+        np.take_along_axis(part_scores, order, axis=1)
+
+def _pad(ids: np.ndarray, scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Pad results with id -1 / score -inf up to k columns."""
+    missing = k - ids.shape[1]
+    if missing <= 0:
+        return ids, scores
+    return (np.pad(ids, ((0, 0), (0, missing)), constant_values=-1),
+            np.pad(scores, ((0, 0), (0, missing)), constant_values=-np.inf))
+
+def exact_search(vectors: np.ndarray, queries: np.ndarray, k: int,
+                 rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Top-k rows of `vectors` (all, or only `rows`) by dot product with each query.
+
+    Scores EXACT_BLOCK_ROWS vectors per matrix multiply and merges each
+    block into a running top-k. Returns (row numbers, scores), padded with
+    -1 / -inf when fewer than k rows are searched.
+    """
+    total = len(rows) if rows is not None else len(vectors)
+    best_ids = np.empty((len(queries), 0), dtype=np.int64)
+    best_scores = np.empty((len(queries), 0), dtype=np.float32)
+    for start in range(0, total, EXACT_BLOCK_ROWS):
+        if rows is not None:
+            ids = rows[start:start + EXACT_BLOCK_ROWS]
+            block = vectors[ids]
+        else:
+            ids = np.arange(start, min(start + EXACT_BLOCK_ROWS, total))
+            block = vectors[start:start + EXACT_BLOCK_ROWS]
+        scores = np.concatenate([best_scores, queries @ block.T], axis=1)
+        candidates = np.concatenate([best_ids, np.broadcast_to(ids, (len(queries), len(ids)))], axis=1)
+        best_ids, best_scores = _top_k(scores, candidates, k)
+    return _pad(best_ids, best_scores, k)
+
+class ExactIndex:
+    """Brute-force cosine search with blocked matrix multiplies."""
+
+    def __init__(self, embeddings: np.ndarray):
+        self.vectors = normalize(embeddings)
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def vector(self, node_id: int) -> np.ndarray:
+        return self.vectors[node_id]
+
+    def search(self, queries: np.ndarray, k: int = 10,
+               mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(ids, scores), each len(queries) x k, best first; padded with -1 when too few match."""
+        rows = np.flatnonzero(mask) if mask is not None else None
+        return exact_search(self.vectors, normalize(np.atleast_2d(queries)), k, rows)
+
+def nearest_centroid(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the most similar centroid for each vector, in blocks of rows."""
+    if not len(vectors):
+        return np.zeros(0, dtype=np.int64)
+    block_rows = max(1, EXACT_BLOCK_ROWS * 64 // max(len(centroids), 64))  # ~16 MB of scores per block
+    return np.concatenate([np.argmax(vectors[i:i + block_rows] @ centroids.T, axis=1)
+                           for i in range(0, len(vectors), block_rows)])
+
+def spherical_kmeans(vectors: np.ndarray, nlist: int, iterations: int = KMEANS_ITERATIONS,
+                     seed: int = 0) -> np.ndarray:
+    """Unit-length centroids of `nlist` clusters of unit vectors (trained on a sample)."""
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(vectors), nlist * KMEANS_SAMPLE_PER_LIST)
+    sample = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+    centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = nearest_centroid(sample, centroids)
+        # Per-cluster sums via one sort and np.add.reduceat (np.add.at is far slower)
+        order = np.argsort(assignment, kind='stable')
+        counts = np.bincount(assignment, minlength=nlist)
+        empty = counts == 0
+        sums = np.zeros_like(centroids)
+        starts = np.cumsum(counts) - counts
+        sums[~empty] = np.add.reduceat(sample[order], starts[~empty])
+        sums[empty] = sample[rng.choice(sample_size, empty.sum())]  # reseed empty clusters
+        centroids = normalize(sums)
+    return centroids
+
+class IVFIndex:
+    """Inverted-file index: vectors grouped by nearest centroid, stored list by list."""
+
+    def __init__(self, embeddings: np.ndarray, nlist: Optional[int] = None, nprobe: int = 16,
+                 seed: int = 0):
+        vectors = normalize(embeddings)
+        self.nlist = nlist or max(1, min(int(2 * np.sqrt(len(vectors))), len(vectors)))
+        self.nprobe = nprobe
+        self.centroids = spherical_kmeans(vectors, self.nlist, seed=seed)
+
+        assignment = nearest_centroid(vectors, self.centroids)
+        # CSR layout: ids[offsets[l]:offsets[l + 1]] are the nodes of list l
+        self.ids = np.argsort(assignment, kind='stable')
+        self.vectors = vectors[self.ids]
+        self.offsets = np.zeros(self.nlist + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignment, minlength=self.nlist), out=self.offsets[1:])
+        self.positions = np.empty_like(self.ids)  # node id -> row in self.vectors
+        self.positions[self.ids] = np.arange(len(self.ids))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def vector(self, node_id: int) -> np.ndarray:
+        return self.vectors[self.positions[node_id]]
+
+    def search(self, queries: np.ndarray, k: int = 10, mask: Optional[np.ndarray] = None,
+               nprobe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(ids, scores), each len(queries) x k, best first; see ExactIndex.search."""
+        queries = normalize(np.atleast_2d(queries))
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        probes = np.argpartition(-(queries @ self.centroids.T), nprobe - 1, axis=1)[:, :nprobe]
+        results_ids = np.full((len(queries), k), -1, dtype=np.int64)
+        results_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        short = []
+        for row, (query, lists) in enumerate(zip(queries, probes)):
+            positions = np.concatenate([np.arange(self.offsets[l], self.offsets[l + 1]) for l in lists])
+            if mask is not None:
+                positions = positions[mask[self.ids[positions]]]
+            if len(positions) < k:
+                short.append(row)
+                continue
+            scores = self.vectors[positions] @ query
+            ids, scores = _top_k(scores[None, :], self.ids[positions], k)
+            results_ids[row], results_scores[row] = ids[0], scores[0]
+
+        if short:  # too few allowed nodes in the probed lists: search them all
+            rows = self.positions[np.flatnonzero(mask)] if mask is not None else None
+            found, results_scores[short] = exact_search(self.vectors, queries[short], k, rows)
+            results_ids[short] = np.where(found >= 0, self.ids[found], -1)
+        return results_ids, results_scores
+
+    def knn_graph(self, k: int, nprobe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Approximate k nearest neighbours of every node (itself excluded), list by list.
+
+        All members of a list share their candidates (the lists nearest to
+        its centroid), so each list is one matrix multiply instead of a
+        search per node. Returns (ids, scores), each num_nodes x k.
+        """
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        near_lists = np.argpartition(-(self.centroids @ self.centroids.T), nprobe - 1, axis=1)[:, :nprobe]
+        graph_ids = np.full((len(self), k), -1, dtype=np.int32)
+        graph_scores = np.full((len(self), k), -np.inf, dtype=np.float32)
+        for l, lists in enumerate(near_lists):
+            # The list itself goes first, so member i of it is candidate column i
+            lists = np.concatenate([[l], lists[lists != l]])
+            candidates = np.concatenate([np.arange(self.offsets[c], self.offsets[c + 1]) for c in lists])
+            # Bound the score matrix to about EXACT_BLOCK_ROWS * 64 entries
+            block_rows = max(1, EXACT_BLOCK_ROWS * 64 // max(len(candidates), 1))
+            for start in range(self.offsets[l], self.offsets[l + 1], block_rows):
+                members = np.arange(start, min(start + block_rows, self.offsets[l + 1]))
+                scores = self.vectors[members] @ self.vectors[candidates].T
+                scores[np.arange(len(members)), members - self.offsets[l]] = -np.inf
+                positions, best = _top_k(scores, candidates, k)
+                # With k or fewer candidates the member itself (-inf) is among them
+                positions = np.where(np.isfinite(best), positions, -1)
+                positions, best = _pad(positions, best, k)
+                node_ids = self.ids[members]
+                graph_ids[node_ids] = np.where(positions >= 0, self.ids[positions], -1)
+                graph_scores[node_ids] = best
+        return graph_ids, graph_scores
+
+class NodeSearch:
+    """Similarity queries by node name over an ExactIndex or IVFIndex."""
+
+    def __init__(self, store: TripleStore, index):
+        self.store = store
+        self.index = index
+        self._type_masks = {}
+
+    def mask(self, prefix: Optional[str]) -> Optional[np.ndarray]:
+        if prefix is None:
+            return None
+        if prefix not in self._type_masks:
+            self._type_masks[prefix] = type_mask(self.store.node_names, prefix)
+        return self._type_masks[prefix]
+
+    def most_similar(self, node, k: int = 10, prefix: Optional[str] = None) -> List[Tuple[str, float]]:
+        """The k nodes most similar to `node` (itself excluded), optionally only names starting with `prefix`."""
+        node_id = self.store.node_id(node)
+        mask = self.mask(prefix)
+        ids, scores = self.index.search(self.index.vector(node_id), k + 1, mask)
+        return [(self.store.node_names[i], float(s)) for i, s in zip(ids[0], scores[0])
+                if i >= 0 and i != node_id][:k]
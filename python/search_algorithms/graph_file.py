@@ -0,0 +1,230 @@
+"""
+Memory-mapped on-disk format for a TripleStore, its node embeddings and its layout.
+
+A graph is a directory of flat binary files that are mapped with np.memmap
+when opened, so opening takes milliseconds whatever the graph size, and
+processes that open the same graph share one copy in the page cache
+instead of each loading a private one:
+
+    graph.json            header: version, counts, relation vocabulary, fingerprint
+    offsets.npy           int64 CSR offsets, num_nodes + 1 (see triple_store.py)
+    relations.npy         int16 / int32 edge relations
+    targets.npy           int32 edge targets
+    node_names.bin        UTF-8 node names, back to back
+    node_name_offsets.npy int64 start of each name in node_names.bin, num_nodes + 1
+    node_name_order.npy   int32 node ids sorted by name, for name lookup by binary search
+    embeddings.npy        float32 num_nodes x dim, row i is node i (optional)
+    layout.npy            float32 num_nodes x 2 drawing positions (optional)
+
+Files are replaced through a temporary file and a rename, so a process that
+has the old graph mapped keeps reading the old data. The header is written
+last, so a directory with a header is complete. save_graph() leaves an
+unchanged graph alone and drops the embeddings and layout when the graph
+changes, so those files always belong to the graph next to them.
+
+    save_graph(store, 'drug_gene.graph')
+    save_embeddings('drug_gene.graph', vectors)
+    store = open_graph('drug_gene.graph')          # in another process
+    vectors = open_embeddings('drug_gene.graph')
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+
+from triple_store import TripleStore
+
+FORMAT_VERSION = 2  # 2: rows per source node, with relations.npy
+HEADER_FILE = 'graph.json'
+OFFSETS_FILE = 'offsets.npy'
+RELATIONS_FILE = 'relations.npy'
+TARGETS_FILE = 'targets.npy'
+NAMES_FILE = 'node_names.bin'
+NAME_OFFSETS_FILE = 'node_name_offsets.npy'
+NAME_ORDER_FILE = 'node_name_order.npy'
+EMBEDDINGS_FILE = 'embeddings.npy'
+LAYOUT_FILE = 'layout.npy'
+NODE_ROW_FILES = (EMBEDDINGS_FILE, LAYOUT_FILE)  # one row per node id
+
+PathLike = Union[str, Path]
+
+class NodeTable:
+    """Node names stored in a memory-mapped UTF-8 blob, indexable like an array of str.
+
+    get_loc() finds a name's id by binary search over the sorted order, so
+    no name -> id dict has to be built when a graph is opened.
+    """
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray, order: np.ndarray):
+        self.blob = blob
+        self.offsets = offsets
+        self.order = order
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def _raw(self, i: int) -> bytes:
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes()
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            if key < 0:
+                key += len(self)
+            if not 0 <= key < len(self):
+                raise IndexError(key)
+            return self._raw(int(key)).decode('utf-8')
+        ids = np.arange(len(self))[key] if isinstance(key, slice) else np.asarray(key)
+        names = np.empty(ids.shape, dtype=object)
+        for index, i in np.ndenumerate(ids):
+            names[index] = self[i]
+        return names
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def get_loc(self, name: str) -> int:
+        """Id of the node called `name`; raises KeyError when there is none."""
+        target = name.encode('utf-8')
+        lo, hi = 0, len(self.order)
+        while lo < hi:  # UTF-8 byte order is code point order, as used when sorting
+            mid = (lo + hi) // 2
+            if self._raw(self.order[mid]) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self.order) and self._raw(self.order[lo]) == target:
+            return int(self.order[lo])
+        raise KeyError(name)
+
+def _replace_file(path: Path, write) -> None:
+    """Write via a temporary file in the same directory, then rename over `path`."""
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+def _save_array(path: Path, array: np.ndarray) -> None:
+    _replace_file(path, lambda f: np.save(f, np.ascontiguousarray(array)))
+
+def _load_array(path: Path) -> np.ndarray:
+    return np.load(path, mmap_mode='r')
+
+def _map_bytes(path: Path) -> np.ndarray:
+    if path.stat().st_size == 0:  # an empty file cannot be mapped
+        return np.zeros(0, dtype=np.uint8)
+    return np.memmap(path, dtype=np.uint8, mode='r')
+
+def _read_header(path: Path) -> Optional[dict]:
+    try:
+        return json.loads((path / HEADER_FILE).read_text(encoding='utf-8'))
+    except FileNotFoundError:
+        return None
+
+def _encode_names(names) -> tuple:
+    encoded = [str(name).encode('utf-8') for name in names]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(name) for name in encoded], out=offsets[1:])
+    order = np.array(sorted(range(len(encoded)), key=encoded.__getitem__), dtype=np.int32)
+    return b''.join(encoded), offsets, order
+
+def _fingerprint(store: TripleStore, names_blob: bytes, name_offsets: np.ndarray) -> str:
+    digest = hashlib.sha256()
+    digest.update(json.dumps([list(map(str, store.relation_names)), store.directed]).encode('utf-8'))
+    for data in (store.offsets, store.relations, store.targets, name_offsets):
+        digest.update(np.ascontiguousarray(data).data)
+    digest.update(names_blob)
+    return digest.hexdigest()
+
+def save_graph(store: TripleStore, path: PathLike) -> bool:
+    """Write `store` to the directory `path`; returns False when it already held this graph."""
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    names_blob, name_offsets, name_order = _encode_names(store.node_names)
+    fingerprint = _fingerprint(store, names_blob, name_offsets)
+    header = _read_header(path)
+    if header is not None and header.get('fingerprint') == fingerprint \
+            and header.get('version') == FORMAT_VERSION:
+        return False
+
+    # Embeddings and layout of the previous graph no longer line up with the node ids
+    for name in NODE_ROW_FILES:
+        if (path / name).exists():
+            (path / name).unlink()
+    _save_array(path / OFFSETS_FILE, store.offsets.astype(np.int64, copy=False))
+    _save_array(path / RELATIONS_FILE, store.relations)
+    _save_array(path / TARGETS_FILE, store.targets.astype(np.int32, copy=False))
+    _replace_file(path / NAMES_FILE, lambda f: f.write(names_blob))
+    _save_array(path / NAME_OFFSETS_FILE, name_offsets)
+    _save_array(path / NAME_ORDER_FILE, name_order)
+
+    header = {
+        'version': FORMAT_VERSION,
+        'num_nodes': store.num_nodes,
+        'num_relations': store.num_relations,
+        'num_edges': store.num_edges,
+        'directed': store.directed,
+        'relations': [str(name) for name in store.relation_names],
+        'fingerprint': fingerprint,
+    }
+    _replace_file(path / HEADER_FILE, lambda f: f.write(json.dumps(header, indent=2).encode('utf-8')))
+    return True
+
+def open_graph(path: PathLike) -> TripleStore:
+    """Map a saved graph read-only; nothing but the header is read up front."""
+    path = Path(path)
+    header = _read_header(path)
+    if header is None:
+        raise FileNotFoundError(f"No graph at {path} (missing {HEADER_FILE})")
+    if header['version'] != FORMAT_VERSION:
+        raise ValueError(f"{path}: unsupported graph format version {header['version']}")
+
+    node_table = NodeTable(_map_bytes(path / NAMES_FILE), _load_array(path / NAME_OFFSETS_FILE),
+                           _load_array(path / NAME_ORDER_FILE))
+    store = TripleStore(node_table, np.array(header['relations'], dtype=object),
+                        _load_array(path / OFFSETS_FILE), _load_array(path / RELATIONS_FILE),
+                        _load_array(path / TARGETS_FILE),
+                        directed=header['directed'], node_index=node_table)
+    if store.num_nodes != header['num_nodes'] or store.num_edges != header['num_edges']:
+        raise ValueError(f"{path}: arrays do not match the header")
+    return store
+
+def _save_node_rows(path: PathLike, name: str, rows: np.ndarray) -> None:
+    path = Path(path)
+    header = _read_header(path)
+    if header is None:
+        raise FileNotFoundError(f"No graph at {path}; save_graph() first")
+    if rows.ndim != 2 or len(rows) != header['num_nodes']:
+        raise ValueError(f"Expected {header['num_nodes']} rows for {name}, got shape {rows.shape}")
+    _save_array(path / name, rows.astype(np.float32, copy=False))
+
+def _open_node_rows(path: PathLike, name: str) -> Optional[np.ndarray]:
+    rows_path = Path(path) / name
+    if not rows_path.exists():
+        return None
+    return _load_array(rows_path)
+
+def save_embeddings(path: PathLike, embeddings: np.ndarray) -> None:
+    """Store one float32 row per node, in node id order, next to a saved graph."""
+    _save_node_rows(path, EMBEDDINGS_FILE, embeddings)
+
+def open_embeddings(path: PathLike) -> Optional[np.ndarray]:
+    """Map the embedding matrix read-only, or None when none has been saved."""
+    return _open_node_rows(path, EMBEDDINGS_FILE)
+
+def save_layout(path: PathLike, positions: np.ndarray) -> None:
+    """Store num_nodes x 2 drawing positions, in node id order, next to a saved graph."""
+    _save_node_rows(path, LAYOUT_FILE, positions)
+
+def open_layout(path: PathLike) -> Optional[np.ndarray]:
+    """Map the cached layout read-only, or None when none has been saved."""
+    return _open_node_rows(path, LAYOUT_FILE)
@@ -0,0 +1,232 @@
+"""
+ForceAtlas2 layout for large knowledge graphs, computed once and cached next to the graph.
+
+nx.spring_layout does all-pairs repulsion (O(N^2) per iteration) and
+knowledge_graph.py recomputed it on every run. Here one iteration costs
+O(N + E):
+
+- attraction is linear along the edges, gravity pulls every node towards
+  the origin and a node's mass is its degree + 1, as in ForceAtlas2
+  (Jacomy et al. 2014), so hubs push their neighbourhoods apart;
+- repulsion kr * m_i * m_j / d is approximated Barnes-Hut style on a
+  quadtree of grid levels. At every level a cell feels the cells that are
+  children of its parent's neighbours but not its own neighbours (the
+  well-separated ones) through their total mass at their centre of mass;
+  only nodes in adjacent leaf cells repel each other pair by pair. Cells
+  are runs of nodes sorted by Morton code, so every level is a reduceat
+  over the same order;
+- each node's step uses ForceAtlas2's adaptive speed (swing vs. traction),
+  so there is no cooling schedule to tune.
+
+cached_layout() reads the positions saved in a graph directory (see
+graph_file.py) and only computes and saves them when there are none;
+save_graph() drops them when the graph changes.
+
+    positions = cached_layout('drug_gene.graph')   # num_nodes x 2, row i is node i
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+from graph_file import PathLike, open_graph, open_layout, save_layout
+from random_walks import adjacency
+from triple_store import TripleStore
+
+DEFAULT_ITERATIONS = 100
+MAX_LEVELS = 16           # Morton codes interleave two 16-bit cell coordinates
+CELLS_PER_NODE = 1        # the finest grid has about this many cells per node
+PAIR_CHUNK = 1 << 21      # exact leaf-cell repulsion pairs computed at a time
+GRID_QUANTILE = 0.01      # share of nodes on each side left outside the grid's span
+MIN_DISTANCE2 = 1e-4      # floor on squared distances, for coincident nodes
+
+# _FAR_OK[parity, d + 3]: a cell with coordinate parity `parity` has the cell
+# d steps away as a child of one of its parent's neighbours (|d| <= 3)
+_FAR_OK = np.array([[-2 <= d <= 3 for d in range(-3, 4)],
+                    [-3 <= d <= 2 for d in range(-3, 4)]])
+_FAR_OFFSETS = [(dx, dy) for dx in range(-3, 4) for dy in range(-3, 4) if max(abs(dx), abs(dy)) > 1]
+_NEAR_OFFSETS = [(dx, dy) for dx in range(-1, 2) for dy in range(-1, 2)]
+
+def edge_pairs(store: TripleStore) -> Tuple[np.ndarray, np.ndarray]:
+    """Each connected pair of nodes once as (lo, hi) with lo < hi; relations, direction and loops dropped."""
+    adj = adjacency(store)
+    rows = np.repeat(np.arange(store.num_nodes, dtype=np.int64), np.diff(adj.indptr))
+    cols = adj.indices.astype(np.int64)
+    keys = np.sort(np.minimum(rows, cols) * store.num_nodes + np.maximum(rows, cols))
+    keys = keys[np.concatenate([[True], keys[1:] != keys[:-1]])]
+    lo, hi = np.divmod(keys, store.num_nodes)
+    loops = lo == hi
+    return lo[~loops], hi[~loops]
+
+def _spread_bits(v: np.ndarray) -> np.ndarray:
+    """Put bit k of each 16-bit value at bit 2k."""
+    v = (v | (v << 8)) & 0x00FF00FF
+    v = (v | (v << 4)) & 0x0F0F0F0F
+    v = (v | (v << 2)) & 0x33333333
+    return (v | (v << 1)) & 0x55555555
+
+def _morton(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    return (_spread_bits(x) << 1) | _spread_bits(y)
+
+def _grid_levels(n: int) -> int:
+    return int(np.clip(np.ceil(np.log(max(n, 1) * CELLS_PER_NODE) / np.log(4)), 2, MAX_LEVELS))
+
+def _cell_table(cell_codes: np.ndarray, side: int) -> np.ndarray:
+    """Index of each occupied cell by Morton code, -1 for empty cells."""
+    table = np.full(side * side, -1, dtype=np.int32)
+    table[cell_codes] = np.arange(len(cell_codes))
+    return table
+
+def _lookup(table: np.ndarray, x: np.ndarray, y: np.ndarray, side: int,
+            dx: int, dy: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(rows of x/y, cell index) for the occupied cells at (x + dx, y + dy)."""
+    nx_, ny_ = x + dx, y + dy
+    rows = np.flatnonzero((nx_ >= 0) & (nx_ < side) & (ny_ >= 0) & (ny_ < side))
+    found = table[_morton(nx_[rows], ny_[rows])]
+    hit = found >= 0
+    return rows[hit], found[hit]
+
+def repulsion_field(positions: np.ndarray, mass: np.ndarray) -> np.ndarray:
+    """Approximately sum_j m_j (p_i - p_j) / |p_i - p_j|^2 for every node i.
+
+    Multiplied by kr * m_i this is ForceAtlas2's repulsion on node i.
+    """
+    n = len(positions)
+    levels = _grid_levels(n)
+    side = 1 << levels
+    # The grid spans the central GRID_QUANTILE box; outliers go into the border
+    # cells, so a few far-flung nodes do not crowd everyone else into few cells
+    low, high = np.quantile(positions, [GRID_QUANTILE, 1 - GRID_QUANTILE], axis=0)
+    extent = float((high - low).max()) or 1.0
+    cells = np.clip(((positions - low) * (side / extent)).astype(np.int64), 0, side - 1)
+    codes = _morton(cells[:, 0], cells[:, 1])
+    order = np.argsort(codes, kind='stable')
+    codes, cells, pos, m = codes[order], cells[order], positions[order], mass[order]
+    weighted = pos * m[:, None]
+    field = np.zeros_like(pos)
+
+    for level in range(2, levels + 1):
+        shift = levels - level
+        level_codes = codes >> (2 * shift)
+        starts = np.flatnonzero(np.concatenate([[True], level_codes[1:] != level_codes[:-1]]))
+        cell_codes = level_codes[starts]
+        x, y = cells[starts, 0] >> shift, cells[starts, 1] >> shift
+        cell_mass = np.add.reduceat(m, starts)
+        centres = np.add.reduceat(weighted, starts) / cell_mass[:, None]
+        cell_field = np.zeros_like(centres)
+        table = _cell_table(cell_codes, 1 << level)
+        for dx, dy in _FAR_OFFSETS:
+            rows, found = _lookup(table, x, y, 1 << level, dx, dy)
+            keep = _FAR_OK[x[rows] & 1, dx + 3] & _FAR_OK[y[rows] & 1, dy + 3]
+            rows, found = rows[keep], found[keep]
+            diff = centres[rows] - centres[found]
+            distance2 = np.maximum(np.einsum('ij,ij->i', diff, diff), MIN_DISTANCE2)
+            cell_field[rows] += diff * (cell_mass[found] / distance2)[:, None]
+        field += np.repeat(cell_field, np.diff(np.append(starts, n)), axis=0)
+
+    # Finest level: exact pairs between the nodes of each leaf cell and its 8 neighbours
+    starts = np.flatnonzero(np.concatenate([[True], codes[1:] != codes[:-1]]))
+    counts = np.diff(np.append(starts, n))
+    node_cell = np.repeat(np.arange(len(starts)), counts)
+    x, y = cells[starts, 0], cells[starts, 1]
+    table = _cell_table(codes[starts], side)
+    nodes, neighbours = [], []
+    for dx, dy in _NEAR_OFFSETS:
+        rows, found = _lookup(table, x, y, side, dx, dy)
+        neighbour = np.full(len(starts), -1)
+        neighbour[rows] = found
+        of_node = neighbour[node_cell]
+        has = np.flatnonzero(of_node >= 0)
+        nodes.append(has)
+        neighbours.append(of_node[has])
+    nodes, neighbours = np.concatenate(nodes), np.concatenate(neighbours)
+    sizes = counts[neighbours]
+    ends = np.cumsum(sizes)
+    # Split the (node, neighbour cell) entries so each batch holds about PAIR_CHUNK pairs
+    bounds = np.concatenate([[0], np.searchsorted(ends, np.arange(PAIR_CHUNK, ends[-1], PAIR_CHUNK)),
+                             [len(nodes)]])
+    for a, b in zip(bounds[:-1], bounds[1:]):
+        if a == b:
+            continue
+        size = sizes[a:b]
+        first = ends[a:b] - size
+        i = np.repeat(nodes[a:b], size)
+        j = np.arange(first[0], ends[b - 1]) - np.repeat(first - starts[neighbours[a:b]], size)
+        diff = pos[i] - pos[j]
+        distance2 = np.maximum(np.einsum('ij,ij->i', diff, diff), MIN_DISTANCE2)
+        scale = m[j] / distance2
+        field[:, 0] += np.bincount(i, weights=diff[:, 0] * scale, minlength=n)
+        field[:, 1] += np.bincount(i, weights=diff[:, 1] * scale, minlength=n)
+
+    result = np.empty_like(field)
+    result[order] = field
+    return result
+
+def forceatlas2(store: TripleStore, iterations: int = DEFAULT_ITERATIONS,
+                scaling_ratio: Optional[float] = None,
+                gravity: float = 1.0, jitter_tolerance: float = 1.0,
+                initial: Optional[np.ndarray] = None, seed: int = 0) -> np.ndarray:
+    """ForceAtlas2 positions of every node of `store`, float32 num_nodes x 2 in node id order.
+
+    `initial` continues from earlier positions (e.g. a cached layout)
+    instead of random ones. scaling_ratio is the repulsion strength kr;
+    by default 10 below 100 nodes and 2 above, as in Gephi.
+    """
+    n = store.num_nodes
+    if n == 0:
+        return np.zeros((0, 2), dtype=np.float32)
+    if scaling_ratio is None:
+        scaling_ratio = 10.0 if n < 100 else 2.0
+    lo, hi = edge_pairs(store)
+    mass = np.bincount(lo, minlength=n) + np.bincount(hi, minlength=n) + 1.0
+    if initial is not None:
+        positions = np.array(initial, dtype=np.float64)
+    else:
+        positions = (np.random.default_rng(seed).random((n, 2)) - 0.5) * np.sqrt(n) * 10
+
+    speed, speed_efficiency = 1.0, 1.0
+    old_forces = np.zeros_like(positions)
+    for _ in range(iterations):
+        forces = scaling_ratio * mass[:, None] * repulsion_field(positions, mass)
+        pull = positions[lo] - positions[hi]
+        for axis in range(2):
+            forces[:, axis] += np.bincount(hi, weights=pull[:, axis], minlength=n) \
+                - np.bincount(lo, weights=pull[:, axis], minlength=n)
+        distance = np.maximum(np.linalg.norm(positions, axis=1), 1e-9)
+        forces -= positions * (gravity * mass / distance)[:, None]
+
+        # Adaptive speed, as in Gephi's ForceAtlas2
+        swinging = mass * np.linalg.norm(forces - old_forces, axis=1)
+        traction = mass * np.linalg.norm(forces + old_forces, axis=1) / 2
+        total_swinging, total_traction = swinging.sum(), traction.sum()
+        estimated_jitter = 0.05 * np.sqrt(n)
+        jitter = jitter_tolerance * max(np.sqrt(estimated_jitter),
+                                        min(10.0, estimated_jitter * total_traction / n ** 2))
+        if total_swinging / max(total_traction, 1e-12) > 2.0:
+            if speed_efficiency > 0.05:
+                speed_efficiency *= 0.5
+            jitter = max(jitter, jitter_tolerance)
+        target_speed = jitter * speed_efficiency * total_traction / max(total_swinging, 1e-12)
+        if total_swinging > jitter * total_traction:
+            if speed_efficiency > 0.05:
+                speed_efficiency *= 0.7
+        elif speed < 1000:
+            speed_efficiency *= 1.3
+        speed += min(target_speed - speed, 0.5 * speed)
+
+        positions += forces * (speed / (1.0 + np.sqrt(speed * swinging)))[:, None]
+        old_forces = forces
+    return positions.astype(np.float32)
+
+def cached_layout(path: PathLike, store: Optional[TripleStore] = None,
+                  iterations: int = DEFAULT_ITERATIONS, **kwargs) -> np.ndarray:
+    """Positions saved in the graph directory `path`, computed with forceatlas2() and saved first if missing.
+
+    `store` must be the graph saved at `path`; it is opened from there when
+    not given.
+    """
+    positions = open_layout(path)
+    if positions is None:
+        positions = forceatlas2(store if store is not None else open_graph(path), iterations, **kwargs)
+        save_layout(path, positions)
+    return positions
@@ -0,0 +1,177 @@
+"""
+Headless rendering of knowledge-graph drawings to PNG and SVG files.
+
+knowledge_graph.py drew with nx.draw and called plt.show() for every
+figure, which needs a display and blocks until the window is closed.
+Figures here are drawn on a bare matplotlib Figure with the Agg canvas (no
+pyplot state, no GUI), so they render on servers and in batch jobs:
+
+- all edges are one LineCollection and all nodes one scatter, instead of
+  an artist per edge;
+- node and edge labels are only drawn up to LABEL_LIMIT nodes, where they
+  can still be read;
+- above RASTERIZE_ABOVE nodes the edge and node layers are rasterized
+  inside SVG files, so a large graph stays a small SVG with vector text;
+- above LABEL_LIMIT nodes the view is fitted to the largest connected
+  component: ForceAtlas2 pushes small components far away from a giant
+  one, and fitting them too would shrink the giant one to a dot.
+
+Positions come from graph_layout.cached_layout(), so the layout is
+computed once per graph and every later render only draws. Run as a
+script to render a saved graph (see graph_file.py):
+
+    python graph_render.py knowledge_graph.graph --out figures --formats png svg
+"""
+
+import argparse
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import matplotlib
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+
+from graph_file import PathLike, open_embeddings, open_graph, open_layout, save_layout
+from graph_layout import DEFAULT_ITERATIONS, cached_layout, edge_pairs, forceatlas2
+from triple_store import TripleStore
+
+DEFAULT_FORMATS = ('png', 'svg')
+LABEL_LIMIT = 200         # most nodes drawn with name labels
+RASTERIZE_ABOVE = 5_000   # nodes above which SVG edge/node layers are bitmaps
+NON_INTERACTIVE_BACKENDS = {'agg', 'cairo', 'pdf', 'pgf', 'ps', 'svg', 'template'}
+
+def _largest_component(n: int, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    """Boolean mask of the nodes in the largest connected component."""
+    import scipy.sparse as sp
+    from scipy.sparse.csgraph import connected_components
+
+    graph = sp.csr_matrix((np.ones(len(lo), dtype=np.int8), (lo, hi)), shape=(n, n))
+    _, component = connected_components(graph, directed=False)
+    return component == np.argmax(np.bincount(component))
+
+def draw_graph(ax, store: TripleStore, positions: np.ndarray, node_color=None,
+               node_size: Optional[float] = None, labels: Optional[bool] = None,
+               edge_labels: bool = False, cmap='Set1') -> None:
+    """Draw every node of `store` at `positions` (row i is node i) on a matplotlib Axes.
+
+    labels=None draws node names only up to LABEL_LIMIT nodes; edge_labels
+    writes the relation on each edge (small graphs only). node_color is one
+    colour or one value per node (mapped through `cmap`).
+    """
+    positions = np.asarray(positions)
+    n = store.num_nodes
+    rasterized = n > RASTERIZE_ABOVE
+    lo, hi = edge_pairs(store)
+    if node_size is None:
+        node_size = float(np.clip(30_000 / max(n, 1), 1, 300))
+    width = 1.0 if n <= LABEL_LIMIT else 0.2
+
+    ax.add_collection(LineCollection(np.stack([positions[lo], positions[hi]], axis=1),
+                                     colors='gray', linewidths=width, alpha=0.6,
+                                     zorder=1, rasterized=rasterized))
+    if node_color is None:
+        node_color = 'lightblue'
+    by_value = np.ndim(node_color) == 1 and len(node_color) == n and not isinstance(node_color[0], str)
+    ax.scatter(positions[:, 0], positions[:, 1], s=node_size, c=node_color,
+               cmap=cmap if by_value else None, alpha=0.8, linewidths=0, zorder=2,
+               rasterized=rasterized)
+    if labels if labels is not None else n <= LABEL_LIMIT:
+        for name, (x, y) in zip(store.node_names[np.arange(n)], positions):
+            ax.text(x, y, name, fontsize=10 if n <= 50 else 6, ha='center', va='center', zorder=3)
+    if edge_labels and n <= LABEL_LIMIT:
+        graph = store.to_networkx(multigraph=False, use_names=False)
+        for u, v, label in graph.edges(data='label'):
+            x, y = positions[u] * 0.7 + positions[v] * 0.3  # nearer the source, like label_pos=0.3
+            ax.text(x, y, label, fontsize=8, color='dimgray', ha='center', va='center', zorder=3)
+    if n > LABEL_LIMIT:
+        giant = _largest_component(n, lo, hi)
+        low, high = positions[giant].min(axis=0), positions[giant].max(axis=0)
+        margin = (high - low) * 0.05
+        ax.set_xlim(low[0] - margin[0], high[0] + margin[0])
+        ax.set_ylim(low[1] - margin[1], high[1] + margin[1])
+    else:
+        ax.autoscale()
+    ax.set_aspect('equal', adjustable='box')
+    ax.set_axis_off()
+
+def new_figure(figsize=(12, 10), dpi: int = 100) -> Figure:
+    """A Figure on the Agg canvas, independent of pyplot and of any display."""
+    fig = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(fig)
+    return fig
+
+def save_figure(fig, stem: PathLike, formats: Sequence[str] = DEFAULT_FORMATS) -> List[Path]:
+    """Write `fig` to stem.<format> for each format; returns the paths written."""
+    stem = Path(stem)
+    stem.parent.mkdir(parents=True, exist_ok=True)
+    paths = [stem.with_name(f'{stem.name}.{fmt}') for fmt in formats]
+    for path in paths:
+        fig.savefig(path, bbox_inches='tight')
+    return paths
+
+def show_or_save(fig, stem: PathLike, formats: Sequence[str] = DEFAULT_FORMATS) -> List[Path]:
+    """Save a pyplot figure, then show it only when the backend can open a window.
+
+    On a headless machine matplotlib picks the Agg backend, so scripts that
+    end figures with this instead of plt.show() run unattended.
+    """
+    import matplotlib.pyplot as plt
+
+    paths = save_figure(fig, stem, formats)
+    if matplotlib.get_backend().lower() in NON_INTERACTIVE_BACKENDS:
+        plt.close(fig)
+    else:
+        plt.show()
+    return paths
+
+def render_graph(store: TripleStore, positions: np.ndarray, stem: PathLike,
+                 formats: Sequence[str] = DEFAULT_FORMATS, title: Optional[str] = None,
+                 figsize=(12, 10), dpi: int = 100, **draw_kwargs) -> List[Path]:
+    """Draw the graph headlessly and write it to stem.<format>; see draw_graph for draw_kwargs."""
+    fig = new_figure(figsize, dpi)
+    ax = fig.add_subplot()
+    draw_graph(ax, store, positions, **draw_kwargs)
+    if title:
+        ax.set_title(title)
+    return save_figure(fig, stem, formats)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('graph', help='Graph directory written by graph_file.save_graph')
+    parser.add_argument('--out', default='figures', help='Output directory')
+    parser.add_argument('--formats', nargs='+', default=list(DEFAULT_FORMATS))
+    parser.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS,
+                        help='ForceAtlas2 iterations when the layout is computed')
+    parser.add_argument('--relayout', action='store_true',
+                        help='Recompute the layout, continuing from the cached one if any')
+    parser.add_argument('--clusters', action='store_true',
+                        help='Colour nodes by DBSCAN clusters of the saved embeddings')
+    parser.add_argument('--dpi', type=int, default=100)
+    args = parser.parse_args()
+
+    store = open_graph(args.graph)
+    if args.relayout:
+        positions = forceatlas2(store, args.iterations, initial=open_layout(args.graph))
+        save_layout(args.graph, positions)
+    else:
+        positions = cached_layout(args.graph, store, args.iterations)
+
+    out = Path(args.out)
+    name = Path(args.graph).name.split('.')[0]
+    written = render_graph(store, positions, out / name, args.formats, title=name, dpi=args.dpi)
+    if args.clusters:
+        embeddings = open_embeddings(args.graph)
+        if embeddings is None:
+            parser.error(f'{args.graph} has no saved embeddings')
+        from embedding_clustering import dbscan
+        written += render_graph(store, positions, out / f'{name}_clusters', args.formats,
+                                title=f'{name}: DBSCAN clusters', dpi=args.dpi,
+                                node_color=dbscan(embeddings))
+    for path in written:
+        print(path)
+
+if __name__ == '__main__':
+    main()
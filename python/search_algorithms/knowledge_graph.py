@@ -1,7 +1,19 @@
+from pathlib import Path
+
 import pandas as pd
-import networkx as nx
 import matplotlib.pyplot as plt
 
+from graph_file import open_embeddings, save_embeddings, save_graph
+from graph_layout import cached_layout
+from graph_render import draw_graph, show_or_save
+from triple_loader import load_triples
+from triple_store import TripleStore
+
+# Graph, embeddings and layout are kept here between runs (memory-mapped, see graph_file.py)
+GRAPH_DIR = Path(__file__).with_name('knowledge_graph.graph')
+# Every figure is saved here as PNG and SVG; it is only shown when a display is available
+FIGURE_DIR = Path(__file__).with_name('knowledge_graph_figures')
+
 
 # Define the heads, relations, and tails
 head = ['drugA', 'drugB', 'drugC', 'drugD', 'drugA', 'drugC', 'drugD', 'drugE', 'gene1', 'gene2','gene3', 'gene4', 'gene50', 'gene2', 'gene3', 'gene4']
@@ -12,19 +24,26 @@ tail = ['fever', 'hepatitis', 'bleeding', 'pain', 'gene1', 'gene2', 'gene4', 'ge
 df = pd.DataFrame({'head': head, 'relation': relation, 'tail': tail})
 print(df)
 
-# Create a knowledge graph
-G = nx.Graph()
-for _, row in df.iterrows():
-    G.add_edge(row['head'], row['tail'], label=row['relation'])
-
-# Visualize the knowledge graph
-pos = nx.spring_layout(G, seed=42, k=0.9)
-labels = nx.get_edge_attributes(G, 'label')
-plt.figure(figsize=(12, 10))
-nx.draw(G, pos, with_labels=True, font_size=10, node_size=700, node_color='lightblue', edge_color='gray', alpha=0.6)
-nx.draw_networkx_edge_labels(G, pos, edge_labels=labels, font_size=8, label_pos=0.3, verticalalignment='baseline')
-plt.title('Knowledge Graph')
-plt.show()
+# Create a knowledge graph in bulk (names are interned to integer ids first).
+# For large graphs pass a CSV or Parquet path to load_triples instead of a DataFrame.
+triples = load_triples(df)
+store = TripleStore.from_triples(triples)  # compact CSR arrays, keeps every relation
+print(store)
+print('drugA neighbours:', store.node_names[store.neighbors('drugA')].tolist())
+# A no-op when the graph is unchanged; a changed graph drops the saved embeddings and layout
+save_graph(store, GRAPH_DIR)
+
+# networkx copy for drawing and node2vec; use store.to_networkx(nodes) for subgraphs of big graphs
+G = store.to_networkx(multigraph=False)
+
+# Visualize the knowledge graph. The ForceAtlas2 layout is computed on the first run and
+# cached with the graph (row i is node i); `python graph_render.py knowledge_graph.graph`
+# renders big graphs in batch without pyplot.
+positions = cached_layout(GRAPH_DIR, store)
+fig, ax = plt.subplots(figsize=(12, 10))
+draw_graph(ax, store, positions, node_size=700, edge_labels=True)
+ax.set_title('Knowledge Graph')
+show_or_save(fig, FIGURE_DIR / 'knowledge_graph')
 
 # Calculate the number of nodes and edges
 num_nodes = G.number_of_nodes()
@@ -35,21 +54,30 @@ print(f'Ratio edges to nodes: {round(num_edges / num_nodes, 2)}')
 
 #create embedding
 
-from node2vec import Node2Vec
+# Embeddings saved by an earlier run for this same graph (row i is node i, same order as G.nodes())
+embeddings = open_embeddings(GRAPH_DIR)
+if embeddings is None:
+    from random_walks import train_embeddings
 
-# Generate node embeddings using node2vec
-node2vec = Node2Vec(G, dimensions=64, walk_length=30, num_walks=200, workers=4) # You can adjust these parameters
-model = node2vec.fit(window=10, min_count=1, batch_words=4) # Training the model
+    # Generate node2vec embeddings: vectorised p/q walks on CSR arrays, streamed into Word2Vec.
+    # workers > 1 starts a process pool, which needs this script's body under
+    # `if __name__ == '__main__':` on Windows and macOS.
+    embeddings = train_embeddings(store, dimensions=64, walk_length=30, num_walks=200, window=10,
+                                  workers=1, batch_words=4) # You can adjust these parameters
+    save_embeddings(GRAPH_DIR, embeddings)
+
+# Similarity search over the embeddings (IVFIndex instead of ExactIndex for large graphs)
+from embedding_search import ExactIndex, NodeSearch
+
+search = NodeSearch(store, ExactIndex(embeddings))
+print('Most similar to drugA:', search.most_similar('drugA', k=5))
+print('Most similar drugs to drugA:', search.most_similar('drugA', k=3, prefix='drug'))
 
 # Visualize node embeddings using t-SNE
 from sklearn.manifold import TSNE
-import numpy as np
-
-# Get embeddings for all nodes
-embeddings = np.array([model.wv[node] for node in G.nodes()])
 
 # Reduce dimensionality using t-SNE
-tsne = TSNE(n_components=2, perplexity=10, n_iter=400)
+tsne = TSNE(n_components=2, perplexity=10, max_iter=400)
 embeddings_2d = tsne.fit_transform(embeddings)
 
 # Visualize embeddings in 2D space with node labels
@@ -59,20 +87,21 @@ plt.scatter(embeddings_2d[:, 0], embeddings_2d[:, 1], c='blue', alpha=0.7)
 # Add node labels
 for i, node in enumerate(G.nodes()):
     plt.text(embeddings_2d[i, 0], embeddings_2d[i, 1], node, fontsize=8)
-    plt.title('Node Embeddings Visualization')
-    plt.show()
+plt.title('Node Embeddings Visualization')
+show_or_save(plt.gcf(), FIGURE_DIR / 'node_embeddings')
 
 
 # apply clustering
 
-from sklearn.cluster import DBSCAN
+from embedding_clustering import dbscan
 
-# Perform DBSCAN clustering on node embeddings
-dbscan = DBSCAN(eps=1.0, min_samples=2) # Adjust eps and min_samples
-cluster_labels = dbscan.fit_predict(embeddings)
+# Perform DBSCAN clustering on node embeddings (Euclidean eps like sklearn's DBSCAN; neighbourhoods
+# come from a sparse neighbour graph, see embedding_clustering for metric='cosine' with the IVF graph,
+# hdbscan and minibatch_kmeans on large graphs)
+cluster_labels = dbscan(embeddings, eps=1.0, min_samples=2, metric='euclidean', neighbors='kd_tree') # Adjust eps and min_samples
 
 # Visualize clusters
-plt.figure(figsize=(12, 10))
-nx.draw(G, pos, with_labels=True, font_size=10, node_size=700, node_color=cluster_labels, cmap=plt.cm.Set1, edge_color='gray', alpha=0.6)
-plt.title('Graph Clustering using DBSCAN')
-plt.show()
\ No newline at end of file
+fig, ax = plt.subplots(figsize=(12, 10))
+draw_graph(ax, store, positions, node_size=700, node_color=cluster_labels, cmap=plt.cm.Set1)
+ax.set_title('Graph Clustering using DBSCAN')
+show_or_save(fig, FIGURE_DIR / 'clusters')
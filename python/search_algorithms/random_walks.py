@@ -0,0 +1,211 @@
+"""
+Parallel node2vec random walks on integer CSR adjacency, streamed into Word2Vec.
+
+The node2vec package precomputes a transition-probability table for every
+edge in Python dicts (memory grows with the sum of squared degrees) and
+builds the whole walk corpus as lists of strings before gensim starts.
+Here a walk step is computed for a whole batch of walkers at once with
+NumPy:
+
+- the next node is proposed uniformly from the current node's CSR row;
+- the p/q bias is applied by rejection: the proposal x after the step
+  t -> v is kept with probability w / max(w), where w is 1/p if x == t,
+  1 if x is a neighbour of t and 1/q otherwise. This samples exactly the
+  node2vec transition distribution without per-edge tables. "Is x a
+  neighbour of t" is a binary search in the sorted array of t * N + x
+  edge keys;
+- rejected walkers are proposed again until every walker has moved.
+
+Walks are generated in chunks by a process pool whose workers attach to
+the adjacency arrays in shared memory, so the graph is not copied per
+worker. WalkCorpus hands the chunks to Word2Vec as they arrive and
+regenerates the same walks (same seeds) on each training pass instead of
+keeping the corpus in memory.
+
+    embeddings = train_embeddings(store, dimensions=64, walk_length=30, num_walks=200)
+"""
+
+import os
+from multiprocessing import Pool, shared_memory
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from triple_store import TripleStore
+
+DEFAULT_CHUNK_SIZE = 10_000  # walks per task
+
+class Adjacency(NamedTuple):
+    """Simple-graph adjacency in CSR form; relations and parallel edges merged."""
+    indptr: np.ndarray   # int64, num_nodes + 1
+    indices: np.ndarray  # int32 neighbours, sorted within each row
+    keys: np.ndarray     # int64 row * num_nodes + neighbour, sorted (for membership tests)
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.indptr) - 1
+
+def adjacency(store: TripleStore) -> Adjacency:
+    """Merge the relations and parallel edges in each node's row of `store`."""
+    n = store.num_nodes
+    sources = np.repeat(np.arange(n, dtype=np.int64), np.diff(store.offsets))
+    keys = np.sort(sources * n + store.targets)
+    unique = np.ones(len(keys), dtype=bool)
+    unique[1:] = keys[1:] != keys[:-1]
+    keys = keys[unique]
+    rows, indices = np.divmod(keys, n)
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+    return Adjacency(indptr, indices.astype(np.int32), keys)
+
+def walk_batch(adj: Adjacency, starts: np.ndarray, walk_length: int, p: float = 1.0,
+               q: float = 1.0, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+    """One walk per start node, as an int32 array padded with -1 after dead ends."""
+    rng = rng or np.random.default_rng()
+    n = adj.num_nodes
+    degree = np.diff(adj.indptr)
+    walks = np.full((len(starts), walk_length), -1, dtype=np.int32)
+    walks[:, 0] = starts
+    biased = p != 1.0 or q != 1.0
+    max_weight = max(1.0 / p, 1.0, 1.0 / q)
+
+    alive = np.flatnonzero(degree[starts] > 0)
+    for step in range(1, walk_length):
+        if not len(alive):
+            break
+        current = walks[alive, step - 1]
+        chosen = np.empty(len(alive), dtype=np.int32)
+        pending = np.arange(len(alive))
+        while len(pending):
+            v = current[pending]
+            x = adj.indices[adj.indptr[v] + (rng.random(len(pending)) * degree[v]).astype(np.int64)]
+            if step == 1 or not biased:
+                chosen[pending] = x
+                break
+            t = walks[alive[pending], step - 2]
+            key = t.astype(np.int64) * n + x
+            # Searching in sorted order is several times faster (cache-friendly)
+            order = np.argsort(key)
+            found = np.empty(len(key), dtype=np.int64)
+            found[order] = np.searchsorted(adj.keys, key[order])
+            is_neighbor = adj.keys[np.minimum(found, len(adj.keys) - 1)] == key
+            weight = np.where(x == t, 1.0 / p, np.where(is_neighbor, 1.0, 1.0 / q))
+            accept = rng.random(len(pending)) * max_weight < weight
+            chosen[pending[accept]] = x[accept]
+            pending = pending[~accept]
+        walks[alive, step] = chosen
+        alive = alive[degree[chosen] > 0]
+    return walks
+
+# --- process pool with shared-memory adjacency ------------------------------
+
+_worker_adj: Optional[Adjacency] = None
+_worker_blocks: List[shared_memory.SharedMemory] = []
+
+def _share(adj: Adjacency) -> Tuple[List[shared_memory.SharedMemory], Dict[str, tuple]]:
+    blocks, specs = [], {}
+    for name, array in adj._asdict().items():
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, array.dtype, buffer=block.buf)[:] = array
+        blocks.append(block)
+        specs[name] = (block.name, array.shape, array.dtype.str)
+    return blocks, specs
+
+def _attach(specs: Dict[str, tuple]) -> None:
+    global _worker_adj
+    arrays = {}
+    for name, (block_name, shape, dtype) in specs.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        _worker_blocks.append(block)  # keep the mapping alive
+        arrays[name] = np.ndarray(shape, np.dtype(dtype), buffer=block.buf)
+    _worker_adj = Adjacency(**arrays)
+
+def _walk_task(task: Tuple[np.ndarray, int, float, float, np.random.SeedSequence]) -> np.ndarray:
+    starts, walk_length, p, q, seed = task
+    return walk_batch(_worker_adj, starts, walk_length, p, q, np.random.default_rng(seed))
+
+class WalkCorpus:
+    """A restartable iterable of walks (lists of node-id strings) for gensim's Word2Vec.
+
+    Every pass regenerates the same walks from the same seeds, chunk by
+    chunk across `workers` processes, so only a few chunks are ever held in
+    memory. Use it as a context manager so the pool and shared memory are
+    released.
+    """
+
+    def __init__(self, adj: Adjacency, walk_length: int = 30, num_walks: int = 200,
+                 p: float = 1.0, q: float = 1.0, workers: Optional[int] = None, seed: int = 0,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.adj = adj
+        self.walk_length = walk_length
+        self.num_walks = num_walks
+        self.p = p
+        self.q = q
+        self.workers = workers or os.cpu_count() or 1
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.tokens = np.array([str(i) for i in range(adj.num_nodes)], dtype=object)
+        self._pool = None
+        self._blocks: List[shared_memory.SharedMemory] = []
+
+    def _tasks(self) -> Iterator[tuple]:
+        """(starts, walk_length, p, q, seed) per chunk; identical on every pass."""
+        seeds = np.random.SeedSequence(self.seed)
+        order_rng = np.random.default_rng(seeds.spawn(1)[0])
+        chunk_seeds = iter(seeds.spawn(self.num_walks * -(-self.adj.num_nodes // self.chunk_size)))
+        for _ in range(self.num_walks):
+            starts = order_rng.permutation(self.adj.num_nodes).astype(np.int32)
+            for i in range(0, len(starts), self.chunk_size):
+                yield starts[i:i + self.chunk_size], self.walk_length, self.p, self.q, next(chunk_seeds)
+
+    def walk_chunks(self) -> Iterator[np.ndarray]:
+        """All walks of one pass as int32 arrays of up to chunk_size rows."""
+        if self.workers == 1:
+            global _worker_adj
+            _worker_adj = self.adj
+            yield from map(_walk_task, self._tasks())
+            return
+        if self._pool is None:
+            self._blocks, specs = _share(self.adj)
+            self._pool = Pool(self.workers, initializer=_attach, initargs=(specs,))
+        yield from self._pool.imap(_walk_task, self._tasks())
+
+    def __iter__(self) -> Iterator[List[str]]:
+        for chunk in self.walk_chunks():
+            lengths = (chunk >= 0).sum(axis=1)
+            for walk, length in zip(self.tokens[np.maximum(chunk, 0)], lengths):
+                yield walk[:length].tolist()
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self) -> 'WalkCorpus':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def train_embeddings(store: TripleStore, dimensions: int = 64, walk_length: int = 30,
+                     num_walks: int = 200, p: float = 1.0, q: float = 1.0, window: int = 10,
+                     workers: Optional[int] = None, seed: int = 0, **word2vec_kwargs) -> np.ndarray:
+    """node2vec embeddings as a float32 matrix whose row i is node i.
+
+    Extra keyword arguments go to gensim's Word2Vec (epochs, negative, ...).
+    """
+    from gensim.models import Word2Vec
+
+    workers = workers or os.cpu_count() or 1
+    with WalkCorpus(adjacency(store), walk_length, num_walks, p, q, workers, seed) as corpus:
+        model = Word2Vec(corpus, vector_size=dimensions, window=window, min_count=1, sg=1,
+                         workers=workers, seed=seed, **word2vec_kwargs)
+    embeddings = np.zeros((store.num_nodes, dimensions), dtype=np.float32)
+    ids = np.array([int(token) for token in model.wv.index_to_key], dtype=np.int64)
+    embeddings[ids] = model.wv.vectors
+    return embeddings
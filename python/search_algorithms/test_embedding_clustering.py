@@ -0,0 +1,41 @@
+"""
+Regression checks for the neighbour graphs behind embedding_clustering.py,
+on sets smaller than max_neighbors where every node neighbours every other.
+
+    python -m pytest test_embedding_clustering.py
+"""
+
+import unittest
+
+import numpy as np
+
+from embedding_clustering import DEFAULT_MAX_NEIGHBORS, dbscan, hdbscan, neighbor_graph
+from embedding_search import IVFIndex, normalize
+
+class SmallGraphTest(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+
+    def test_knn_graph_excludes_self(self):
+        vectors = normalize(self.rng.normal(size=(29, 16)).astype(np.float32))
+        ids, scores = IVFIndex(vectors).knn_graph(DEFAULT_MAX_NEIGHBORS)
+        self.assertFalse((ids == np.arange(len(ids))[:, None]).any())
+        self.assertTrue(np.isfinite(scores[ids >= 0]).all())
+        self.assertTrue(np.isneginf(scores[ids < 0]).all())
+
+    def test_neighbor_graph_is_finite(self):
+        for n in (2, 5, 29, DEFAULT_MAX_NEIGHBORS + 1, 100):
+            graph = neighbor_graph(self.rng.normal(size=(n, 16)))
+            self.assertTrue(np.isfinite(graph.data).all(), n)
+            self.assertFalse(graph.diagonal().any(), n)
+            if n - 1 <= DEFAULT_MAX_NEIGHBORS:
+                self.assertEqual(graph.nnz, n * (n - 1), n)
+
+    def test_clustering_fewer_nodes_than_max_neighbors(self):
+        embeddings = self.rng.normal(size=(29, 16))
+        self.assertEqual(len(hdbscan(embeddings)), 29)
+        self.assertEqual(len(dbscan(embeddings)), 29)
+
+if __name__ == '__main__':
+    unittest.main()
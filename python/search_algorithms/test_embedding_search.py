@@ -0,0 +1,52 @@
+"""
+Checks for embedding_search.py: IVFIndex against the exact search it
+approximates, with and without a type mask.
+
+    python -m pytest test_embedding_search.py
+"""
+
+import unittest
+
+import numpy as np
+
+from embedding_search import ExactIndex, IVFIndex, normalize
+
+def clustered_vectors(n: int, dim: int = 16, clusters: int = 20, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    return centers[rng.integers(0, clusters, n)] + 0.5 * rng.standard_normal((n, dim), dtype=np.float32)
+
+def recall(found: np.ndarray, truth: np.ndarray) -> float:
+    return float(np.mean([len(set(f) & set(t)) / len(t) for f, t in zip(found, truth)]))
+
+class EmbeddingSearchTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.vectors = clustered_vectors(2000)
+        cls.queries = cls.vectors[::40]
+        cls.exact = ExactIndex(cls.vectors)
+        cls.ivf = IVFIndex(cls.vectors, nlist=32, nprobe=8)
+
+    def test_exact_matches_brute_force(self):
+        ids, scores = self.exact.search(self.queries, k=5)
+        brute = normalize(self.queries) @ normalize(self.vectors).T
+        np.testing.assert_allclose(scores, -np.sort(-brute, axis=1)[:, :5], rtol=1e-5)
+        self.assertEqual(ids[:, 0].tolist(), list(range(0, 2000, 40)))  # each query finds itself
+
+    def test_ivf_recall(self):
+        truth = self.exact.search(self.queries, k=10)[0]
+        self.assertGreaterEqual(recall(self.ivf.search(self.queries, k=10)[0], truth), 0.9)
+        # Probing every list is an exact search
+        self.assertEqual(recall(self.ivf.search(self.queries, k=10, nprobe=32)[0], truth), 1.0)
+
+    def test_mask(self):
+        mask = np.zeros(len(self.vectors), dtype=bool)
+        mask[:15] = True  # too few allowed nodes for the probed lists alone
+        truth = self.exact.search(self.queries, k=10, mask=mask)[0]
+        found = self.ivf.search(self.queries, k=10, mask=mask)[0]
+        self.assertTrue(mask[found].all())
+        self.assertEqual(recall(found, truth), 1.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+"""
+Checks for graph_file.py: a TripleStore survives save_graph / open_graph,
+and embeddings are dropped when the graph changes.
+
+    python -m pytest test_graph_file.py
+"""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from graph_file import open_embeddings, open_graph, save_embeddings, save_graph
+from test_triple_store import make_triples
+from triple_store import TripleStore
+
+class GraphFileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / 'test.graph'
+        rng = np.random.default_rng(0)
+        edges = rng.integers(0, [30, 4, 30], size=(120, 3)).tolist()
+        self.store = TripleStore.from_triples(make_triples(edges, 30, ['r0', 'r1', 'r2', 'r3']))
+        self.store.node_names[7] = 'naïve ☃'  # names are stored as UTF-8
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        self.assertTrue(save_graph(self.store, self.path))
+        opened = open_graph(self.path)
+        for name in ('offsets', 'relations', 'targets'):
+            self.assertEqual(getattr(opened, name).dtype, getattr(self.store, name).dtype)
+            np.testing.assert_array_equal(getattr(opened, name), getattr(self.store, name))
+        self.assertEqual(list(opened.node_names), list(self.store.node_names))
+        self.assertEqual(opened.relation_names.tolist(), self.store.relation_names.tolist())
+        self.assertEqual(opened.directed, self.store.directed)
+
+        # Lookups by name go through the mapped name table
+        self.assertEqual(opened.node_id('naïve ☃'), 7)
+        self.assertEqual(opened.node_id('n29'), 29)
+        with self.assertRaises(KeyError):
+            opened.node_id('missing')
+        np.testing.assert_array_equal(opened.neighbors('n3', 'r1'), self.store.neighbors('n3', 'r1'))
+        np.testing.assert_array_equal(opened.k_hop(['n0'], hops=2), self.store.k_hop(['n0'], hops=2))
+
+    def test_unchanged_graph_is_left_alone(self):
+        save_graph(self.store, self.path)
+        save_embeddings(self.path, np.ones((self.store.num_nodes, 4)))
+        self.assertFalse(save_graph(self.store, self.path))
+        self.assertEqual(open_embeddings(self.path).shape, (30, 4))
+
+        changed = TripleStore.from_triples(make_triples([(0, 1, 2)], 30, ['r0', 'r1', 'r2', 'r3']))
+        self.assertTrue(save_graph(changed, self.path))
+        self.assertIsNone(open_embeddings(self.path))
+        self.assertEqual(open_graph(self.path).num_edges, 2)
+
+    def test_missing_graph(self):
+        with self.assertRaises(FileNotFoundError):
+            open_graph(self.path)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+"""
+Checks for triple_store.py on edge cases of the CSR construction.
+
+    python -m pytest test_triple_store.py
+"""
+
+import unittest
+
+import numpy as np
+
+from triple_loader import Triples
+from triple_store import TripleStore
+
+def make_triples(edges, num_nodes=3, relations=('binds', 'inhibits')) -> Triples:
+    heads, rels, tails = (np.array(column, dtype=np.int32) for column in zip(*edges)) if edges \
+        else (np.array([], dtype=np.int32),) * 3
+    return Triples(heads, rels, tails, np.array([f'n{i}' for i in range(num_nodes)], dtype=object),
+                   np.array(relations, dtype=object))
+
+class TripleStoreTest(unittest.TestCase):
+
+    def test_empty(self):
+        for directed in (False, True):
+            store = TripleStore.from_triples(make_triples([]), directed=directed)
+            self.assertEqual(store.num_edges, 0)
+            self.assertEqual(len(store.neighbors('n0')), 0)
+            self.assertEqual(store.degree().tolist(), [0, 0, 0])
+            self.assertEqual(store.k_hop(['n1'], hops=2).tolist(), [1])
+            self.assertEqual(store.to_networkx().number_of_edges(), 0)
+
+    def test_single_edge(self):
+        store = TripleStore.from_triples(make_triples([(0, 1, 2)]), directed=True)
+        self.assertEqual((store.offsets.tolist(), store.relations.tolist(), store.targets.tolist()),
+                         ([0, 1, 1, 1], [1], [2]))
+        self.assertEqual(store.neighbors('n0', 'inhibits').tolist(), [2])
+        self.assertEqual(store.neighbors('n0', 'binds').tolist(), [])
+        self.assertEqual(store.degree('n0'), 1)
+        self.assertEqual(store.degree(relation='inhibits').tolist(), [1, 0, 0])
+        self.assertTrue(store.has_edge('n0', 'n2', 'inhibits'))
+        self.assertFalse(store.has_edge('n2', 'n0'))
+        self.assertEqual(list(store.to_networkx().edges(data='label')), [('n0', 'n2', 'inhibits')])
+
+        undirected = TripleStore.from_triples(make_triples([(0, 1, 2)]))
+        self.assertEqual(undirected.neighbors('n2').tolist(), [0])
+        self.assertEqual(undirected.to_networkx().number_of_edges(), 1)
+
+    def test_matches_edge_list(self):
+        rng = np.random.default_rng(0)
+        num_nodes, relations = 40, [f'r{i}' for i in range(7)]
+        edges = rng.integers(0, [num_nodes, len(relations), num_nodes], size=(300, 3))
+        store = TripleStore.from_triples(make_triples(edges.tolist(), num_nodes, relations))
+        expected = {(h, r, t) for h, r, t in edges.tolist()} | {(t, r, h) for h, r, t in edges.tolist()}
+
+        self.assertEqual(store.num_edges, len(expected))
+        self.assertEqual(store.offsets.nbytes, 8 * (num_nodes + 1))  # one row per node, not per relation
+        for u in range(num_nodes):
+            rels, targets = store.edges(u)
+            self.assertEqual(list(zip(rels.tolist(), targets.tolist())),
+                             sorted((r, t) for h, r, t in expected if h == u))
+            for r in range(len(relations)):
+                self.assertEqual(store.neighbors(u, r).tolist(), sorted(t for h, rr, t in expected
+                                                                        if h == u and rr == r))
+        self.assertEqual(store.degree(relation=3).tolist(),
+                         np.bincount([h for h, r, _ in expected if r == 3], minlength=num_nodes).tolist())
+        one_hop = {t for h, r, t in expected if h == 5 and r == 2} | {5}
+        self.assertEqual(store.k_hop([5], relation='r2').tolist(), sorted(one_hop))
+        G = store.to_networkx([0, 1, 2, 3, 4, 5, 6, 7])
+        self.assertEqual(G.number_of_edges(),
+                         len({(min(h, t), r, max(h, t)) for h, r, t in expected if h < 8 and t < 8}))
+
+if __name__ == '__main__':
+    unittest.main()